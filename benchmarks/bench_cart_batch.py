@@ -0,0 +1,81 @@
+"""Compares building a cart with N AddOrderItemApi calls against one batch call.
+
+Run with:
+    python manage.py test benchmarks --pattern="bench_*.py"
+"""
+import time
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from restaurants.models import Order
+
+from tests.fixtures import (
+    create_test_menu,
+    create_test_menu_item,
+    create_test_restaurant,
+    create_test_user,
+)
+
+CART_SIZES = (5, 20, 50)
+
+
+class CartBatchBenchmark(TestCase):
+    def setUp(self):
+        self.user = create_test_user()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.restaurant = create_test_restaurant(creator=self.user)
+        menu = create_test_menu(self.restaurant)
+        self.menu_items = [
+            create_test_menu_item(menu, name=f"Item {index}")
+            for index in range(max(CART_SIZES))
+        ]
+
+    def _new_order(self):
+        Order.objects.all().delete()
+        return Order.objects.create(user=self.user, restaurant=self.restaurant)
+
+    def _single_calls(self, order, size):
+        for menu_item in self.menu_items[:size]:
+            self.client.post(
+                reverse("add-order-item"),
+                {"order": order.order_id, "menu_item": menu_item.id, "quantity": 1},
+            )
+
+    def _batch_call(self, order, size):
+        self.client.post(
+            reverse("batch-order-items"),
+            {
+                "order": str(order.order_id),
+                "operations": [
+                    {"op": "add", "menu_item": menu_item.id, "quantity": 1}
+                    for menu_item in self.menu_items[:size]
+                ],
+            },
+            format="json",
+        )
+
+    def _measure(self, run, size):
+        order = self._new_order()
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            run(order, size)
+            elapsed = time.perf_counter() - start
+        self.assertEqual(order.orderitem_set.count(), size)
+        return elapsed, len(queries)
+
+    def test_batch_against_single_calls(self):
+        print()
+        for size in CART_SIZES:
+            single_time, single_queries = self._measure(self._single_calls, size)
+            batch_time, batch_queries = self._measure(self._batch_call, size)
+            print(
+                f"cart of {size:>2} items | {size} single calls: "
+                f"{single_time * 1000:8.2f}ms {single_queries:>4} queries | "
+                f"1 batch call: {batch_time * 1000:7.2f}ms {batch_queries:>2} queries"
+            )
@@ -0,0 +1,74 @@
+"""Compares update_restaurant_menu_item with the history rows written with each
+change against the rows queued and written in bulk at the end of their
+batched_history() block (settings.HISTORY_DEFERRED_WRITES).
+
+Run with:
+    python manage.py test benchmarks --pattern="bench_*.py"
+"""
+import time
+
+from django.db import connection, reset_queries
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from restaurants.models import MenuItem
+from restaurants.services import update_restaurant_menu_item
+from utils.history_utils import batched_history
+
+from tests.fixtures import (
+    create_test_menu,
+    create_test_menu_item,
+    create_test_restaurant,
+    create_test_user,
+)
+
+UPDATES = 200
+# updates made in one transaction, e.g. a price change of a whole menu
+BATCH_SIZES = (1, 10, 50)
+HISTORY_INSERT = 'INSERT INTO "restaurants_historicalmenuitem"'
+
+
+class DeferredHistoryBenchmark(TransactionTestCase):
+    def setUp(self):
+        user = create_test_user()
+        menu = create_test_menu(create_test_restaurant(creator=user))
+        self.items = [
+            create_test_menu_item(menu, name=f"Item {index}")
+            for index in range(max(BATCH_SIZES))
+        ]
+
+    def _run(self, batch_size):
+        history = MenuItem.history.count()
+        # the query log of the connection only keeps the last 9000 queries
+        reset_queries()
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            for batch in range(UPDATES // batch_size):
+                with batched_history():
+                    for item in self.items[:batch_size]:
+                        update_restaurant_menu_item(
+                            item.id, {"price": f"{batch % 90 + 10}.00"}
+                        )
+            elapsed = time.perf_counter() - start
+        self.assertEqual(MenuItem.history.count() - history, UPDATES)
+        inserts = [q for q in queries if q["sql"].startswith(HISTORY_INSERT)]
+        return UPDATES / elapsed, len(queries), len(inserts)
+
+    def test_deferred_against_immediate_history(self):
+        print()
+        for batch_size in BATCH_SIZES:
+            with override_settings(HISTORY_DEFERRED_WRITES=False):
+                immediate = self._run(batch_size)
+            with override_settings(HISTORY_DEFERRED_WRITES=True):
+                deferred = self._run(batch_size)
+            print(f"{batch_size:>2} updates per transaction", end="")
+            for name, (rate, queries, inserts) in (
+                ("immediate", immediate),
+                ("deferred", deferred),
+            ):
+                print(
+                    f" | {name}: {rate:5.0f} updates/s {queries:>4} queries "
+                    f"({inserts:>3} history inserts)",
+                    end="",
+                )
+            print()
@@ -0,0 +1,106 @@
+"""Benchmarks rendering the catalog payloads with FastJSONRenderer against DRF's
+JSONRenderer.
+
+Run with:
+    python manage.py test benchmarks --pattern="bench_*.py"
+"""
+import statistics
+import time
+
+from django.test import TestCase
+
+from rest_framework.renderers import JSONRenderer
+
+from restaurants.apis import GetAllRestaurantMenuItemsApi, GetAllRestaurantsApi
+from restaurants.models import Cuisine, MenuItem, Restaurant
+from restaurants.selectors import (
+    get_all_restaurant_menu_items,
+    get_all_restaurants,
+    get_user_order_history,
+)
+from users.order_apis import GetOrderHistoryApi
+from utils.json_utils import FastJSONRenderer
+from utils.serializer_utils import compile_serializer
+
+from tests.fixtures import (
+    create_test_menu,
+    create_test_order,
+    create_test_restaurant,
+    create_test_user,
+)
+
+ROWS = 500
+ROUNDS = 20
+
+
+def median_ms(func) -> float:
+    timings = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+class JSONRendererBenchmark(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_test_user()
+        restaurant = create_test_restaurant(creator=cls.user)
+        cuisine = Cuisine.objects.create(name="Local")
+        restaurants = Restaurant.objects.bulk_create(
+            Restaurant(
+                name=f"Restaurant {index}",
+                description="A restaurant",
+                address="",
+                phone_number="",
+                email=f"restaurant{index}@restaurant.com",
+                opening_time=restaurant.opening_time,
+                closing_time=restaurant.closing_time,
+                rating=4.5,
+                creator=cls.user,
+            )
+            for index in range(ROWS)
+        )
+        Restaurant.cuisine.through.objects.bulk_create(
+            Restaurant.cuisine.through(restaurant_id=r.id, cuisine_id=cuisine.id)
+            for r in restaurants
+        )
+        menu = create_test_menu(restaurant, cuisine=cuisine)
+        items = MenuItem.objects.bulk_create(
+            MenuItem(
+                menu=menu,
+                name=f"Item {index}",
+                description="An item",
+                price="10.50",
+                creator=cls.user,
+            )
+            for index in range(ROWS)
+        )
+        for index in range(ROWS // 5):
+            create_test_order(cls.user, restaurant, items[index : index + 3])
+        cls.restaurant = restaurant
+
+    def _compare(self, label, data):
+        drf = JSONRenderer().render(data)
+        self.assertEqual(FastJSONRenderer().render(data), drf)
+        drf_ms = median_ms(lambda: JSONRenderer().render(data))
+        fast_ms = median_ms(lambda: FastJSONRenderer().render(data))
+        print(
+            f"{label:14} | {len(drf) // 1024:>4}kB | drf={drf_ms:.2f}ms | "
+            f"orjson={fast_ms:.2f}ms | {drf_ms / fast_ms:.1f}x"
+        )
+
+    def test_renderers_on_the_catalog_payloads(self):
+        print()
+        for label, serializer_class, queryset in (
+            ("restaurants", GetAllRestaurantsApi, get_all_restaurants()),
+            (
+                "menu items",
+                GetAllRestaurantMenuItemsApi,
+                get_all_restaurant_menu_items(restaurant_id=self.restaurant.id),
+            ),
+            ("order history", GetOrderHistoryApi, get_user_order_history(self.user)),
+        ):
+            data = compile_serializer(serializer_class.OutputSerializer)(queryset)
+            self._compare(label, data)
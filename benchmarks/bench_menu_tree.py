@@ -0,0 +1,69 @@
+"""Benchmarks the restaurant menu tree against the number of menus on the platform.
+
+Run with:
+    python manage.py test benchmarks --pattern="bench_*.py"
+"""
+import statistics
+import time
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from restaurants.models import Menu, MenuItem
+from restaurants.selectors import get_restaurant_menu_tree
+
+from tests.fixtures import (
+    create_test_menu,
+    create_test_menu_item,
+    create_test_restaurant,
+    create_test_user,
+)
+
+PLATFORM_SIZES = (10, 1000, 10000)
+ROUNDS = 50
+
+
+class MenuTreeBenchmark(TestCase):
+    def setUp(self):
+        self.user = create_test_user()
+        self.restaurant = create_test_restaurant(creator=self.user, name="Bench")
+        for menu_index in range(5):
+            menu = create_test_menu(self.restaurant, name=f"Menu {menu_index}")
+            for item_index in range(10):
+                create_test_menu_item(menu, name=f"Item {item_index}")
+        self.other = create_test_restaurant(creator=self.user, name="Platform")
+        self.cuisine = menu.cuisine
+
+    def _grow_platform(self, total_menus: int) -> None:
+        missing = total_menus - Menu.objects.count()
+        menus = Menu.objects.bulk_create(
+            Menu(
+                restaurant=self.other,
+                name=f"Platform {index}",
+                description="",
+                cuisine=self.cuisine,
+                creator=self.user,
+            )
+            for index in range(missing)
+        )
+        MenuItem.objects.bulk_create(
+            MenuItem(menu=menu, name="Item", description="", creator=self.user)
+            for menu in menus
+        )
+
+    def test_latency_is_flat_as_platform_grows(self):
+        print()
+        for total_menus in PLATFORM_SIZES:
+            self._grow_platform(total_menus)
+            timings = []
+            for _ in range(ROUNDS):
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    get_restaurant_menu_tree(restaurant_id=self.restaurant.id)
+                    timings.append(time.perf_counter() - start)
+                self.assertEqual(len(queries), 2)
+            print(
+                f"menu tree | platform menus={Menu.objects.count():>6} | "
+                f"median={statistics.median(timings) * 1000:.3f}ms | queries=2"
+            )
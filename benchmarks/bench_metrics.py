@@ -0,0 +1,33 @@
+"""Measures the cost of recording one request in the metrics store.
+
+Run with:
+    python manage.py test benchmarks --pattern="bench_*.py"
+"""
+import time
+
+from django.test import SimpleTestCase
+
+from core.metrics import store
+
+ITERATIONS = 100_000
+
+
+class MetricsRecordingBenchmark(SimpleTestCase):
+    def test_recording_overhead(self):
+        store.reset()
+        start = time.perf_counter()
+        for index in range(ITERATIONS):
+            store.start()
+            store.finish(
+                url_name="get-order-history",
+                method="GET",
+                status=200,
+                duration=index % 100 / 1000,
+                queries=5,
+                db_time=0.001,
+                cache_hits=0,
+                cache_misses=0,
+            )
+        per_request = (time.perf_counter() - start) / ITERATIONS * 1_000_000
+        store.reset()
+        print(f"\nmetrics: {per_request:.2f}us per recorded request")
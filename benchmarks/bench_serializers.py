@@ -0,0 +1,96 @@
+"""Benchmarks the compiled serializers against DRF on already fetched rows.
+
+Run with:
+    python manage.py test benchmarks --pattern="bench_*.py"
+"""
+import statistics
+import time
+
+from django.test import TestCase
+
+from restaurants.apis import GetAllRestaurantMenusApi, GetAllRestaurantsApi
+from restaurants.models import Cuisine, Menu, Restaurant
+from restaurants.selectors import get_all_restaurant_menus, get_all_restaurants
+from utils.serializer_utils import compile_serializer
+
+from tests.fixtures import create_test_restaurant, create_test_user
+
+RESTAURANTS = 500
+ROUNDS = 20
+
+
+def median_ms(func) -> float:
+    timings = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+class SerializerBenchmark(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = create_test_user()
+        restaurant = create_test_restaurant(creator=user)
+        cuisines = Cuisine.objects.bulk_create(
+            Cuisine(name=f"Cuisine {index}") for index in range(3)
+        )
+        restaurants = Restaurant.objects.bulk_create(
+            Restaurant(
+                name=f"Restaurant {index}",
+                description="",
+                address="",
+                phone_number="",
+                email=f"restaurant{index}@restaurant.com",
+                opening_time=restaurant.opening_time,
+                closing_time=restaurant.closing_time,
+                rating=4.5,
+                creator=user,
+            )
+            for index in range(RESTAURANTS)
+        )
+        through = Restaurant.cuisine.through
+        through.objects.bulk_create(
+            through(restaurant_id=restaurant.id, cuisine_id=cuisine.id)
+            for restaurant in restaurants
+            for cuisine in cuisines
+        )
+        Menu.objects.bulk_create(
+            Menu(
+                restaurant=restaurant,
+                name=f"Menu {index}",
+                description="",
+                cuisine=cuisines[0],
+                creator=user,
+            )
+            for index in range(RESTAURANTS)
+        )
+        cls.restaurant = restaurant
+
+    def _compare(self, label, serializer_class, rows):
+        serialize = compile_serializer(serializer_class)
+        self.assertEqual(serialize(rows), serializer_class(rows, many=True).data)
+        drf = median_ms(lambda: serializer_class(rows, many=True).data)
+        compiled = median_ms(lambda: serialize(rows))
+        print(
+            f"{label:32} | rows={len(rows)} | drf={drf:.2f}ms | "
+            f"compiled={compiled:.2f}ms | {drf / compiled:.1f}x"
+        )
+
+    def test_compiled_serializers_against_drf(self):
+        print()
+        self._compare(
+            "restaurants with cuisines",
+            GetAllRestaurantsApi.OutputSerializer,
+            list(get_all_restaurants()),
+        )
+        menus = get_all_restaurant_menus(restaurant_id=self.restaurant.id)
+        self._compare("menus", GetAllRestaurantMenusApi.OutputSerializer, list(menus))
+
+        serialize = compile_serializer(GetAllRestaurantMenusApi.OutputSerializer)
+        rows = list(menus.values("id", "name", "cuisine__name"))
+        print(
+            f"{'menus from values() rows':32} | rows={len(rows)} | "
+            f"compiled={median_ms(lambda: serialize(rows)):.2f}ms"
+        )
@@ -0,0 +1,115 @@
+"""Benchmarks the peak memory of the streamed lists against the rendered ones as
+the number of rows grows.
+
+Run with:
+    python manage.py test benchmarks --pattern="bench_*.py"
+"""
+import tracemalloc
+
+from django.test import TestCase
+
+from restaurants.apis import GetAllRestaurantMenuItemsApi, GetAllRestaurantsApi
+from restaurants.models import Cuisine, MenuItem, Restaurant
+from restaurants.selectors import get_all_restaurant_menu_items, get_all_restaurants
+from utils.json_utils import FastJSONRenderer
+from utils.pagination_utils import (
+    ID_ORDERING,
+    RESTAURANT_ORDERING,
+    paginate_and_serialize,
+    stream_and_serialize,
+)
+
+from tests.fixtures import create_test_menu, create_test_restaurant, create_test_user
+
+SIZES = (1000, 5000, 10000)
+
+
+class NoPagination:
+    query_params = {}
+
+
+def peak_kb(func) -> float:
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+class StreamingBenchmark(TestCase):
+    def setUp(self):
+        self.user = create_test_user()
+        self.restaurant = create_test_restaurant(creator=self.user)
+        self.menu = create_test_menu(self.restaurant)
+        self.cuisine = Cuisine.objects.create(name="Grill")
+
+    def _grow(self, rows: int) -> None:
+        missing = rows - MenuItem.objects.count()
+        MenuItem.objects.bulk_create(
+            MenuItem(
+                menu=self.menu,
+                name=f"Item {index}",
+                description="An item",
+                price="10.50",
+                creator=self.user,
+            )
+            for index in range(missing)
+        )
+        existing = Restaurant.objects.count()
+        restaurants = Restaurant.objects.bulk_create(
+            Restaurant(
+                name=f"Restaurant {index}",
+                description="A restaurant",
+                address="",
+                phone_number="",
+                email=f"restaurant{index}@restaurant.com",
+                opening_time=self.restaurant.opening_time,
+                closing_time=self.restaurant.closing_time,
+                creator=self.user,
+            )
+            for index in range(existing, rows)
+        )
+        Restaurant.cuisine.through.objects.bulk_create(
+            Restaurant.cuisine.through(restaurant_id=r.id, cuisine_id=self.cuisine.id)
+            for r in restaurants
+        )
+
+    def test_streamed_peak_memory_stays_flat(self):
+        print()
+        cases = (
+            (
+                "menu items",
+                lambda: get_all_restaurant_menu_items(restaurant_id=self.restaurant.id),
+                GetAllRestaurantMenuItemsApi.OutputSerializer,
+                ID_ORDERING,
+            ),
+            (
+                "restaurants",
+                get_all_restaurants,
+                GetAllRestaurantsApi.OutputSerializer,
+                RESTAURANT_ORDERING,
+            ),
+        )
+        for rows in SIZES:
+            self._grow(rows)
+            for label, selector, serializer_class, ordering in cases:
+                rendered = peak_kb(
+                    lambda: FastJSONRenderer().render(
+                        paginate_and_serialize(
+                            selector(), NoPagination, serializer_class, ordering
+                        )
+                    )
+                )
+                streamed = peak_kb(
+                    lambda: sum(
+                        len(chunk)
+                        for chunk in stream_and_serialize(
+                            selector(), serializer_class, ordering
+                        ).streaming_content
+                    )
+                )
+                print(
+                    f"{label:12} | rows={rows:>6} | rendered peak={rendered:>8.0f}kB "
+                    f"| streamed peak={streamed:>6.0f}kB"
+                )
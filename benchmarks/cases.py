@@ -0,0 +1,380 @@
+"""The requests driven by the run_benchmarks command, one per url name.
+
+Each case gets its url args and body from the context built by build_context(),
+from rows of the generated dataset. Cases that change data are rolled back after
+every request, so each request sees the same database.
+"""
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from django.db.models import Count, Exists, OuterRef, Q
+
+from knox.models import AuthToken
+
+from restaurants.models import (
+    Menu,
+    MenuItem,
+    Order,
+    OrderAddress,
+    OrderItem,
+    RestaurantStaff,
+)
+from users.models import CustomUser
+
+PASSWORD = "benchmark-password"
+
+# url names that are not benchmarked, with the reason
+SKIPPED = {
+    "register-restaurant": "uploads a cover photo to the file storage",
+    "create-restaurant-menu-item": "uploads an image to the file storage",
+    "get-archived-restaurant-menus": "the url has no restaurant_id for the view",
+}
+# the async views run in worker threads, outside the transaction of the run, they
+# are compared with their sync views by the benchmark_servers command
+SKIPPED.update(
+    {
+        name: "async view, see benchmark_servers"
+        for name in (
+            "async-get-restaurant-info",
+            "async-get-all-restaurants",
+            "async-get-restaurant-menu-details",
+            "async-get-all-restaurant-menus",
+            "async-get-all-restaurant-menu-items",
+            "async-get-restaurant-menu-item-info",
+            "async-get-order-details",
+        )
+    }
+)
+
+
+@dataclass
+class Case:
+    url_name: str
+    method: str = "get"
+    # ctx -> url args
+    args: Callable[[dict], list] = lambda ctx: []
+    # ctx -> query params (get) or json body
+    data: Optional[Callable[[dict], dict]] = None
+    # "customer", "admin" (restaurant admin), "staff" (platform admin) or None
+    user: Optional[str] = "customer"
+    mutates: bool = False
+    # more request headers, as WSGI environ keys
+    headers: dict = field(default_factory=dict)
+
+
+# the METRICS_TOKEN set by run_benchmarks, the metrics are private without one
+METRICS_TOKEN = "benchmark"
+
+
+CASES = [
+    # restaurants
+    Case("get-restaurant-info", args=lambda ctx: [ctx["restaurant"].id], user=None),
+    Case("get-all-restaurants", user=None),
+    Case("get-all-restaurant-cuisines", user=None),
+    Case(
+        "get-restaurant-that-has-current-cuisine",
+        args=lambda ctx: [ctx["cuisine"].name],
+        user=None,
+    ),
+    Case("get-all-filtered-restaurants", data=lambda ctx: {"rating": 3}, user=None),
+    Case(
+        "edit-restaurant-info",
+        method="put",
+        args=lambda ctx: [ctx["restaurant"].id],
+        data=lambda ctx: {"description": "Benchmarked"},
+        user="admin",
+        mutates=True,
+    ),
+    Case(
+        "disable-restaurant",
+        method="put",
+        args=lambda ctx: [ctx["restaurant"].id],
+        user="staff",
+        mutates=True,
+    ),
+    Case(
+        "restaurant-staff-login",
+        method="post",
+        data=lambda ctx: {"email": ctx["admin"].email, "password": PASSWORD},
+        user=None,
+        mutates=True,
+    ),
+    Case("restaurant-staff-logout", method="post", user="admin", mutates=True),
+    # menus
+    Case(
+        "create-restaurant-menu",
+        method="post",
+        data=lambda ctx: {
+            "restaurant": ctx["restaurant"].id,
+            "name": "Benchmark menu",
+            "description": "Benchmark menu",
+            "cuisine": ctx["cuisine"].id,
+        },
+        user="admin",
+        mutates=True,
+    ),
+    Case("get-restaurant-menu-details", args=lambda ctx: [ctx["menu"].id], user=None),
+    Case("get-all-restaurant-menus", args=lambda ctx: [ctx["restaurant"].id], user=None),
+    Case(
+        "edit-restaurant-menu",
+        method="put",
+        args=lambda ctx: [ctx["menu"].id],
+        data=lambda ctx: {"description": "Benchmarked"},
+        user="admin",
+        mutates=True,
+    ),
+    Case(
+        "archive-restaurant-menu",
+        method="put",
+        args=lambda ctx: [ctx["menu"].id],
+        user="admin",
+        mutates=True,
+    ),
+    Case(
+        "delete-restaurant-menu",
+        method="delete",
+        args=lambda ctx: [ctx["menu"].id],
+        user="admin",
+        mutates=True,
+    ),
+    # menu items
+    Case(
+        "get-all-restaurant-menu-items",
+        args=lambda ctx: [ctx["restaurant"].id],
+        user=None,
+    ),
+    Case("get-restaurant-menu-tree", args=lambda ctx: [ctx["restaurant"].id], user=None),
+    Case(
+        "get-restaurant-menu-item-info",
+        args=lambda ctx: [ctx["menu_item"].id],
+        user=None,
+    ),
+    Case(
+        "edit-restaurant-menu-item",
+        method="put",
+        args=lambda ctx: [ctx["menu_item"].id],
+        data=lambda ctx: {"description": "Benchmarked"},
+        user="admin",
+        mutates=True,
+    ),
+    Case(
+        "archive-restaurant-menu-item",
+        method="put",
+        args=lambda ctx: [ctx["menu_item"].id],
+        user="admin",
+        mutates=True,
+    ),
+    Case(
+        "delete-restaurant-menu-item",
+        method="delete",
+        args=lambda ctx: [ctx["menu_item"].id],
+        user="admin",
+        mutates=True,
+    ),
+    # accounts
+    Case("confirm-token"),
+    Case(
+        "login",
+        method="post",
+        data=lambda ctx: {"email": ctx["customer"].email, "password": PASSWORD},
+        user=None,
+        mutates=True,
+    ),
+    Case("logout", method="post", mutates=True),
+    Case(
+        "signup",
+        method="post",
+        data=lambda ctx: {"email": "benchmark@example.com", "password": PASSWORD},
+        user=None,
+        mutates=True,
+    ),
+    Case(
+        "setup-profile",
+        method="put",
+        args=lambda ctx: [ctx["customer"].id],
+        data=lambda ctx: {
+            "first_name": "Bench",
+            "last_name": "Mark",
+            "phone_number": "08012345678",
+        },
+        user=None,
+        mutates=True,
+    ),
+    Case("get-profile"),
+    Case(
+        "edit-profile",
+        method="put",
+        data=lambda ctx: {"first_name": "Bench"},
+        mutates=True,
+    ),
+    # orders
+    Case(
+        "place-order",
+        method="post",
+        data=lambda ctx: {
+            "restaurant": ctx["restaurant"].id,
+            "menu_item": ctx["menu_item"].id,
+            "quantity": 1,
+        },
+        mutates=True,
+    ),
+    Case("get-orders-based-on-status", args=lambda ctx: ["delivered"]),
+    Case(
+        "get-existing-user-restaurant-order",
+        args=lambda ctx: [ctx["restaurant"].id],
+    ),
+    Case("get-order-details", args=lambda ctx: [ctx["order"].order_id]),
+    Case("get-order-history"),
+    Case(
+        "add-order-address",
+        method="post",
+        data=lambda ctx: {
+            "address_1": "1 Benchmark Street",
+            "address_2": "Benchmark",
+            "phone_number": "08012345678",
+            "email": ctx["customer"].email,
+            "saved": False,
+        },
+        mutates=True,
+    ),
+    Case("get-order-address"),
+    Case(
+        "edit-order-address",
+        method="put",
+        args=lambda ctx: [ctx["address"].id],
+        data=lambda ctx: {"address_1": "2 Benchmark Street"},
+        mutates=True,
+    ),
+    Case(
+        "add-order-item",
+        method="post",
+        data=lambda ctx: {
+            "order": str(ctx["open_order"].order_id),
+            "menu_item": ctx["menu_item"].id,
+            "quantity": 1,
+        },
+        mutates=True,
+    ),
+    Case(
+        "batch-order-items",
+        method="post",
+        data=lambda ctx: {
+            "order": str(ctx["open_order"].order_id),
+            "operations": [
+                {"op": "add", "menu_item": item.id, "quantity": 2}
+                for item in ctx["menu_items"]
+            ],
+        },
+        mutates=True,
+    ),
+    Case("get-all-order-item", args=lambda ctx: [ctx["order"].order_id]),
+    Case(
+        "reduce-order-item-quantity",
+        method="delete",
+        args=lambda ctx: [ctx["order_item"].id],
+        mutates=True,
+    ),
+    Case(
+        "delete-order-item",
+        method="delete",
+        args=lambda ctx: [ctx["order_item"].id],
+        mutates=True,
+    ),
+    # monitoring
+    Case(
+        "metrics",
+        user=None,
+        headers={"HTTP_AUTHORIZATION": f"Bearer {METRICS_TOKEN}"},
+    ),
+]
+
+
+def build_context() -> dict:
+    """This function picks the rows the cases run against from the dataset: the
+    customer with the most paid orders among those with an open order and one saved
+    address, the restaurant of that open order and its admin. The users that are
+    missing from the dataset are created.
+
+    Returns:
+        dict: The rows and an auth token per kind of user
+    """
+    open_order = (
+        Order.objects.filter(
+            Exists(OrderItem.objects.filter(order=OuterRef("pk"))),
+            # OrderAddress.clean() refuses new addresses once 2 are saved
+            user__in=OrderAddress.objects.filter(saved=True)
+            .values("user")
+            .annotate(saved=Count("id"))
+            .filter(saved=1)
+            .values("user"),
+            paid=False,
+            restaurant__is_active=True,
+        )
+        .annotate(
+            history=Count("user__order", filter=Q(user__order__paid=True))
+        )
+        .select_related("user", "restaurant")
+        # order ids are random, the user id keeps the pick stable across runs
+        .order_by("-history", "user_id")
+        .first()
+    )
+    if open_order is None:
+        raise ValueError("The dataset has no open order, run generate_dataset first")
+
+    customer = open_order.user
+    restaurant = open_order.restaurant
+    admin = (
+        RestaurantStaff.objects.filter(restaurant=restaurant, is_restaurant_admin=True)
+        .select_related("user")
+        .first()
+    )
+    admin = admin.user if admin else None
+    if admin is None:
+        admin = CustomUser.objects.create_user(
+            email="benchmark-admin@example.com",
+            username="benchmark-admin",
+            password=PASSWORD,
+        )
+        RestaurantStaff.objects.create(
+            user=admin, restaurant=restaurant, is_restaurant_admin=True
+        )
+    staff = CustomUser.objects.create_user(
+        email="benchmark-staff@example.com",
+        username="benchmark-staff",
+        password=PASSWORD,
+        is_admin=True,
+    )
+    for user in (customer, admin):
+        user.set_password(PASSWORD)
+        user.save(update_fields=["password"])
+
+    menu_items = list(
+        MenuItem.objects.filter(
+            menu__restaurant=restaurant, menu__is_active=True, is_active=True
+        ).order_by("id")[:5]
+    )
+    menu = Menu.objects.get(id=menu_items[0].menu_id)
+    return {
+        "customer": customer,
+        "admin": admin,
+        "staff": staff,
+        "restaurant": restaurant,
+        "cuisine": restaurant.cuisine.order_by("id").first(),
+        "menu": menu,
+        "menu_item": menu_items[0],
+        "menu_items": menu_items,
+        "open_order": open_order,
+        "order_item": open_order.orderitem_set.order_by("id").first(),
+        "order": Order.objects.filter(user=customer, paid=True)
+        .order_by("-date_created")
+        .first(),
+        "address": OrderAddress.objects.filter(user=customer, saved=True).first(),
+        "tokens": {
+            kind: AuthToken.objects.create(user)[1]
+            for kind, user in (
+                ("customer", customer),
+                ("admin", admin),
+                ("staff", staff),
+            )
+        },
+    }
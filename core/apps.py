@@ -0,0 +1,16 @@
+from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+
+class CoreConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "core"
+
+    def ready(self):
+        from django.db import connections
+
+        from core.query_stats import install_query_recorder
+
+        connection_created.connect(install_query_recorder)
+        for connection in connections.all():
+            install_query_recorder(sender=None, connection=connection)
@@ -0,0 +1,242 @@
+import http.client
+import json
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from knox.models import AuthToken
+
+from restaurants.models import MenuItem, Order
+
+# label, sync url name, async url name
+PAIRS = [
+    ("restaurant info", "get-restaurant-info", "async-get-restaurant-info"),
+    ("all restaurants", "get-all-restaurants", "async-get-all-restaurants"),
+    (
+        "menu details",
+        "get-restaurant-menu-details",
+        "async-get-restaurant-menu-details",
+    ),
+    ("all menus", "get-all-restaurant-menus", "async-get-all-restaurant-menus"),
+    (
+        "all menu items",
+        "get-all-restaurant-menu-items",
+        "async-get-all-restaurant-menu-items",
+    ),
+    (
+        "menu item info",
+        "get-restaurant-menu-item-info",
+        "async-get-restaurant-menu-item-info",
+    ),
+    ("order details", "get-order-details", "async-get-order-details"),
+]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_port(port: int, process: subprocess.Popen, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise CommandError(f"The server exited with code {process.returncode}")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise CommandError(f"The server did not listen on port {port} in {timeout}s")
+
+
+class Command(BaseCommand):
+    help = (
+        "Starts the WSGI deployment of the Procfile (gunicorn mysite.wsgi) and the "
+        "ASGI one (uvicorn mysite.asgi:application) against the configured "
+        "database, which must hold a dataset (see generate_dataset), and compares "
+        "the throughput and latency of the sync read only views and their async "
+        "versions under concurrent clients."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            action="append",
+            help="Concurrent clients, can be repeated (default: 1, 16 and 64)",
+        )
+        parser.add_argument(
+            "--duration", type=float, default=10.0, help="Seconds per measurement"
+        )
+        parser.add_argument(
+            "--workers", type=int, default=1, help="Worker processes of each server"
+        )
+        parser.add_argument(
+            "--label", action="append", help="Only run these endpoints (labels)"
+        )
+        parser.add_argument("--output", help="Also write the results as JSON")
+
+    def handle(self, *args, **options):
+        for executable in ("gunicorn", "uvicorn"):
+            if shutil.which(executable) is None:
+                raise CommandError(f"{executable} is not installed")
+
+        menu_item = MenuItem.objects.select_related("menu").first()
+        order = Order.objects.filter(orderitem__isnull=False).first()
+        if menu_item is None or order is None:
+            raise CommandError("The database has no dataset, run generate_dataset")
+        token_instance, token = AuthToken.objects.create(order.user)
+        url_args = {
+            "restaurant info": [menu_item.menu.restaurant_id],
+            "all restaurants": [],
+            "menu details": [menu_item.menu_id],
+            "all menus": [menu_item.menu.restaurant_id],
+            "all menu items": [menu_item.menu.restaurant_id],
+            "menu item info": [menu_item.id],
+            "order details": [order.order_id],
+        }
+        pairs = [
+            pair
+            for pair in PAIRS
+            if not options["label"] or pair[0] in options["label"]
+        ]
+
+        servers = {
+            "wsgi": ["gunicorn", "mysite.wsgi"],
+            "asgi": ["uvicorn", "mysite.asgi:application", "--no-access-log"],
+        }
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": settings.SETTINGS_MODULE}
+        results = {}
+        try:
+            for server, command in servers.items():
+                port = _free_port()
+                if server == "wsgi":
+                    command = command + [
+                        f"--bind=127.0.0.1:{port}",
+                        f"--workers={options['workers']}",
+                    ]
+                else:
+                    command = command + [
+                        "--host=127.0.0.1",
+                        f"--port={port}",
+                        f"--workers={options['workers']}",
+                    ]
+                process = subprocess.Popen(
+                    command,
+                    env=env,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                )
+                try:
+                    _wait_for_port(port, process, timeout=30)
+                    for label, sync_name, async_name in pairs:
+                        url_name = sync_name if server == "wsgi" else async_name
+                        path = reverse(url_name, args=url_args[label])
+                        for concurrency in options["concurrency"] or [1, 16, 64]:
+                            result = self.measure(
+                                port, path, token, concurrency, options["duration"]
+                            )
+                            results.setdefault(label, {}).setdefault(
+                                str(concurrency), {}
+                            )[server] = result
+                            self.stdout.write(
+                                f"{server} {label:16} c={concurrency:<4} "
+                                f"{result['rps']:>8} req/s "
+                                f"p50={result['p50_ms']}ms p95={result['p95_ms']}ms "
+                                f"errors={result['errors']}"
+                            )
+                finally:
+                    process.terminate()
+                    process.wait(timeout=30)
+        finally:
+            token_instance.delete()
+
+        self.stdout.write("")
+        for label, by_concurrency in results.items():
+            for concurrency, by_server in by_concurrency.items():
+                if "wsgi" in by_server and "asgi" in by_server:
+                    wsgi, asgi = by_server["wsgi"]["rps"], by_server["asgi"]["rps"]
+                    ratio = f"{asgi / wsgi:.2f}x" if wsgi else "-"
+                    self.stdout.write(
+                        f"{label:16} c={concurrency:<4} wsgi={wsgi} asgi={asgi} "
+                        f"req/s ({ratio})"
+                    )
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(
+                    {
+                        "meta": {
+                            "python": sys.version.split()[0],
+                            "workers": options["workers"],
+                            "duration": options["duration"],
+                        },
+                        "results": results,
+                    },
+                    f,
+                    indent=2,
+                    sort_keys=True,
+                )
+                f.write("\n")
+
+    def measure(
+        self, port: int, path: str, token: str, concurrency: int, duration: float
+    ) -> dict:
+        headers = {"Authorization": f"Token {token}"}
+        deadline = time.monotonic() + duration
+        lock = threading.Lock()
+        timings, errors = [], []
+
+        def client():
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            own_timings, own_errors = [], 0
+            try:
+                while time.monotonic() < deadline:
+                    start = time.perf_counter()
+                    try:
+                        connection.request("GET", path, headers=headers)
+                        response = connection.getresponse()
+                        response.read()
+                    except (OSError, http.client.HTTPException):
+                        own_errors += 1
+                        connection.close()
+                        continue
+                    own_timings.append(time.perf_counter() - start)
+                    if response.status != 200:
+                        own_errors += 1
+            finally:
+                connection.close()
+            with lock:
+                timings.extend(own_timings)
+                errors.append(own_errors)
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for _ in range(concurrency):
+                executor.submit(client)
+        elapsed = time.monotonic() - started
+
+        timings_ms = sorted(timing * 1000 for timing in timings)
+        if len(timings_ms) > 1:
+            percentiles = statistics.quantiles(timings_ms, n=100, method="inclusive")
+            p50, p95 = percentiles[49], percentiles[94]
+        else:
+            p50 = p95 = timings_ms[0] if timings_ms else 0.0
+        return {
+            "requests": len(timings_ms),
+            "rps": round(len(timings_ms) / elapsed, 1),
+            "p50_ms": round(p50, 2),
+            "p95_ms": round(p95, 2),
+            "errors": sum(errors),
+        }
@@ -0,0 +1,90 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares a run_benchmarks result with a baseline and fails when a url name "
+        "got slower or allocates more than the threshold, makes more queries or "
+        "returns another status."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("baseline")
+        parser.add_argument("current")
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.25,
+            help="Allowed relative increase of latency and memory (0.25 = 25%%)",
+        )
+        parser.add_argument(
+            "--latency-metric",
+            action="append",
+            choices=["p50_ms", "p95_ms", "p99_ms"],
+            help="Latency percentiles to gate on, p50_ms by default. The tail "
+            "percentiles of short runs are noisy.",
+        )
+        parser.add_argument(
+            "--min-delta-ms",
+            type=float,
+            default=1.0,
+            help="Latency increases smaller than this are noise and never flagged",
+        )
+
+    def handle(self, *args, **options):
+        baseline = self.load(options["baseline"])
+        current = self.load(options["current"])
+        threshold = options["threshold"]
+
+        regressions = []
+        for url_name in sorted(baseline.keys() | current.keys()):
+            if url_name not in current:
+                self.stdout.write(f"{url_name}: not in the current run")
+                continue
+            if url_name not in baseline:
+                self.stdout.write(f"{url_name}: new")
+                continue
+
+            before, after = baseline[url_name], current[url_name]
+            problems = []
+            if after["status"] != before["status"]:
+                problems.append(f"status {before['status']} -> {after['status']}")
+            if after["queries"] > before["queries"]:
+                problems.append(f"queries {before['queries']} -> {after['queries']}")
+            for metric in options["latency_metric"] or ["p50_ms"]:
+                delta = after[metric] - before[metric]
+                if delta > options["min_delta_ms"] and delta > before[metric] * threshold:
+                    problems.append(
+                        f"{metric} {before[metric]} -> {after[metric]} "
+                        f"(+{delta / before[metric]:.0%})"
+                        if before[metric]
+                        else f"{metric} {before[metric]} -> {after[metric]}"
+                    )
+            if (
+                before.get("peak_kb")
+                and after.get("peak_kb")
+                and after["peak_kb"] > before["peak_kb"] * (1 + threshold)
+            ):
+                problems.append(f"peak_kb {before['peak_kb']} -> {after['peak_kb']}")
+
+            if problems:
+                regressions.append(url_name)
+                self.stdout.write(self.style.ERROR(f"{url_name}: {', '.join(problems)}"))
+            else:
+                self.stdout.write(
+                    f"{url_name}: p50 {before['p50_ms']} -> {after['p50_ms']}ms, "
+                    f"queries {before['queries']} -> {after['queries']}"
+                )
+
+        if regressions:
+            raise CommandError(f"{len(regressions)} regressed: {', '.join(regressions)}")
+        self.stdout.write(self.style.SUCCESS("No regressions."))
+
+    def load(self, path: str) -> dict:
+        try:
+            with open(path) as f:
+                return json.load(f)["results"]
+        except (OSError, ValueError, KeyError) as e:
+            raise CommandError(f"Can't read {path}: {e}")
@@ -0,0 +1,43 @@
+import glob
+import os
+import pstats
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+def _url_name(path: str) -> str:
+    # <timestamp>-<url name>-<pid>.prof, the url name can contain dashes
+    name = os.path.basename(path)[: -len(".prof")]
+    return name.split("-", 1)[-1].rpartition("-")[0]
+
+
+class Command(BaseCommand):
+    help = "Lists the hottest functions across the profiles in PROFILING_DIR."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=20)
+        parser.add_argument(
+            "--sort",
+            default="tottime",
+            choices=["tottime", "cumulative", "ncalls"],
+            help="tottime: time in the function itself, cumulative: including callees",
+        )
+        parser.add_argument(
+            "--url-name", help="Only read the profiles of this url name"
+        )
+        parser.add_argument("--dir", default=None, help="Defaults to PROFILING_DIR")
+
+    def handle(self, *args, **options):
+        directory = options["dir"] or settings.PROFILING_DIR
+        paths = sorted(glob.glob(os.path.join(directory, "*.prof")))
+        if options["url_name"]:
+            paths = [path for path in paths if _url_name(path) == options["url_name"]]
+        if not paths:
+            raise CommandError(f"No profiles found in {directory}")
+
+        stats = pstats.Stats(paths[0], stream=self.stdout)
+        for path in paths[1:]:
+            stats.add(path)
+        self.stdout.write(f"{len(paths)} profiles")
+        stats.strip_dirs().sort_stats(options["sort"]).print_stats(options["limit"])
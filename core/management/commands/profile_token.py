@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.profiling import PROFILE_HEADER, create_profile_token
+
+
+class Command(BaseCommand):
+    help = (
+        "Prints a signed token that profiles the requests sending it in the "
+        f"{PROFILE_HEADER} header, valid for PROFILING_TOKEN_MAX_AGE seconds."
+    )
+
+    def handle(self, *args, **options):
+        self.stdout.write(create_profile_token())
+        self.stderr.write(
+            f"Send it as the {PROFILE_HEADER} header, it expires in "
+            f"{settings.PROFILING_TOKEN_MAX_AGE} seconds."
+        )
@@ -0,0 +1,35 @@
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from simple_history.models import registered_models
+
+from utils.history_utils import compact_history, prune_history
+
+
+class Command(BaseCommand):
+    help = (
+        "Compacts the history rows that changed nothing and deletes the rows older "
+        "than HISTORY_RETENTION, in chunks."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        now = timezone.now()
+
+        models = sorted(registered_models.values(), key=lambda m: m._meta.label)
+        for model in models:
+            label = model._meta.label
+            compacted = compact_history(model, chunk_size=chunk_size)
+            self.stdout.write(f"{label}: compacted {compacted} history records.")
+
+        for label, retention in settings.HISTORY_RETENTION.items():
+            model = apps.get_model(label)
+            pruned = prune_history(model, now - retention, chunk_size=chunk_size)
+            self.stdout.write(f"{label}: pruned {pruned} history records.")
+
+        self.stdout.write(self.style.SUCCESS("History retention done."))
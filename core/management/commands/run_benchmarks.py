@@ -0,0 +1,220 @@
+import json
+import os
+import platform
+import statistics
+import time
+import tracemalloc
+
+import django
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import (
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.urls import get_resolver, reverse
+
+from benchmarks.cases import CASES, METRICS_TOKEN, SKIPPED, build_context
+from utils.login_utils import last_login_buffer
+
+TRANSACTION_STATEMENTS = ("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Drives every API view through the test client against a generated dataset "
+        "and records p50/p95/p99 latency, queries and peak allocated memory per url "
+        "name as JSON. Compare two runs with compare_benchmarks."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", default="benchmarks/baselines/current.json")
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument(
+            "--memory-iterations",
+            type=int,
+            default=5,
+            help="Requests measured under tracemalloc, separately from the timings",
+        )
+        parser.add_argument(
+            "--url-name", action="append", help="Only run these url names"
+        )
+        parser.add_argument(
+            "--existing-db",
+            action="store_true",
+            help="Run against the configured database (which must hold a dataset) "
+            "instead of a throwaway database filled by generate_dataset",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--users", type=int, default=2000)
+        parser.add_argument("--restaurants", type=int, default=200)
+        parser.add_argument("--orders-per-user", type=int, default=10)
+
+    def handle(self, *args, **options):
+        url_names = self.get_url_names()
+        cases = [
+            case
+            for case in CASES
+            if not options["url_name"] or case.url_name in options["url_name"]
+        ]
+        missing = url_names - {case.url_name for case in CASES} - SKIPPED.keys()
+        for url_name in sorted(missing):
+            self.stderr.write(f"No benchmark case for {url_name}")
+
+        old_name = None
+        try:
+            setup_test_environment(debug=False)
+            own_test_environment = True
+        except RuntimeError:
+            # already set up, e.g. when called from a test
+            own_test_environment = False
+        try:
+            if not options["existing_db"]:
+                old_name = connection.settings_dict["NAME"]
+                connection.creation.create_test_db(verbosity=0, autoclobber=True)
+                call_command(
+                    "generate_dataset",
+                    users=options["users"],
+                    restaurants=options["restaurants"],
+                    orders_per_user=options["orders_per_user"],
+                    seed=options["seed"],
+                    stdout=open(os.devnull, "w"),
+                )
+            results = self.run_cases(cases, options)
+        finally:
+            # the logins of the benchmark users, in a database about to be dropped
+            last_login_buffer.clear()
+            if old_name is not None:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+            if own_test_environment:
+                teardown_test_environment()
+
+        report = {
+            "meta": {
+                "dataset": None
+                if options["existing_db"]
+                else {
+                    "seed": options["seed"],
+                    "users": options["users"],
+                    "restaurants": options["restaurants"],
+                    "orders_per_user": options["orders_per_user"],
+                },
+                "database": connection.vendor,
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "iterations": options["iterations"],
+            },
+            "results": results,
+        }
+        os.makedirs(os.path.dirname(options["output"]) or ".", exist_ok=True)
+        with open(options["output"], "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write("\n")
+        self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+
+    def get_url_names(self) -> set:
+        # the admin site is namespaced, so only the API url names are listed
+        return {name for name in get_resolver().reverse_dict if isinstance(name, str)}
+
+    def run_cases(self, cases: list, options: dict) -> dict:
+        results = {}
+        # the context rows (and the whole run with --existing-db) are rolled back
+        with transaction.atomic(), override_settings(METRICS_TOKEN=METRICS_TOKEN):
+            ctx = build_context()
+            for case in cases:
+                cache.clear()
+                client = Client(**case.headers)
+                if case.user:
+                    token = ctx["tokens"][case.user]
+                    client.defaults["HTTP_AUTHORIZATION"] = f"Token {token}"
+                url = reverse(case.url_name, args=case.args(ctx))
+                data = case.data(ctx) if case.data else None
+
+                for _ in range(options["warmup"]):
+                    self.request(client, case, url, data)
+
+                timings, queries = [], []
+                for _ in range(options["iterations"]):
+                    start = time.perf_counter()
+                    response = self.request(client, case, url, data)
+                    timings.append(time.perf_counter() - start)
+                    queries.append(response.query_count)
+
+                peaks = []
+                tracemalloc.start()
+                try:
+                    for _ in range(options["memory_iterations"]):
+                        tracemalloc.reset_peak()
+                        baseline = tracemalloc.get_traced_memory()[0]
+                        self.request(client, case, url, data)
+                        peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+                finally:
+                    tracemalloc.stop()
+
+                results[case.url_name] = self.summarize(
+                    case, response.status_code, timings, queries, peaks
+                )
+                self.stdout.write(
+                    f"{case.url_name:45} {response.status_code} "
+                    f"p50={results[case.url_name]['p50_ms']}ms "
+                    f"p95={results[case.url_name]['p95_ms']}ms "
+                    f"queries={results[case.url_name]['queries']}"
+                )
+            transaction.set_rollback(True)
+        return results
+
+    def request(self, client: Client, case, url: str, data):
+        kwargs = {}
+        if data is not None and case.method == "get":
+            kwargs = {"data": data}
+        elif data is not None:
+            kwargs = {"data": json.dumps(data), "content_type": "application/json"}
+        if not case.mutates:
+            response = getattr(client, case.method)(url, **kwargs)
+        else:
+            try:
+                with transaction.atomic():
+                    response = getattr(client, case.method)(url, **kwargs)
+                    raise Rollback
+            except Rollback:
+                pass
+        if response.status_code >= 500:
+            raise CommandError(f"{case.url_name} returned {response.status_code}")
+
+        # the savepoints only exist because the benchmark runs in a transaction
+        stats = response.wsgi_request.query_stats
+        response.query_count = stats.count - sum(
+            count
+            for sql, count in stats.statements.items()
+            if sql.startswith(TRANSACTION_STATEMENTS)
+        )
+        return response
+
+    def summarize(
+        self, case, status: int, timings: list, queries: list, peaks: list
+    ) -> dict:
+        timings_ms = sorted(timing * 1000 for timing in timings)
+        percentiles = (
+            statistics.quantiles(timings_ms, n=100, method="inclusive")
+            if len(timings_ms) > 1
+            else timings_ms * 99
+        )
+        return {
+            "method": case.method.upper(),
+            "status": status,
+            "p50_ms": round(percentiles[49], 3),
+            "p95_ms": round(percentiles[94], 3),
+            "p99_ms": round(percentiles[98], 3),
+            "mean_ms": round(statistics.fmean(timings_ms), 3),
+            "queries": max(queries),
+            "peak_kb": round(max(peaks) / 1024, 1) if peaks else None,
+        }
@@ -0,0 +1,361 @@
+import atexit
+import fcntl
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from typing import Optional
+
+from django.conf import settings
+
+from core.middleware import AsyncCapableMiddleware
+from utils.cache_utils import track_catalog_cache_stats
+
+# upper bounds (in seconds) of the request duration histogram buckets
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UNMATCHED = "unmatched"
+
+
+class MetricsStore:
+    """In-process metric values. Recording a request is a few dict updates under
+    a lock, the exposition format is only built when the endpoint is scraped.
+
+    When `settings.METRICS_MULTIPROC_DIR` is set, every process dumps its values to
+    `metrics-<worker>.json` in that directory (at most every
+    `settings.METRICS_FLUSH_INTERVAL` seconds and when it exits), and the endpoint
+    adds up the files of all gunicorn workers. The worker id is unique to the
+    process, and the process holds a lock on `metrics-<worker>.lock` while it
+    lives. See collect() for the workers that exited.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.worker = uuid.uuid4().hex
+        self.worker_lock = None
+        self.in_flight = 0
+        # "url_name|method" -> bucket counts (the last one is +Inf) then the sum
+        self.durations = {}
+        # "url_name|method|status" -> count
+        self.requests = {}
+        # "url_name" -> [queries, seconds]
+        self.db = {}
+        # "url_name" -> [hits, misses]
+        self.cache = {}
+        self.last_flush = time.monotonic()
+
+    def start(self) -> None:
+        with self.lock:
+            self.in_flight += 1
+
+    def finish(
+        self,
+        url_name: str,
+        method: str,
+        status: int,
+        duration: float,
+        queries: int,
+        db_time: float,
+        cache_hits: int,
+        cache_misses: int,
+    ) -> None:
+        key = f"{url_name}|{method}"
+        with self.lock:
+            self.in_flight -= 1
+            histogram = self.durations.get(key)
+            if histogram is None:
+                histogram = self.durations[key] = [0] * (len(DURATION_BUCKETS) + 2)
+            histogram[bisect_left(DURATION_BUCKETS, duration)] += 1
+            histogram[-1] += duration
+
+            request_key = f"{key}|{status}"
+            self.requests[request_key] = self.requests.get(request_key, 0) + 1
+
+            db = self.db.get(url_name)
+            if db is None:
+                db = self.db[url_name] = [0, 0.0]
+            db[0] += queries
+            db[1] += db_time
+
+            if cache_hits or cache_misses:
+                cache = self.cache.get(url_name)
+                if cache is None:
+                    cache = self.cache[url_name] = [0, 0]
+                cache[0] += cache_hits
+                cache[1] += cache_misses
+
+        directory = settings.METRICS_MULTIPROC_DIR
+        if directory and time.monotonic() - self.last_flush >= settings.METRICS_FLUSH_INTERVAL:
+            self.flush(directory)
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {
+                "worker": self.worker,
+                "in_flight": self.in_flight,
+                "durations": {key: list(value) for key, value in self.durations.items()},
+                "requests": dict(self.requests),
+                "db": {key: list(value) for key, value in self.db.items()},
+                "cache": {key: list(value) for key, value in self.cache.items()},
+            }
+
+    def flush(self, directory: Optional[str] = None) -> None:
+        directory = directory or settings.METRICS_MULTIPROC_DIR
+        if not directory:
+            return
+        self.last_flush = time.monotonic()
+        os.makedirs(directory, exist_ok=True)
+        if self.worker_lock is None:
+            # held until the process exits, it tells collect() the worker is alive
+            self.worker_lock = open(
+                os.path.join(directory, f"metrics-{self.worker}.lock"), "w"
+            )
+            fcntl.flock(self.worker_lock, fcntl.LOCK_EX)
+        _write(os.path.join(directory, f"metrics-{self.worker}.json"), self.snapshot())
+
+    def reset(self) -> None:
+        with self.lock:
+            self.in_flight = 0
+            self.durations.clear()
+            self.requests.clear()
+            self.db.clear()
+            self.cache.clear()
+
+    def forked(self) -> None:
+        # a worker forked from a process that already recorded metrics (gunicorn
+        # --preload) starts from zero under its own id
+        self.lock = threading.Lock()
+        self.worker = uuid.uuid4().hex
+        self.worker_lock = None
+        self.reset()
+
+
+store = MetricsStore()
+atexit.register(store.flush)
+os.register_at_fork(after_in_child=store.forked)
+
+# the counters of the workers that exited, see collect()
+EXITED_WORKERS_FILE = "exited-workers.json"
+
+
+def _empty() -> dict:
+    return {"in_flight": 0, "durations": {}, "requests": {}, "db": {}, "cache": {}}
+
+
+def _add(total: dict, snapshot: dict) -> None:
+    for key, value in snapshot["requests"].items():
+        total["requests"][key] = total["requests"].get(key, 0) + value
+    for name in ("durations", "db", "cache"):
+        for key, values in snapshot[name].items():
+            merged = total[name].setdefault(key, [0] * len(values))
+            for index, value in enumerate(values):
+                merged[index] += value
+
+
+def _read(path: str) -> Optional[dict]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write(path: str, snapshot: dict) -> None:
+    # write then rename so a scrape never reads a half written file
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(snapshot, f)
+    os.replace(f"{path}.tmp", path)
+
+
+def _fold_exited_worker(directory: str, worker: str) -> bool:
+    """Adds the counters of a worker whose lock is free (it exited) to the
+    exited workers total and removes its files. Returns whether it exited."""
+    with open(os.path.join(directory, "exited-workers.lock"), "w") as folding:
+        # one process folds at a time, so a worker is never added twice
+        fcntl.flock(folding, fcntl.LOCK_EX)
+        with open(os.path.join(directory, f"metrics-{worker}.lock"), "w") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False
+
+        path = os.path.join(directory, f"metrics-{worker}.json")
+        snapshot = _read(path)
+        if snapshot is not None:
+            exited_path = os.path.join(directory, EXITED_WORKERS_FILE)
+            exited = _read(exited_path) or _empty()
+            _add(exited, snapshot)
+            _write(exited_path, exited)
+        for name in (f"metrics-{worker}.json", f"metrics-{worker}.lock"):
+            try:
+                os.remove(os.path.join(directory, name))
+            except FileNotFoundError:
+                pass
+        return True
+
+
+def collect() -> dict:
+    """This function adds up the metrics of this process and, in multiprocess
+    mode, the files written by the other worker processes.
+
+    The files of the workers that exited are folded into `exited-workers.json`,
+    so their counters are kept and totals never go backwards, while their
+    in-flight gauge is dropped.
+
+    Returns:
+        dict: The merged snapshot
+    """
+    merged = _empty()
+    snapshot = store.snapshot()
+    merged["in_flight"] += snapshot["in_flight"]
+    _add(merged, snapshot)
+
+    directory = settings.METRICS_MULTIPROC_DIR
+    if not directory:
+        return merged
+
+    for path in glob.glob(os.path.join(directory, "metrics-*.json")):
+        worker = os.path.basename(path)[len("metrics-") : -len(".json")]
+        if worker == store.worker or _fold_exited_worker(directory, worker):
+            continue
+        snapshot = _read(path)
+        if snapshot is not None:
+            merged["in_flight"] += snapshot["in_flight"]
+            _add(merged, snapshot)
+
+    exited = _read(os.path.join(directory, EXITED_WORKERS_FILE))
+    if exited is not None:
+        _add(merged, exited)
+    return merged
+
+
+def _labels(**labels) -> str:
+    return ",".join(f'{key}="{value}"' for key, value in labels.items())
+
+
+def render_metrics() -> str:
+    """This function renders the metrics in the Prometheus text exposition format.
+
+    Returns:
+        str: The exposition text
+    """
+    metrics = collect()
+    lines = [
+        "# HELP http_requests_in_flight Requests currently being served.",
+        "# TYPE http_requests_in_flight gauge",
+        f"http_requests_in_flight {metrics['in_flight']}",
+        "# HELP http_requests_total Requests served, by url name, method and status.",
+        "# TYPE http_requests_total counter",
+    ]
+    for key, count in sorted(metrics["requests"].items()):
+        url_name, method, status = key.split("|")
+        lines.append(
+            f"http_requests_total{{{_labels(url_name=url_name, method=method, status=status)}}} {count}"
+        )
+
+    lines += [
+        "# HELP http_request_duration_seconds Time spent serving requests.",
+        "# TYPE http_request_duration_seconds histogram",
+    ]
+    for key, histogram in sorted(metrics["durations"].items()):
+        url_name, method = key.split("|")
+        cumulative = 0
+        for bound, count in zip(DURATION_BUCKETS + ("+Inf",), histogram[:-1]):
+            cumulative += count
+            labels = _labels(url_name=url_name, method=method, le=bound)
+            lines.append(f"http_request_duration_seconds_bucket{{{labels}}} {cumulative}")
+        labels = _labels(url_name=url_name, method=method)
+        lines.append(f"http_request_duration_seconds_sum{{{labels}}} {histogram[-1]:.6f}")
+        lines.append(f"http_request_duration_seconds_count{{{labels}}} {cumulative}")
+
+    lines += [
+        "# HELP db_queries_total SQL queries made while serving requests.",
+        "# TYPE db_queries_total counter",
+    ]
+    for url_name, (queries, _) in sorted(metrics["db"].items()):
+        lines.append(f"db_queries_total{{{_labels(url_name=url_name)}}} {queries}")
+    lines += [
+        "# HELP db_query_duration_seconds_total Time spent in SQL queries.",
+        "# TYPE db_query_duration_seconds_total counter",
+    ]
+    for url_name, (_, seconds) in sorted(metrics["db"].items()):
+        lines.append(
+            f"db_query_duration_seconds_total{{{_labels(url_name=url_name)}}} {seconds:.6f}"
+        )
+
+    lines += [
+        "# HELP catalog_cache_requests_total Catalog cache lookups, by result.",
+        "# TYPE catalog_cache_requests_total counter",
+    ]
+    for url_name, (hits, misses) in sorted(metrics["cache"].items()):
+        for result, count in (("hit", hits), ("miss", misses)):
+            labels = _labels(url_name=url_name, result=result)
+            lines.append(f"catalog_cache_requests_total{{{labels}}} {count}")
+    lines += [
+        "# HELP catalog_cache_hit_ratio Share of catalog cache lookups that were hits.",
+        "# TYPE catalog_cache_hit_ratio gauge",
+    ]
+    for url_name, (hits, misses) in sorted(metrics["cache"].items()):
+        ratio = hits / (hits + misses) if hits + misses else 0
+        lines.append(f"catalog_cache_hit_ratio{{{_labels(url_name=url_name)}}} {ratio:.4f}")
+
+    return "\n".join(lines) + "\n"
+
+
+def _finish_when_sent(content, finish):
+    try:
+        yield from content
+    finally:
+        finish()
+
+
+class MetricsMiddleware(AsyncCapableMiddleware):
+    """Records the duration, status, SQL time and catalog cache lookups of every
+    request, labelled by the resolved url name. Must come before
+    QueryStatsMiddleware in MIDDLEWARE so the query stats are complete. A
+    streaming response is recorded once it was sent."""
+
+    def handle(self, request):
+        cache_stats = track_catalog_cache_stats()
+        store.start()
+        start = time.perf_counter()
+        response = None
+        try:
+            response = self.get_response(request)
+        finally:
+            if response is None or not response.streaming:
+                self._finish(request, response, start, cache_stats)
+        if response.streaming:
+            # a streamed list is served, and makes its queries, until it was sent
+            response.streaming_content = _finish_when_sent(
+                response.streaming_content,
+                lambda: self._finish(request, response, start, cache_stats),
+            )
+        return response
+
+    async def ahandle(self, request):
+        cache_stats = track_catalog_cache_stats()
+        store.start()
+        start = time.perf_counter()
+        response = None
+        try:
+            response = await self.get_response(request)
+            return response
+        finally:
+            self._finish(request, response, start, cache_stats)
+
+    def _finish(self, request, response, start: float, cache_stats: dict) -> None:
+        duration = time.perf_counter() - start
+        query_stats = getattr(request, "query_stats", None)
+        store.finish(
+            url_name=getattr(request.resolver_match, "url_name", None) or UNMATCHED,
+            method=request.method,
+            status=response.status_code if response is not None else 500,
+            duration=duration,
+            queries=query_stats.count if query_stats else 0,
+            db_time=query_stats.duration if query_stats else 0.0,
+            cache_hits=cache_stats["hits"],
+            cache_misses=cache_stats["misses"],
+        )
@@ -0,0 +1,329 @@
+import datetime
+import hashlib
+import json
+import logging
+from typing import Optional, Tuple
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, JsonResponse
+from django.urls import Resolver404, get_resolver
+from django.utils import timezone
+
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from core.models import IdempotencyRecord
+from core.query_stats import (
+    QueryStats,
+    current_query_stats,
+    stream_with_query_stats,
+)
+from utils.async_utils import db_sync_to_async
+
+logger = logging.getLogger("core.queries")
+
+
+class AsyncCapableMiddleware:
+    """Base of the middleware that run natively in both the WSGI and the ASGI
+    request chains. Under ASGI, Django adapts a sync only middleware by running it,
+    and the rest of the chain, in its single sync thread, which serializes the
+    requests. Subclasses implement `handle` for the sync chain and `ahandle` for
+    the async one, without `process_view` hooks (a sync hook also costs a thread
+    switch in the async chain).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            # tells Django that calling the instance returns a coroutine
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.ahandle(request)
+        return self.handle(request)
+
+    def handle(self, request):
+        raise NotImplementedError
+
+    async def ahandle(self, request):
+        raise NotImplementedError
+
+
+class StaticFilesMiddleware(AsyncCapableMiddleware, WhiteNoiseMiddleware):
+    """WhiteNoise's middleware, usable in the ASGI chain. Finding a static file is
+    a dict lookup (a file system lookup with `WHITENOISE_AUTOREFRESH`), it is done
+    in the event loop."""
+
+    def __init__(self, get_response, **kwargs):
+        WhiteNoiseMiddleware.__init__(self, get_response, **kwargs)
+        AsyncCapableMiddleware.__init__(self, get_response)
+
+    def _find_file(self, request):
+        if self.autorefresh:
+            return self.find_file(request.path_info)
+        return self.files.get(request.path_info)
+
+    def handle(self, request):
+        static_file = self._find_file(request)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return self.get_response(request)
+
+    async def ahandle(self, request):
+        static_file = self._find_file(request)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
+
+
+def _get_query_budget(request) -> Optional[int]:
+    # DRF's as_view() and async_api_view() keep the APIView class on the view
+    func = getattr(request.resolver_match, "func", None)
+    return getattr(getattr(func, "cls", func), "query_budget", None)
+
+
+class QueryStatsMiddleware(AsyncCapableMiddleware):
+    """Records the queries each request makes: the count, the total SQL time and
+    the number of duplicated statements.
+
+    The stats are kept on `request.query_stats`. With DEBUG on they are sent back
+    as `X-Query-*` headers, otherwise they are written as one JSON log line to the
+    `core.queries` logger, at the DEBUG level. A view can declare a `query_budget`
+    (the maximum number of queries it should make), going over it is logged as a
+    warning. The queries made outside of the view's control (see
+    `outside_query_budget()`) don't count against the budget.
+    The queries made while a streaming response is consumed are counted, and
+    logged once it was sent. The headers of a streaming response are sent first,
+    they only count the queries of the view.
+
+    The queries are counted by the `record_query` execute wrapper the core app
+    installs on every connection, through the `current_query_stats` context
+    variable, so the ones made in the threads of sync_to_async count too.
+    """
+
+    def handle(self, request):
+        request.query_stats = stats = QueryStats()
+        token = current_query_stats.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_query_stats.reset(token)
+        if response.streaming:
+            self._add_headers(request, response, stats)
+            response.streaming_content = stream_with_query_stats(
+                response.streaming_content,
+                stats,
+                lambda: self._log(request, response, stats),
+            )
+            return response
+        return self._report(request, response, stats)
+
+    async def ahandle(self, request):
+        request.query_stats = stats = QueryStats()
+        token = current_query_stats.set(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_query_stats.reset(token)
+        return self._report(request, response, stats)
+
+    def _report(self, request, response, stats: QueryStats):
+        self._add_headers(request, response, stats)
+        self._log(request, response, stats)
+        return response
+
+    def _add_headers(self, request, response, stats: QueryStats) -> None:
+        if not settings.DEBUG:
+            return
+        budget = _get_query_budget(request)
+        response["X-Query-Count"] = str(stats.count)
+        response["X-Query-Time-Ms"] = str(stats.duration_ms)
+        response["X-Query-Duplicates"] = str(stats.duplicates)
+        if budget is not None:
+            response["X-Query-Budget"] = str(budget)
+
+    def _log(self, request, response, stats: QueryStats) -> None:
+        if settings.DEBUG:
+            return
+        budget = _get_query_budget(request)
+        over_budget = budget is not None and stats.budgeted > budget
+        level = logging.WARNING if over_budget else logging.DEBUG
+        if logger.isEnabledFor(level):
+            record = {
+                "method": request.method,
+                "path": request.path,
+                "url_name": getattr(request.resolver_match, "url_name", None),
+                "status": response.status_code,
+                **stats.as_dict(),
+                "budget": budget,
+            }
+            logger.log(level, json.dumps(record), extra={"query_stats": record})
+
+
+class IdempotencyMiddleware(AsyncCapableMiddleware):
+    """Replays the stored response of a request that was already executed with the
+    same `Idempotency-Key` header, instead of running the view again.
+
+    Only POST/DELETE requests to the url names in `settings.IDEMPOTENT_URL_NAMES`
+    are handled. Keys are scoped to the Authorization header, method and path so
+    clients can't replay each other's responses.
+    A key is reserved with a unique insert before the view runs: a request reusing
+    a key whose request is still in flight gets a 409, and one reusing it with
+    another body gets a 422. Successful (2xx) responses are stored in the
+    reservation, otherwise it is released so the request can be retried. A
+    reservation still in flight after `settings.IDEMPOTENCY_RESERVATION_TIMEOUT`
+    (its worker was killed) and an expired record are taken over when their key is
+    used again, expired records are removed by the `sweep_idempotency_keys`
+    command otherwise.
+    """
+
+    methods = ("POST", "DELETE")
+
+    def handle(self, request):
+        key = self._get_key(request)
+        if key is None:
+            return self.get_response(request)
+        response, reserved_at = self._reserve(key, self._get_request_hash(request))
+        if response is not None:
+            return response
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            self._release(key, reserved_at)
+            raise
+        self._store(key, reserved_at, response)
+        return response
+
+    async def ahandle(self, request):
+        key = self._get_key(request)
+        if key is None:
+            return await self.get_response(request)
+        response, reserved_at = await db_sync_to_async(self._reserve)(
+            key, self._get_request_hash(request)
+        )
+        if response is not None:
+            return response
+        try:
+            response = await self.get_response(request)
+        except BaseException:
+            await db_sync_to_async(self._release)(key, reserved_at)
+            raise
+        await db_sync_to_async(self._store)(key, reserved_at, response)
+        return response
+
+    def _get_key(self, request) -> Optional[str]:
+        idempotency_key = request.headers.get("Idempotency-Key")
+        if not idempotency_key or request.method not in self.methods:
+            return None
+        try:
+            match = get_resolver(getattr(request, "urlconf", None)).resolve(
+                request.path_info
+            )
+        except Resolver404:
+            return None
+        if match.url_name not in settings.IDEMPOTENT_URL_NAMES:
+            return None
+
+        scope = "\n".join(
+            [
+                request.headers.get("Authorization", ""),
+                request.method,
+                request.path,
+                idempotency_key,
+            ]
+        )
+        return hashlib.sha256(scope.encode()).hexdigest()
+
+    def _get_request_hash(self, request) -> str:
+        return hashlib.sha256(request.body).hexdigest()
+
+    def _reserve(
+        self, key: str, request_hash: str
+    ) -> Tuple[Optional[HttpResponse], Optional[datetime.datetime]]:
+        """Reserves the key for this request and returns the time of the
+        reservation, or returns the response to send instead of running the view.
+        A new key only takes the insert, the record of a used key is read when the
+        insert is rejected."""
+        try:
+            with transaction.atomic():
+                record = IdempotencyRecord.objects.create(
+                    key=key, request_hash=request_hash
+                )
+            return None, record.created_at
+        except IntegrityError:
+            # the key was used before, or a concurrent request reserved it first
+            pass
+
+        record = IdempotencyRecord.objects.filter(key=key).first()
+        if record is None:
+            # released by the request that held it since the insert
+            return self._in_flight(), None
+
+        now = timezone.now()
+        expired = record.created_at < now - settings.IDEMPOTENCY_KEY_TTL
+        abandoned = (
+            record.status_code is None
+            and record.created_at < now - settings.IDEMPOTENCY_RESERVATION_TIMEOUT
+        )
+        if expired or abandoned:
+            # only one of the concurrent requests reusing it takes it over
+            taken = IdempotencyRecord.objects.filter(
+                id=record.id, created_at=record.created_at
+            ).update(
+                request_hash=request_hash,
+                status_code=None,
+                content=b"",
+                content_type="",
+                created_at=now,
+            )
+            if taken:
+                return None, now
+            return self._in_flight(), None
+
+        if record.request_hash != request_hash:
+            response = JsonResponse(
+                {"detail": "The Idempotency-Key was used for another request."},
+                status=422,
+            )
+            return response, None
+        if record.status_code is None:
+            return self._in_flight(), None
+
+        response = HttpResponse(
+            bytes(record.content),
+            status=record.status_code,
+            content_type=record.content_type,
+        )
+        response["Idempotent-Replayed"] = "true"
+        return response, None
+
+    def _in_flight(self) -> HttpResponse:
+        return JsonResponse(
+            {"detail": "A request with this Idempotency-Key is in progress."},
+            status=409,
+        )
+
+    def _reservation(self, key: str, reserved_at: datetime.datetime):
+        # a reservation taken over by another request has another time
+        return IdempotencyRecord.objects.filter(
+            key=key, status_code__isnull=True, created_at=reserved_at
+        )
+
+    def _store(self, key: str, reserved_at: datetime.datetime, response) -> None:
+        if not 200 <= response.status_code < 300 or response.streaming:
+            self._release(key, reserved_at)
+            return
+        self._reservation(key, reserved_at).update(
+            status_code=response.status_code,
+            content=response.content,
+            content_type=response.get("Content-Type", ""),
+        )
+
+    def _release(self, key: str, reserved_at: datetime.datetime) -> None:
+        self._reservation(key, reserved_at).delete()
@@ -0,0 +1,16 @@
+from django.db import models
+
+
+class IdempotencyRecord(models.Model):
+    # sha256 of the Idempotency-Key header scoped to the caller, method and path
+    key = models.CharField(max_length=64, unique=True)
+    # sha256 of the request body, a key can't be reused for another request
+    request_hash = models.CharField(max_length=64, default="")
+    # null while the request holding the key is in flight
+    status_code = models.PositiveSmallIntegerField(null=True)
+    content = models.BinaryField(default=b"")
+    content_type = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.key} | {self.status_code} | {self.created_at}"
@@ -0,0 +1,115 @@
+import cProfile
+import os
+import random
+import time
+
+from django.conf import settings
+from django.core import signing
+
+from core.middleware import AsyncCapableMiddleware
+
+PROFILE_HEADER = "X-Profile"
+TOKEN_SALT = "core.profiling"
+
+
+def create_profile_token() -> str:
+    """This function creates a token that enables profiling for the requests that
+    send it in the `X-Profile` header, until `settings.PROFILING_TOKEN_MAX_AGE`.
+
+    Returns:
+        str: The signed token
+    """
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign("profile")
+
+
+def _has_valid_token(request) -> bool:
+    token = request.headers.get(PROFILE_HEADER)
+    if not token:
+        return False
+    try:
+        signing.TimestampSigner(salt=TOKEN_SALT).unsign(
+            token, max_age=settings.PROFILING_TOKEN_MAX_AGE
+        )
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def _rotate(directory: str, keep: int) -> None:
+    profiles = sorted(
+        (entry for entry in os.scandir(directory) if entry.name.endswith(".prof")),
+        key=lambda entry: entry.stat().st_mtime,
+    )
+    for entry in profiles[:-keep] if keep else profiles:
+        try:
+            os.remove(entry.path)
+        except FileNotFoundError:
+            # another worker rotated it first
+            pass
+
+
+class ProfilingMiddleware(AsyncCapableMiddleware):
+    """Runs the view under cProfile when the request sends a valid signed token in
+    the `X-Profile` header (see the `profile_token` command), or for one request in
+    `settings.PROFILING_SAMPLE_RATE` (0 turns sampling off).
+
+    It should be the last middleware so the profile covers the view, including the
+    serializers and the rendering of the response, and not the other middleware.
+    Profiles are written to `settings.PROFILING_DIR` as
+    `<timestamp>-<url name>-<pid>.prof`, keeping the newest
+    `settings.PROFILING_MAX_FILES`. Use the `profile_hotspots` command to read them.
+    """
+
+    # True while an async request is profiled, the event loop's thread can only
+    # run one profiler at a time
+    _profiling = False
+
+    def _should_profile(self, requested: bool) -> bool:
+        sample_rate = settings.PROFILING_SAMPLE_RATE
+        sampled = bool(sample_rate) and random.randrange(sample_rate) == 0
+        return requested or sampled
+
+    def handle(self, request):
+        requested = _has_valid_token(request)
+        if not self._should_profile(requested):
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        return self._finish(request, response, profiler, requested)
+
+    async def ahandle(self, request):
+        requested = _has_valid_token(request)
+        if self._profiling or not self._should_profile(requested):
+            return await self.get_response(request)
+
+        # the profile covers the event loop's thread, the requests it serves in
+        # the meantime included, and not the worker threads of sync_to_async
+        self._profiling = True
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            response = await self.get_response(request)
+        finally:
+            profiler.disable()
+            self._profiling = False
+        return self._finish(request, response, profiler, requested)
+
+    def _finish(self, request, response, profiler: cProfile.Profile, requested: bool):
+        name = self._save(request, profiler)
+        if requested:
+            response["X-Profile-Id"] = name
+        return response
+
+    def _save(self, request, profiler: cProfile.Profile) -> str:
+        directory = settings.PROFILING_DIR
+        os.makedirs(directory, exist_ok=True)
+        url_name = getattr(request.resolver_match, "url_name", None) or "unmatched"
+        name = f"{time.time():.6f}-{url_name}-{os.getpid()}.prof"
+        profiler.dump_stats(os.path.join(directory, name))
+        _rotate(directory, settings.PROFILING_MAX_FILES)
+        return name
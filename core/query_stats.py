@@ -0,0 +1,122 @@
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterable, Iterator
+
+
+class QueryStats:
+    """Collects the number of queries, the time spent in the database and the
+    statements that were run more than once (the usual sign of an N+1).
+
+    An instance is a database execute wrapper, install it with
+    `connection.execute_wrapper(stats)`. Statements are compared without their
+    params, so the same query run for every row of a list counts as duplicated.
+    The queries made in an `outside_query_budget()` block are counted apart in
+    `unbudgeted`.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.unbudgeted = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.statements[sql] += 1
+
+    @property
+    def duplicates(self) -> int:
+        """The number of queries that repeated an earlier statement."""
+        return sum(count - 1 for count in self.statements.values() if count > 1)
+
+    @property
+    def budgeted(self) -> int:
+        """The number of queries that count against the view's query_budget."""
+        return self.count - self.unbudgeted
+
+    @property
+    def duration_ms(self) -> float:
+        return round(self.duration * 1000, 2)
+
+    def as_dict(self) -> dict:
+        return {
+            "queries": self.count,
+            "unbudgeted_queries": self.unbudgeted,
+            "db_time_ms": self.duration_ms,
+            "duplicates": self.duplicates,
+        }
+
+
+# the stats of the request being served, set by QueryStatsMiddleware. A context
+# variable follows the request into the threads sync_to_async runs its code in,
+# where the queries go through the connections of those threads.
+current_query_stats = ContextVar("current_query_stats", default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    """Execute wrapper that adds the query to `current_query_stats`, if set."""
+    stats = current_query_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    return stats(execute, sql, params, many, context)
+
+
+def install_query_recorder(sender, connection, **kwargs) -> None:
+    """`connection_created` receiver that installs `record_query` on every
+    connection, in every thread."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@contextmanager
+def outside_query_budget():
+    """Context manager for the queries of the current request that are not the
+    view's own, e.g. verifying a token that is not in the token cache yet. They are
+    still counted, but not against the view's query_budget."""
+    stats = current_query_stats.get()
+    if stats is None:
+        yield
+        return
+    start = stats.count
+    try:
+        yield
+    finally:
+        stats.unbudgeted += stats.count - start
+
+
+def stream_with_query_stats(
+    content: Iterable[bytes], stats: QueryStats, on_close: Callable[[], None]
+) -> Iterator[bytes]:
+    """This function wraps the content of a streaming response, which is read
+    after the middleware returned, e.g. a list streamed with its queries.
+
+    Args:
+        content (Iterable[bytes]): The streaming content
+        stats (QueryStats): The stats the queries made to produce the chunks are
+            added to
+        on_close (Callable[[], None]): Called once the content was consumed, or
+            the response closed before that
+
+    Yields:
+        bytes: The chunks of the content
+    """
+    iterator = iter(content)
+    try:
+        while True:
+            token = current_query_stats.set(stats)
+            try:
+                chunk = next(iterator, None)
+            finally:
+                current_query_stats.reset(token)
+            if chunk is None:
+                return
+            yield chunk
+    finally:
+        on_close()
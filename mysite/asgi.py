@@ -5,3 +5,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "mysite.settings")
 
 application = get_asgi_application()
+
+# writes the buffered last_login timestamps of this worker
+from utils.login_utils import last_login_buffer  # noqa: E402
+
+last_login_buffer.start()
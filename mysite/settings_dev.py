@@ -1,5 +1,6 @@
 from datetime import timedelta
 import os
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -36,11 +37,14 @@ INSTALLED_APPS = [
     "simple_history",
     "storages",
     "knox",
+    "core",
     "users",
     "restaurants",
 ]
 
 MIDDLEWARE = [
+    "core.metrics.MetricsMiddleware",
+    "core.middleware.QueryStatsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
@@ -50,7 +54,9 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "simple_history.middleware.HistoryRequestMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "core.middleware.StaticFilesMiddleware",
+    "core.middleware.IdempotencyMiddleware",
+    "core.profiling.ProfilingMiddleware",
 ]
 
 ROOT_URLCONF = "mysite.urls"
@@ -139,6 +145,20 @@ AZURE_CONTAINER = ""
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Cache
+# https://docs.djangoproject.com/en/4.0/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    }
+}
+
+# Seconds a serialized catalog payload (restaurants, cuisines, menus) is kept,
+# saving or deleting a catalog model invalidates it before that (restaurants.signals)
+CATALOG_CACHE_TIMEOUT = 60 * 60
+
 # Django CORS Headers
 CORS_ALLOW_ALL_ORIGINS = True
 
@@ -152,7 +172,20 @@ CORS_ALLOW_METHODS = [
 # Django Rest Framework Settings
 REST_FRAMEWORK = {
     # "EXCEPTION_HANDLER": "core.exception_handlers.custom_exception_handler",
-    "DEFAULT_AUTHENTICATION_CLASSES": ("knox.auth.TokenAuthentication",),
+    # knox, with the verified tokens cached (see utils/auth_utils.py)
+    "DEFAULT_AUTHENTICATION_CLASSES": (
+        "utils.auth_utils.CachedTokenAuthentication",
+    ),
+    # orjson backed, with DRF's output (see utils/json_utils.py)
+    "DEFAULT_RENDERER_CLASSES": (
+        "utils.json_utils.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "utils.json_utils.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
 }
 
 # Django REST KNOX
@@ -166,3 +199,61 @@ REST_KNOX = {
     "AUTH_HEADER_PREFIX": "Token",
     "EXPIRY_DATETIME_FORMAT": "iso-8601",
 }
+
+# Seconds a verified token is kept by CachedTokenAuthentication, and how many
+# tokens each process keeps. Logging out invalidates them before that.
+AUTH_TOKEN_CACHE_TIMEOUT = 60
+AUTH_TOKEN_CACHE_MAX_ENTRIES = 10000
+
+# Seconds the staff memberships of a user are cached for the permission checks,
+# changes to RestaurantStaff invalidate them before that. Only used with a cache
+# shared by the workers (see utils/permission_utils.py)
+STAFF_MEMBERSHIPS_CACHE_TIMEOUT = 60 * 5
+
+# last_login updates are buffered in memory and written with one bulk UPDATE per
+# batch by a thread of each worker, every LAST_LOGIN_FLUSH_INTERVAL seconds and
+# when LAST_LOGIN_BATCH_SIZE logins are buffered (see utils/login_utils.py)
+LAST_LOGIN_FLUSH_INTERVAL = 30
+LAST_LOGIN_BATCH_SIZE = 500
+
+# History rows of the changes saved in a batched_history() block are queued and
+# written when the block ends, before its transaction commits, with one bulk
+# INSERT per model (see utils/history_utils.py)
+HISTORY_DEFERRED_WRITES = True
+
+# History kept by the prune_history command, per model (models not listed keep all
+# of it). Rows that only change HISTORY_COMPACTION_IGNORED_FIELDS are compacted.
+HISTORY_RETENTION = {
+    "users.CustomUser": timedelta(days=365),
+    "restaurants.RestaurantStaff": timedelta(days=365),
+    "restaurants.Menu": timedelta(days=365 * 2),
+    "restaurants.MenuItem": timedelta(days=365 * 2),
+}
+HISTORY_COMPACTION_IGNORED_FIELDS = ["last_login"]
+
+# Idempotency-Key handling, see core.middleware.IdempotencyMiddleware
+IDEMPOTENCY_KEY_TTL = timedelta(hours=24)
+# an in-flight key whose worker died is taken over after this
+IDEMPOTENCY_RESERVATION_TIMEOUT = timedelta(minutes=5)
+IDEMPOTENT_URL_NAMES = [
+    "place-order",
+    "add-order-item",
+    "batch-order-items",
+    "reduce-order-item-quantity",
+    "delete-order-item",
+]
+
+# Request metrics served at /metrics/, see core.metrics
+# With several gunicorn workers, point this to a directory shared by the workers
+METRICS_MULTIPROC_DIR = os.environ.get("METRICS_MULTIPROC_DIR")
+METRICS_FLUSH_INTERVAL = 5  # seconds
+# required to scrape /metrics/ when DEBUG is off
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+
+# Request profiling, see core.profiling.ProfilingMiddleware
+PROFILING_DIR = os.environ.get(
+    "PROFILING_DIR", os.path.join(tempfile.gettempdir(), "shaap-profiles")
+)
+PROFILING_SAMPLE_RATE = 0  # profile 1 in N requests, 0 to only use X-Profile tokens
+PROFILING_MAX_FILES = 200
+PROFILING_TOKEN_MAX_AGE = 60 * 60
@@ -1,8 +1,11 @@
 from django.contrib import admin
 from django.urls import path, include
 
+from core.views import metrics_view
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("user/", include("users.urls")),
     path("restaurant/", include("restaurants.urls")),
+    path("metrics/", metrics_view, name="metrics"),
 ]
@@ -5,3 +5,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "mysite.settings")
 
 application = get_wsgi_application()
+
+# writes the buffered last_login timestamps of this worker
+from utils.login_utils import last_login_buffer  # noqa: E402
+
+last_login_buffer.start()
@@ -15,10 +15,10 @@ from restaurants.selectors import (
     get_archived_restaurant_menus,
     get_all_restaurant_menus,
     get_all_restaurants,
-    get_menu_items_with_menu,
     get_restaurant_info,
     get_restaurant_menu,
     get_restaurant_menu_item,
+    get_restaurant_menu_tree,
 )
 from restaurants.services import (
     archive_menu,
@@ -36,8 +36,17 @@ from restaurants.services import (
 )
 
 from utils.authtoken_serializer import AuthTokenSerializer
+from utils.cache_utils import get_or_set_catalog_payload
+from utils.pagination_utils import (
+    ID_ORDERING,
+    RESTAURANT_ORDERING,
+    get_pagination_params,
+    is_stream_requested,
+    paginate_and_serialize,
+    stream_and_serialize,
+)
 from utils.permission_utils import IsAdminUser, IsRestaurantAdmin
-from utils.serializer_utils import inline_serializer
+from utils.serializer_utils import depends_on, inline_serializer
 
 
 class RestaurantStaffLoginApi(APIView):
@@ -85,6 +94,8 @@ class RegisterRestaurantApi(APIView):
 
 
 class GetRestaurantInfoApi(APIView):
+    query_budget = 1
+
     class OutputSerializer(serializers.Serializer):
         id = serializers.IntegerField()
         cover_photo = serializers.ImageField()
@@ -99,12 +110,17 @@ class GetRestaurantInfoApi(APIView):
 
     def get(self, request, id):
         # if object does not exist, it will raise a rest_exception
-        restaurant = get_restaurant_info(id=id)
-        data = self.OutputSerializer(restaurant)
-        return Response(status=status.HTTP_200_OK, data=data.data)
+        data = get_or_set_catalog_payload(
+            "restaurant-info",
+            lambda: self.OutputSerializer(get_restaurant_info(id=id)).data,
+            restaurant_id=id,
+        )
+        return Response(status=status.HTTP_200_OK, data=data)
 
 
 class GetAllRestaurantsApi(APIView):
+    query_budget = 2
+
     class OutputSerializer(serializers.Serializer):
         id = serializers.IntegerField()
         cover_photo = serializers.ImageField()
@@ -120,23 +136,41 @@ class GetAllRestaurantsApi(APIView):
         rating = serializers.DecimalField(max_digits=2, decimal_places=1)
 
     def get(self, request):
-        restaurants = get_all_restaurants()
-        data = self.OutputSerializer(restaurants, many=True)
-        return Response(status=status.HTTP_200_OK, data=data.data)
+        if is_stream_requested(request):
+            return stream_and_serialize(
+                get_all_restaurants(), self.OutputSerializer, RESTAURANT_ORDERING
+            )
+        data = get_or_set_catalog_payload(
+            "restaurants",
+            lambda: paginate_and_serialize(
+                get_all_restaurants(), request, self.OutputSerializer, RESTAURANT_ORDERING
+            ),
+            **get_pagination_params(request),
+        )
+        return Response(status=status.HTTP_200_OK, data=data)
 
 
 class GetAllRestaurantCuisinesApi(APIView):
+    query_budget = 1
+
     class OutputSerializer(serializers.Serializer):
         id = serializers.IntegerField()
         name = serializers.CharField()
 
     def get(self, request):
-        cuisines = get_all_cuisines()
-        data = self.OutputSerializer(cuisines, many=True)
-        return Response(status=status.HTTP_200_OK, data=data.data)
+        data = get_or_set_catalog_payload(
+            "cuisines",
+            lambda: paginate_and_serialize(
+                get_all_cuisines(), request, self.OutputSerializer, ID_ORDERING
+            ),
+            **get_pagination_params(request),
+        )
+        return Response(status=status.HTTP_200_OK, data=data)
 
 
 class GetRestaurantWithCuisineApi(APIView):
+    query_budget = 3
+
     class OutputSerializer(serializers.Serializer):
         id = serializers.IntegerField()
         cover_photo = serializers.ImageField()
@@ -152,9 +186,18 @@ class GetRestaurantWithCuisineApi(APIView):
         rating = serializers.DecimalField(max_digits=2, decimal_places=1)
 
     def get(self, request, cuisine):
-        restaurants = get_all_restaurants_with_cuisine(cuisine=cuisine)
-        data = self.OutputSerializer(restaurants, many=True)
-        return Response(status=status.HTTP_200_OK, data=data.data)
+        data = get_or_set_catalog_payload(
+            "restaurants-with-cuisine",
+            lambda: paginate_and_serialize(
+                get_all_restaurants_with_cuisine(cuisine=cuisine),
+                request,
+                self.OutputSerializer,
+                ID_ORDERING,
+            ),
+            cuisine=cuisine,
+            **get_pagination_params(request),
+        )
+        return Response(status=status.HTTP_200_OK, data=data)
 
 
 class GetAllFilteredRestaurantsApi(APIView):
@@ -174,12 +217,15 @@ class GetAllFilteredRestaurantsApi(APIView):
 
     def get(self, request):
         filtered_restaurants = filter_restaurants(request.query_params)
-        data = self.OutputSerializer(filtered_restaurants, many=True)
-        return Response(data.data)
+        data = paginate_and_serialize(
+            filtered_restaurants, request, self.OutputSerializer, RESTAURANT_ORDERING
+        )
+        return Response(data)
 
 
 class EditRestaurantInfoApi(APIView):
     permission_classes = [IsRestaurantAdmin]
+    restaurant_lookup = ("restaurant", "id")
 
     class InputSerializer(serializers.Serializer):
         cover_photo = serializers.ImageField(required=False)
@@ -206,6 +252,9 @@ class ArchiveRestaurantApi(APIView):
 
 
 class CreateRestaurantMenuApi(APIView):
+    permission_classes = [IsRestaurantAdmin]
+    restaurant_lookup = ("restaurant", "restaurant")
+
     class InputSerializer(serializers.Serializer):
         restaurant = serializers.PrimaryKeyRelatedField(
             queryset=Restaurant.objects.all()
@@ -223,6 +272,8 @@ class CreateRestaurantMenuApi(APIView):
 
 
 class GetAllRestaurantMenusApi(APIView):
+    query_budget = 2
+
     class OutputSerializer(serializers.Serializer):
         id = serializers.IntegerField()
         name = serializers.CharField()
@@ -230,11 +281,13 @@ class GetAllRestaurantMenusApi(APIView):
 
     def get(self, request, restaurant_id):
         menus = get_all_restaurant_menus(restaurant_id=restaurant_id)
-        data = self.OutputSerializer(menus, many=True)
-        return Response(status=status.HTTP_200_OK, data=data.data)
+        data = paginate_and_serialize(menus, request, self.OutputSerializer, ID_ORDERING)
+        return Response(status=status.HTTP_200_OK, data=data)
 
 
 class GetRestaurantMenuDetailsApi(APIView):
+    query_budget = 1
+
     class OutputSerializer(serializers.Serializer):
         id = serializers.IntegerField()
         restaurant = inline_serializer(fields={"name": serializers.CharField()})
@@ -250,6 +303,7 @@ class GetRestaurantMenuDetailsApi(APIView):
 
 class GetArchivedRestaurantMenusApi(APIView):
     permission_classes = [IsRestaurantAdmin]
+    restaurant_lookup = ("restaurant", "restaurant_id")
 
     class OutputSerializer(serializers.Serializer):
         id = serializers.IntegerField()
@@ -258,12 +312,13 @@ class GetArchivedRestaurantMenusApi(APIView):
 
     def get(self, request, restaurant_id):
         menus = get_archived_restaurant_menus(restaurant_id=restaurant_id)
-        data = self.OutputSerializer(menus, many=True)
-        return Response(status=status.HTTP_200_OK, data=data.data)
+        data = paginate_and_serialize(menus, request, self.OutputSerializer, ID_ORDERING)
+        return Response(status=status.HTTP_200_OK, data=data)
 
 
 class ArchiveRestaurantMenuApi(APIView):
     permission_classes = [IsRestaurantAdmin]
+    restaurant_lookup = ("menu", "menu_id")
 
     def put(self, request, menu_id):
         archive_menu(id=menu_id)
@@ -272,6 +327,7 @@ class ArchiveRestaurantMenuApi(APIView):
 
 class DeleteRestaurantMenuApi(APIView):
     permission_classes = [IsRestaurantAdmin]
+    restaurant_lookup = ("menu", "menu_id")
 
     def delete(self, request, menu_id):
         delete_menu(id=menu_id)
@@ -280,6 +336,7 @@ class DeleteRestaurantMenuApi(APIView):
 
 class EditRestaurantMenuApi(APIView):
     permission_classes = [IsRestaurantAdmin]
+    restaurant_lookup = ("menu", "menu_id")
 
     class InputSerializer(serializers.Serializer):
         name = serializers.CharField(required=False, max_length=200)
@@ -298,6 +355,7 @@ class EditRestaurantMenuApi(APIView):
 
 class CreateRestaurantMenuItemApi(APIView):
     permission_classes = [IsRestaurantAdmin]
+    restaurant_lookup = ("menu", "menu")
 
     class InputSerializer(serializers.Serializer):
         menu = serializers.PrimaryKeyRelatedField(queryset=Menu.objects.all())
@@ -315,6 +373,8 @@ class CreateRestaurantMenuItemApi(APIView):
 
 
 class GetAllRestaurantMenuItemsApi(APIView):
+    query_budget = 2
+
     class OutputSerializer(serializers.Serializer):
         id = serializers.IntegerField()
         image = serializers.ImageField()
@@ -323,13 +383,30 @@ class GetAllRestaurantMenuItemsApi(APIView):
         description = serializers.CharField()
         price = serializers.DecimalField(max_digits=10, decimal_places=2)
 
+        @depends_on("menu__name")
         def get_menu(self, obj):
             return obj.menu.name
 
     def get(self, request, restaurant_id):
         menu_items = get_all_restaurant_menu_items(restaurant_id=restaurant_id)
-        data = self.OutputSerializer(menu_items, many=True)
-        return Response(status=status.HTTP_200_OK, data=data.data)
+        if is_stream_requested(request):
+            return stream_and_serialize(menu_items, self.OutputSerializer, ID_ORDERING)
+        data = paginate_and_serialize(
+            menu_items, request, self.OutputSerializer, ID_ORDERING
+        )
+        return Response(status=status.HTTP_200_OK, data=data)
+
+
+class GetRestaurantMenuTreeApi(APIView):
+    query_budget = 2
+
+    def get(self, request, restaurant_id):
+        data = get_or_set_catalog_payload(
+            "menu-tree",
+            lambda: get_restaurant_menu_tree(restaurant_id=restaurant_id),
+            restaurant_id=restaurant_id,
+        )
+        return Response(status=status.HTTP_200_OK, data=data)
 
 
 # Not Used
@@ -356,6 +433,7 @@ class GetRestaurantMenuItemInfo(APIView):
         menu = serializers.SerializerMethodField()
         price = serializers.DecimalField(max_digits=10, decimal_places=2)
         
+        @depends_on("menu__name")
         def get_menu(self, obj):
             return obj.menu.name
 
@@ -367,6 +445,7 @@ class GetRestaurantMenuItemInfo(APIView):
 
 class EditRestaurantMenuItem(APIView):
     permission_classes = [IsRestaurantAdmin]
+    restaurant_lookup = ("menu_item", "menu_item_id")
 
     class InputSerializer(serializers.Serializer):
         image = serializers.ImageField(required=False)
@@ -386,6 +465,7 @@ class EditRestaurantMenuItem(APIView):
 
 class ArchiveRestaurantMenuItemApi(APIView):
     permission_classes = [IsRestaurantAdmin]
+    restaurant_lookup = ("menu_item", "menu_item_id")
 
     def put(self, request, menu_item_id):
         archive_menu_item(id=menu_item_id)
@@ -394,6 +474,7 @@ class ArchiveRestaurantMenuItemApi(APIView):
 
 class DeleteRestaurantMenuItemApi(APIView):
     permission_classes = [IsRestaurantAdmin]
+    restaurant_lookup = ("menu_item", "menu_item_id")
 
     def delete(self, request, menu_item_id):
         delete_menu_item(id=menu_item_id)
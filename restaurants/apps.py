@@ -1,6 +1,34 @@
 from django.apps import AppConfig
+from django.db.models.signals import m2m_changed, post_delete, post_save
 
 
 class RestaurantsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'restaurants'
+
+    def ready(self):
+        from restaurants.models import (
+            Cuisine,
+            Menu,
+            MenuItem,
+            Restaurant,
+            RestaurantStaff,
+        )
+        from restaurants import signals
+
+        post_save.connect(signals.invalidate_memberships, sender=RestaurantStaff)
+        post_delete.connect(signals.invalidate_memberships, sender=RestaurantStaff)
+
+        # the catalog cache, see utils.cache_utils
+        receivers = {
+            Restaurant: signals.invalidate_restaurant_catalog,
+            Cuisine: signals.invalidate_cuisine_catalog,
+            Menu: signals.invalidate_menu_catalog,
+            MenuItem: signals.invalidate_menu_item_catalog,
+        }
+        for model, receiver in receivers.items():
+            post_save.connect(receiver, sender=model)
+            post_delete.connect(receiver, sender=model)
+        m2m_changed.connect(
+            signals.invalidate_restaurant_cuisines, sender=Restaurant.cuisine.through
+        )
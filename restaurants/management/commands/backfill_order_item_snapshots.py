@@ -0,0 +1,76 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from restaurants.models import MenuItem, OrderItem
+
+
+def backfill_snapshots(chunk_size: int = 1000):
+    """This function copies the name and price a menu item had when its order was
+    placed into the order items created before the snapshot columns existed. The
+    values come from the menu item history as of the order's date_created, the
+    current values are used for menu items without history.
+
+    Args:
+        chunk_size (int, optional): Order items updated per query
+
+    Yields:
+        int: The number of order items updated so far, after every chunk
+    """
+    as_of = MenuItem.history.filter(
+        id=OuterRef("menu_item_id"),
+        history_date__lte=OuterRef("order__date_created"),
+    ).order_by("-history_date", "-history_id")
+    # order items created since the snapshot columns exist always have a name
+    missing = OrderItem.objects.filter(name="").annotate(
+        snapshot_name=Coalesce(
+            Subquery(as_of.values("name")[:1]), "menu_item__name"
+        ),
+        snapshot_price=Coalesce(
+            Subquery(as_of.values("price")[:1]), "menu_item__price"
+        ),
+    )
+
+    updated = 0
+    last_id = 0
+    while True:
+        chunk = list(
+            missing.filter(id__gt=last_id)
+            .order_by("id")
+            .values_list("id", "snapshot_name", "snapshot_price")[:chunk_size]
+        )
+        if not chunk:
+            return
+        last_id = chunk[-1][0]
+
+        with transaction.atomic():
+            OrderItem.objects.bulk_update(
+                [
+                    OrderItem(id=id, name=name, unit_price=price)
+                    for id, name, price in chunk
+                ],
+                ["name", "unit_price"],
+            )
+        updated += len(chunk)
+        yield updated
+
+
+class Command(BaseCommand):
+    help = (
+        "Copies the menu item name and price at the time of the order into order "
+        "items created before the snapshot columns existed, in chunks. The "
+        "0008_backfill_order_item_snapshots migration does it once on migrate."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        updated = 0
+        for updated in backfill_snapshots(options["chunk_size"]):
+            self.stdout.write(f"Backfilled {updated} order items")
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Done, backfilled {updated} order items.")
+        )
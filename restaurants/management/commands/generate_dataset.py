@@ -0,0 +1,340 @@
+import datetime
+import random
+import time
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from common.choices import ORDER_STATUS
+from restaurants.models import (
+    Cuisine,
+    Menu,
+    MenuItem,
+    Order,
+    OrderAddress,
+    OrderItem,
+    Restaurant,
+    RestaurantStaff,
+)
+from users.models import CustomUser
+
+CUISINES = [
+    "Local",
+    "Continental",
+    "Chinese",
+    "Indian",
+    "Italian",
+    "Lebanese",
+    "Grill",
+    "Seafood",
+    "Vegan",
+    "Pastries",
+]
+DISHES = [
+    "Jollof",
+    "Fried Rice",
+    "Suya",
+    "Shawarma",
+    "Egusi",
+    "Pizza",
+    "Noodles",
+    "Burger",
+]
+
+
+@contextmanager
+def disable_auto_now_add(model, field_name: str):
+    """Makes bulk_create keep the values set on the objects instead of now()."""
+    field = model._meta.get_field(field_name)
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates a synthetic dataset (users, restaurants with cuisines, menus, menu "
+        "items, saved addresses, orders and order items) with bulk_create in chunks. "
+        "The same --seed always generates the same data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--restaurants", type=int, default=100)
+        parser.add_argument("--menus-per-restaurant", type=int, default=3)
+        parser.add_argument("--items-per-menu", type=int, default=10)
+        parser.add_argument("--orders-per-user", type=int, default=10)
+        parser.add_argument("--items-per-order", type=int, default=3)
+        parser.add_argument(
+            "--days", type=int, default=365, help="Spread orders over the last N days"
+        )
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--chunk-size", type=int, default=5000)
+        parser.add_argument(
+            "--password", default="password", help="Password of every generated user"
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        self.chunk_size = options["chunk_size"]
+        # rows are namespaced by seed so datasets with different seeds can coexist
+        self.prefix = f"gen{options['seed']}"
+        if CustomUser.objects.filter(email__startswith=f"{self.prefix}-").exists():
+            raise CommandError(
+                f"A dataset with seed {options['seed']} already exists, "
+                "use another --seed"
+            )
+
+        start = time.monotonic()
+        cuisines = self.create_cuisines()
+        user_ids = self.create_users(options["users"], options["password"])
+        restaurants = self.create_restaurants(
+            options["restaurants"], user_ids, cuisines
+        )
+        menu_items = self.create_menus(
+            restaurants, options["menus_per_restaurant"], options["items_per_menu"]
+        )
+        self.create_addresses(user_ids)
+        self.create_orders(
+            user_ids,
+            menu_items,
+            options["orders_per_user"],
+            options["items_per_order"],
+            options["days"],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Done in {time.monotonic() - start:.1f}s.")
+        )
+
+    def bulk_create(self, model, objs: list) -> list:
+        return model.objects.bulk_create(objs, batch_size=self.chunk_size)
+
+    def chunks(self, count: int):
+        for offset in range(0, count, self.chunk_size):
+            yield range(offset, min(offset + self.chunk_size, count))
+
+    def log(self, model, count: int) -> None:
+        self.stdout.write(f"Created {count} {model._meta.verbose_name_plural}")
+
+    def create_cuisines(self) -> list:
+        existing = set(
+            Cuisine.objects.filter(name__in=CUISINES).values_list("name", flat=True)
+        )
+        self.bulk_create(
+            Cuisine, [Cuisine(name=name) for name in CUISINES if name not in existing]
+        )
+        return list(Cuisine.objects.filter(name__in=CUISINES).order_by("name"))
+
+    def create_users(self, count: int, password: str) -> list:
+        # hashing is slow on purpose, every user shares the same hash
+        password = make_password(password)
+        user_ids = []
+        for chunk in self.chunks(count):
+            users = self.bulk_create(
+                CustomUser,
+                [
+                    CustomUser(
+                        email=f"{self.prefix}-user{index}@example.com",
+                        username=f"{self.prefix}-user{index}",
+                        first_name=f"First{index}",
+                        last_name=f"Last{index}",
+                        phone_number=f"080{self.rng.randrange(10 ** 8):08d}",
+                        password=password,
+                    )
+                    for index in chunk
+                ],
+            )
+            user_ids += [user.id for user in users]
+        self.log(CustomUser, len(user_ids))
+        return user_ids
+
+    def create_restaurants(self, count: int, user_ids: list, cuisines: list) -> list:
+        # distinct creators while there are enough users, staff of several
+        # restaurants only when there are more restaurants than users
+        if count <= len(user_ids):
+            creators = self.rng.sample(user_ids, k=count)
+        else:
+            creators = [self.rng.choice(user_ids) for _ in range(count)]
+        restaurants = []
+        for chunk in self.chunks(count):
+            restaurants += self.bulk_create(
+                Restaurant,
+                [
+                    Restaurant(
+                        name=f"{self.prefix} Restaurant {index}",
+                        description=f"Restaurant {index} description",
+                        address=f"{index} Restaurant Street",
+                        phone_number=f"090{self.rng.randrange(10 ** 8):08d}",
+                        email=f"{self.prefix}-restaurant{index}@example.com",
+                        opening_time=datetime.time(self.rng.randrange(6, 11)),
+                        closing_time=datetime.time(self.rng.randrange(18, 24)),
+                        is_active=self.rng.random() < 0.95,
+                        rating=Decimal(self.rng.randrange(10, 50)) / 10,
+                        creator_id=creators[index],
+                    )
+                    for index in chunk
+                ],
+            )
+
+        # every restaurant's creator is its admin
+        self.bulk_create(
+            RestaurantStaff,
+            [
+                RestaurantStaff(
+                    user_id=restaurant.creator_id,
+                    restaurant=restaurant,
+                    is_restaurant_admin=True,
+                )
+                for restaurant in restaurants
+            ],
+        )
+
+        through = Restaurant.cuisine.through
+        self.restaurant_cuisines = {
+            restaurant.id: self.rng.sample(cuisines, k=self.rng.randint(1, 3))
+            for restaurant in restaurants
+        }
+        self.bulk_create(
+            through,
+            [
+                through(restaurant_id=restaurant_id, cuisine_id=cuisine.id)
+                for restaurant_id, cuisines in self.restaurant_cuisines.items()
+                for cuisine in cuisines
+            ],
+        )
+        self.log(Restaurant, len(restaurants))
+        return restaurants
+
+    def create_menus(
+        self, restaurants: list, menus_per_restaurant: int, items_per_menu: int
+    ) -> dict:
+        menus = self.bulk_create(
+            Menu,
+            [
+                Menu(
+                    restaurant=restaurant,
+                    name=f"Menu {index}",
+                    description=f"{restaurant.name} menu {index}",
+                    cuisine=self.rng.choice(self.restaurant_cuisines[restaurant.id]),
+                    is_active=index == 0 or self.rng.random() < 0.9,
+                    creator_id=restaurant.creator_id,
+                )
+                for restaurant in restaurants
+                for index in range(menus_per_restaurant)
+            ],
+        )
+        self.log(Menu, len(menus))
+
+        # restaurant id -> active menu items, the ones orders are made of
+        menu_items = {}
+        created = 0
+        menus_per_chunk = max(1, self.chunk_size // max(1, items_per_menu))
+        for offset in range(0, len(menus), menus_per_chunk):
+            items = self.bulk_create(
+                MenuItem,
+                [
+                    MenuItem(
+                        menu=menu,
+                        name=f"{self.rng.choice(DISHES)} {index}",
+                        description=f"{menu.name} item {index}",
+                        price=Decimal(self.rng.randrange(500, 10000, 50)),
+                        is_active=index == 0 or self.rng.random() < 0.9,
+                        rating=Decimal(self.rng.randrange(10, 50)) / 10,
+                        creator_id=menu.creator_id,
+                    )
+                    for menu in menus[offset : offset + menus_per_chunk]
+                    for index in range(items_per_menu)
+                ],
+            )
+            created += len(items)
+            for item in items:
+                if item.is_active and item.menu.is_active:
+                    menu_items.setdefault(item.menu.restaurant_id, []).append(item)
+        self.log(MenuItem, created)
+        return menu_items
+
+    def create_addresses(self, user_ids: list) -> None:
+        created = 0
+        for chunk in self.chunks(len(user_ids)):
+            addresses = self.bulk_create(
+                OrderAddress,
+                [
+                    OrderAddress(
+                        user_id=user_ids[index],
+                        address_1=f"{self.rng.randrange(1, 200)} Address Street",
+                        phone_number=f"080{self.rng.randrange(10 ** 8):08d}",
+                        email=f"{self.prefix}-user{index}@example.com",
+                        saved=True,
+                    )
+                    # users can have at most 2 saved addresses
+                    for index in chunk
+                    for _ in range(self.rng.randint(0, 2))
+                ],
+            )
+            created += len(addresses)
+        self.log(OrderAddress, created)
+
+    def create_orders(
+        self,
+        user_ids: list,
+        menu_items: dict,
+        orders_per_user: int,
+        items_per_order: int,
+        days: int,
+    ) -> None:
+        restaurant_ids = sorted(menu_items)
+        if not restaurant_ids:
+            return
+        statuses = [status for status, _ in ORDER_STATUS]
+        now = timezone.now()
+        seconds = max(1, days * 24 * 60 * 60)
+        users_per_chunk = max(1, self.chunk_size // max(1, orders_per_user))
+        order_count = item_count = 0
+
+        with disable_auto_now_add(Order, "date_created"):
+            for offset in range(0, len(user_ids), users_per_chunk):
+                orders, order_items = [], []
+                for user_id in user_ids[offset : offset + users_per_chunk]:
+                    for index in range(orders_per_user):
+                        restaurant_id = self.rng.choice(restaurant_ids)
+                        # the newest order of some users is still an open cart, a
+                        # user never has two open carts for the same restaurant
+                        paid = index < orders_per_user - 1 or self.rng.random() < 0.8
+                        order = Order(
+                            user_id=user_id,
+                            restaurant_id=restaurant_id,
+                            paid=paid,
+                            status=self.rng.choice(statuses) if paid else "pending",
+                            date_created=now
+                            - datetime.timedelta(seconds=self.rng.randrange(seconds)),
+                        )
+                        total = Decimal("0")
+                        choices = menu_items[restaurant_id]
+                        size = min(len(choices), self.rng.randint(1, items_per_order))
+                        for menu_item in self.rng.sample(choices, k=size):
+                            quantity = self.rng.randint(1, 4)
+                            total += menu_item.price * quantity
+                            order_items.append(
+                                OrderItem(
+                                    order=order,
+                                    menu_item_id=menu_item.id,
+                                    quantity=quantity,
+                                    name=menu_item.name,
+                                    unit_price=menu_item.price,
+                                )
+                            )
+                        order.total_price = total
+                        orders.append(order)
+
+                self.bulk_create(Order, orders)
+                self.bulk_create(OrderItem, order_items)
+                order_count += len(orders)
+                item_count += len(order_items)
+                self.stdout.write(
+                    f"Created {order_count} orders, {item_count} order items"
+                )
@@ -0,0 +1,81 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import DecimalField, F, Sum
+
+from restaurants.models import Order, OrderItem
+
+CENTS = Decimal("0.01")
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes Order.total_price from the order items in chunks and reports "
+        "the orders whose stored total drifted. Pass --fix to write the totals back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument(
+            "--fix", action="store_true", help="Update the drifted totals"
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        checked = drifted = fixed = 0
+        total_drift = Decimal("0.00")
+        last_order_id = None
+
+        while True:
+            orders = Order.objects.order_by("order_id")
+            if last_order_id is not None:
+                orders = orders.filter(order_id__gt=last_order_id)
+            chunk = dict(orders.values_list("order_id", "total_price")[:chunk_size])
+            if not chunk:
+                break
+            last_order_id = max(chunk)
+
+            computed = dict(
+                OrderItem.objects.filter(order_id__in=list(chunk))
+                .values("order_id")
+                .annotate(
+                    total=Sum(
+                        F("quantity") * F("unit_price"),
+                        output_field=DecimalField(max_digits=10, decimal_places=2),
+                    )
+                )
+                .values_list("order_id", "total")
+            )
+
+            to_fix = []
+            for order_id, stored in chunk.items():
+                expected = (computed.get(order_id) or Decimal("0")).quantize(CENTS)
+                if stored.quantize(CENTS) != expected:
+                    drifted += 1
+                    total_drift += abs(stored - expected)
+                    self.stdout.write(
+                        f"{order_id}: stored={stored} computed={expected}"
+                    )
+                    to_fix.append((order_id, stored, expected))
+            checked += len(chunk)
+
+            if options["fix"] and to_fix:
+                # only overwrite totals that were not changed by a cart edit
+                # since they were read
+                with transaction.atomic():
+                    for order_id, stored, expected in to_fix:
+                        fixed += Order.objects.filter(
+                            order_id=order_id, total_price=stored
+                        ).update(total_price=expected)
+
+        summary = (
+            f"Checked {checked} orders. Found {drifted} drifted totals "
+            f"(absolute drift {total_drift.quantize(CENTS)})."
+        )
+        if options["fix"]:
+            summary += (
+                f" Fixed {fixed}, {drifted - fixed} changed since they were read "
+                "and were left for the next run."
+            )
+        self.stdout.write(self.style.SUCCESS(summary))
@@ -0,0 +1,60 @@
+# Generated by Django 4.0.4 on 2026-10-18 12:31
+
+from django.db import migrations, models
+
+
+def merge_duplicate_unpaid_orders(apps, schema_editor):
+    """Merges the unpaid orders a user has at the same restaurant into the oldest
+    one, so the constraint below can be added. The items are moved over, items of
+    the same menu item become one line, and the totals are added up."""
+    Order = apps.get_model("restaurants", "Order")
+    OrderItem = apps.get_model("restaurants", "OrderItem")
+
+    duplicates = (
+        Order.objects.filter(paid=False)
+        .values("user_id", "restaurant_id")
+        .annotate(count=models.Count("order_id"))
+        .filter(count__gt=1)
+    )
+    for duplicate in duplicates:
+        kept, *merged = Order.objects.filter(
+            paid=False,
+            user_id=duplicate["user_id"],
+            restaurant_id=duplicate["restaurant_id"],
+        ).order_by("date_created", "order_id")
+
+        lines = {item.menu_item_id: item for item in kept.orderitem_set.all()}
+        for item in OrderItem.objects.filter(order__in=merged).order_by("id"):
+            line = lines.get(item.menu_item_id)
+            if line is None:
+                item.order = kept
+                item.save(update_fields=["order"])
+                lines[item.menu_item_id] = item
+            else:
+                line.quantity += item.quantity
+                line.save(update_fields=["quantity"])
+                item.delete()
+
+        for order in merged:
+            kept.total_price += order.total_price
+            if kept.order_address_id is None:
+                kept.order_address_id = order.order_address_id
+        kept.save(update_fields=["total_price", "order_address"])
+        Order.objects.filter(order_id__in=[order.order_id for order in merged]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurants', '0004_orderitem_name_orderitem_unit_price'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_unpaid_orders, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name='order',
+            constraint=models.UniqueConstraint(condition=models.Q(('paid', False)), fields=('user', 'restaurant'), name='unique_unpaid_order_per_restaurant'),
+        ),
+    ]
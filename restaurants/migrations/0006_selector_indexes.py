@@ -0,0 +1,37 @@
+# Generated by Django 4.0.4 on 2026-10-18 12:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurants', '0005_order_unique_unpaid_order_per_restaurant'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='menu',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['restaurant'], name='menu_restaurant_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='menuitem',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['menu'], name='menuitem_menu_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['user', 'status', '-date_created', '-order_id'], name='order_user_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('paid', True)), fields=['user', '-date_created', '-order_id'], name='order_user_paid_history_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orderaddress',
+            index=models.Index(condition=models.Q(('saved', True)), fields=['user'], name='orderaddress_user_saved_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='restaurant',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-rating', 'id'], name='restaurant_active_rating_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.0.4 on 2026-10-18 13:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurants', '0006_selector_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='historicalcuisine',
+            index=models.Index(fields=['id', 'history_date'], name='cuisine_hist_as_of_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historicalmenu',
+            index=models.Index(fields=['id', 'history_date'], name='menu_hist_as_of_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historicalmenuitem',
+            index=models.Index(fields=['id', 'history_date'], name='menuitem_hist_as_of_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historicalrestaurant',
+            index=models.Index(fields=['id', 'history_date'], name='restaurant_hist_as_of_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historicalrestaurantstaff',
+            index=models.Index(fields=['id', 'history_date'], name='restaurantstaff_hist_as_of_idx'),
+        ),
+    ]
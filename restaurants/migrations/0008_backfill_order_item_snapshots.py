@@ -0,0 +1,58 @@
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_order_item_snapshots(apps, schema_editor):
+    """Copies the name and price a menu item had when its order was placed into the
+    order items added by 0004, which render an empty name and a 0.00 price, and
+    would subtract 0.00 from the order total when reduced or deleted. The values
+    come from the menu item history as of the order's date_created, the current
+    values are used for menu items without history. The order items are updated in
+    chunks of 1000."""
+    OrderItem = apps.get_model("restaurants", "OrderItem")
+    HistoricalMenuItem = apps.get_model("restaurants", "HistoricalMenuItem")
+
+    as_of = HistoricalMenuItem.objects.filter(
+        id=OuterRef("menu_item_id"),
+        history_date__lte=OuterRef("order__date_created"),
+    ).order_by("-history_date", "-history_id")
+    missing = OrderItem.objects.filter(name="").annotate(
+        snapshot_name=Coalesce(
+            Subquery(as_of.values("name")[:1]), "menu_item__name"
+        ),
+        snapshot_price=Coalesce(
+            Subquery(as_of.values("price")[:1]), "menu_item__price"
+        ),
+    )
+
+    last_id = 0
+    while True:
+        chunk = list(
+            missing.filter(id__gt=last_id)
+            .order_by("id")
+            .values_list("id", "snapshot_name", "snapshot_price")[:1000]
+        )
+        if not chunk:
+            return
+        last_id = chunk[-1][0]
+        OrderItem.objects.bulk_update(
+            [
+                OrderItem(id=id, name=name, unit_price=price)
+                for id, name, price in chunk
+            ],
+            ["name", "unit_price"],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurants', '0007_history_as_of_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            backfill_order_item_snapshots, migrations.RunPython.noop
+        ),
+    ]
@@ -4,7 +4,7 @@ from django.db import models
 
 from rest_framework import exceptions as rest_exceptions
 
-from simple_history.models import HistoricalRecords
+from utils.history_utils import DeferredHistoricalRecords
 
 from users.models import CustomUser
 
@@ -27,11 +27,21 @@ class Restaurant(models.Model):
     rating = models.DecimalField(max_digits=2, decimal_places=1, default=0.0)
     creator = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
-    history = HistoricalRecords()
+    history = DeferredHistoricalRecords()
 
     def __str__(self) -> str:
         return self.name
 
+    class Meta:
+        indexes = [
+            # the active restaurant listing, in the keyset pagination order
+            models.Index(
+                fields=["-rating", "id"],
+                condition=models.Q(is_active=True),
+                name="restaurant_active_rating_idx",
+            )
+        ]
+
 
 class RestaurantStaff(models.Model):
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
@@ -39,7 +49,7 @@ class RestaurantStaff(models.Model):
     is_restaurant_staff = models.BooleanField(default=True)
     is_restaurant_admin = models.BooleanField(default=False)
     last_login = models.DateTimeField(auto_now=True)
-    history = HistoricalRecords()
+    history = DeferredHistoricalRecords()
 
     def __str__(self) -> str:
         return self.restaurant.name
@@ -50,7 +60,7 @@ class RestaurantStaff(models.Model):
 
 class Cuisine(models.Model):
     name = models.CharField(max_length=200, unique=True)
-    history = HistoricalRecords()
+    history = DeferredHistoricalRecords()
 
     def __str__(self) -> str:
         return self.name
@@ -63,11 +73,20 @@ class Menu(models.Model):
     cuisine = models.ForeignKey(Cuisine, on_delete=models.CASCADE, default=1)
     is_active = models.BooleanField(default=True)
     creator = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
-    history = HistoricalRecords()
+    history = DeferredHistoricalRecords()
 
     def __str__(self) -> str:
         return f"{self.name} | {self.restaurant.name}"
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["restaurant"],
+                condition=models.Q(is_active=True),
+                name="menu_restaurant_active_idx",
+            )
+        ]
+
 
 class MenuItem(models.Model):
     menu = models.ForeignKey(Menu, on_delete=models.CASCADE, related_name="menu_items")
@@ -80,11 +99,20 @@ class MenuItem(models.Model):
     is_active = models.BooleanField(default=True)
     rating = models.DecimalField(max_digits=2, decimal_places=1, default=0.0)
     creator = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
-    history = HistoricalRecords()
+    history = DeferredHistoricalRecords()
 
     def __str__(self) -> str:
         return f"{self.name} | {str(self.price)} | {self.menu.name} | {self.menu.restaurant.name}"
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["menu"],
+                condition=models.Q(is_active=True),
+                name="menuitem_menu_active_idx",
+            )
+        ]
+
 
 class Order(models.Model):
     order_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -101,11 +129,36 @@ class Order(models.Model):
     def __str__(self):
         return f"OrderID: {self.order_id} | {self.user.email} | {self.restaurant.name} | Paid: {self.paid}" 
 
+    class Meta:
+        constraints = [
+            # a user has at most one open (unpaid) order per restaurant
+            models.UniqueConstraint(
+                fields=["user", "restaurant"],
+                condition=models.Q(paid=False),
+                name="unique_unpaid_order_per_restaurant",
+            )
+        ]
+        indexes = [
+            # orders by status and the order history, both newest first
+            models.Index(
+                fields=["user", "status", "-date_created", "-order_id"],
+                name="order_user_status_idx",
+            ),
+            models.Index(
+                fields=["user", "-date_created", "-order_id"],
+                condition=models.Q(paid=True),
+                name="order_user_paid_history_idx",
+            ),
+        ]
+
 
 class OrderItem(models.Model):
     order = models.ForeignKey(Order, on_delete=models.CASCADE)
     menu_item = models.ForeignKey(MenuItem, on_delete=models.CASCADE)
     quantity = models.IntegerField(default=1)
+    # snapshot of the menu item when it was ordered, later menu edits don't change it
+    name = models.CharField(max_length=200, blank=True)
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2, default=0.0)
 
     def __str__(self):
         return f"{self.order.order_id} | {self.menu_item.name} | {self.quantity}"
@@ -122,6 +175,15 @@ class OrderAddress(models.Model):
     def __str__(self):
         return f"{self.user.email} | {self.saved}"
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["user"],
+                condition=models.Q(saved=True),
+                name="orderaddress_user_saved_idx",
+            )
+        ]
+
     def clean(self) -> None:
         obj = OrderAddress.objects.filter(user=self.user, saved=True)
         if len(obj) >= 2:
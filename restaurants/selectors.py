@@ -1,5 +1,8 @@
+import datetime
+
+from django.db.models import Prefetch, QuerySet
+
 from rest_framework import exceptions as rest_exceptions
-from rest_framework.serializers import Serializer
 
 from common.choices import ORDER_STATUS
 
@@ -13,6 +16,7 @@ from restaurants.models import (
     Restaurant,
 )
 from users.models import CustomUser
+from utils.history_utils import get_history_as_of
 
 
 def get_restaurant_info(id: int) -> Restaurant:
@@ -42,7 +46,7 @@ def get_all_restaurants() -> Restaurant:
     Returns:
         Restaurant: The restaurant objects
     """
-    objs = Restaurant.objects.filter(is_active=True)
+    objs = Restaurant.objects.filter(is_active=True).prefetch_related("cuisine")
     return objs
 
 
@@ -71,7 +75,9 @@ def get_all_restaurants_with_cuisine(cuisine: str) -> Restaurant:
         raise rest_exceptions.NotFound("Cuisine does not exist")
 
     else:
-        objs = Restaurant.objects.filter(cuisine__in=[cuisine], is_active=True)
+        objs = Restaurant.objects.filter(
+            cuisine__in=[cuisine], is_active=True
+        ).prefetch_related("cuisine")
         return objs
 
 
@@ -88,7 +94,7 @@ def get_restaurant_menu(id: int) -> Menu:
         Menu: The menu object
     """
     try:
-        obj = Menu.objects.get(id=id)
+        obj = Menu.objects.select_related("restaurant", "cuisine").get(id=id)
     except Menu.DoesNotExist:
         raise rest_exceptions.NotFound("Menu does not exist")
 
@@ -114,7 +120,9 @@ def get_all_restaurant_menus(restaurant_id: int) -> Menu:
         raise rest_exceptions.NotFound("Restaurant does not exist")
 
     else:
-        objs = Menu.objects.filter(restaurant=restaurant, is_active=True)
+        objs = Menu.objects.filter(restaurant=restaurant, is_active=True).select_related(
+            "cuisine"
+        )
     return objs
 
 
@@ -132,7 +140,9 @@ def get_archived_restaurant_menus(restaurant_id: int) -> Menu:
     """
     try:
         restaurant = Restaurant.objects.get(id=restaurant_id)
-        objs = Menu.objects.filter(restaurant=restaurant, is_active=False)
+        objs = Menu.objects.filter(
+            restaurant=restaurant, is_active=False
+        ).select_related("cuisine")
     except (Restaurant.DoesNotExist, Menu.DoesNotExist) as e:
         raise rest_exceptions.NotFound(e)
 
@@ -161,6 +171,27 @@ def get_restaurant_menu_item(id: int) -> MenuItem:
         return obj
 
 
+def get_restaurant_menu_item_as_of(id: int, as_of: datetime.datetime) -> MenuItem:
+    """This function gets a menu item as it was at a point in time (e.g. its price
+    when an order was placed), from its history
+
+    Args:
+        id (int): The id of the menu item
+        as_of (datetime.datetime): The point in time
+
+    Raises:
+        rest_exceptions.NotFound: If the menu item did not exist at that time
+
+    Returns:
+        MenuItem: The menu item obj, as it was at that time (not saved)
+    """
+    record = get_history_as_of(MenuItem, id, as_of)
+    if record is None:
+        raise rest_exceptions.NotFound("Menu Item did not exist at that time")
+
+    return record.instance
+
+
 def get_all_restaurant_menu_items(restaurant_id: int) -> MenuItem:
     """This function gets all active menu items of a restaurant
 
@@ -207,26 +238,51 @@ def get_all_restaurant_menu_items_under_menu(id: int) -> MenuItem:
     return objs
 
 
-def get_menu_items_with_menu(menu_items: MenuItem, serializer: Serializer) -> MenuItem:
-    """This function gets all menu items with the menu object
+def get_restaurant_menu_tree(restaurant_id: int) -> list:
+    """This function gets the active menus of a restaurant with their active menu items,
+    grouped under each menu. Only two queries are made regardless of how many menus
+    exist on the platform.
 
     Args:
-        menu_items (MenuItem): The menu items object
+        restaurant_id (int): The id of the restaurant
+
+    Raises:
+        rest_exceptions.NotFound: If restaurant does not exist
 
     Returns:
-        MenuItem: The Menu Item Objects
+        list: The menus as plain dicts, each with a "menu_items" list
     """
-    # Not sure which excepion might occure but just as a precaution we will catch all
-    try:
-        menus = {}
-        for name, id in Menu.objects.values_list("name", "id"):
-            menus[name] = []
-        for menu_item in menu_items:
-            menu_name = menu_item.menu.name
-            menus[menu_name].append(serializer(menu_item).data)
-    except Exception as e:
-        raise rest_exceptions.APIException(e)
-    return menus
+    menus = {}
+    for menu in Menu.objects.filter(
+        restaurant_id=restaurant_id, restaurant__is_active=True, is_active=True
+    ).values("id", "name", "description", "cuisine__name").order_by("id"):
+        menus[menu["id"]] = {
+            "id": menu["id"],
+            "name": menu["name"],
+            "description": menu["description"],
+            "cuisine": {"name": menu["cuisine__name"]},
+            "menu_items": [],
+        }
+
+    if not menus:
+        if not Restaurant.objects.filter(id=restaurant_id, is_active=True).exists():
+            raise rest_exceptions.NotFound("Restaurant does not exist")
+        return []
+
+    storage = MenuItem._meta.get_field("image").storage
+    for item in MenuItem.objects.filter(
+        menu_id__in=list(menus), is_active=True
+    ).values("id", "menu_id", "image", "name", "description", "price").order_by("id"):
+        menus[item["menu_id"]]["menu_items"].append(
+            {
+                "id": item["id"],
+                "image": storage.url(item["image"]) if item["image"] else None,
+                "name": item["name"],
+                "description": item["description"],
+                "price": str(item["price"]),
+            }
+        )
+    return list(menus.values())
 
 
 def get_all_orders_based_on_status(user: CustomUser, status: str) -> Order:
@@ -240,12 +296,35 @@ def get_all_orders_based_on_status(user: CustomUser, status: str) -> Order:
     """
     valid_status = [s[0] for s in ORDER_STATUS]
     if status in valid_status:
-        objs = Order.objects.filter(user=user, status=status)
+        objs = Order.objects.filter(user=user, status=status).select_related(
+            "restaurant"
+        )
     else:
         raise rest_exceptions.ValidationError("Invalid status")
     return objs
 
 
+def get_orders_with_items(orders: QuerySet, with_menu_items: bool = True) -> Order:
+    """This function batches the reads needed to render orders with their items.
+    The restaurant is joined in and all order items are loaded in one extra query,
+    no matter how many orders there are.
+
+    Args:
+        orders (QuerySet): The orders to load
+        with_menu_items (bool): Join the live menu item of each order item.
+            Not needed when only the name/unit_price snapshots are rendered.
+
+    Returns:
+        Order: The Order Objects with `orderitem_set` prefetched
+    """
+    order_items = OrderItem.objects.order_by("id")
+    if with_menu_items:
+        order_items = order_items.select_related("menu_item")
+    return orders.select_related("restaurant").prefetch_related(
+        Prefetch("orderitem_set", queryset=order_items)
+    )
+
+
 def get_user_order_history(user: CustomUser) -> Order:
     """This functiom gets the order history of a user
 
@@ -258,7 +337,7 @@ def get_user_order_history(user: CustomUser) -> Order:
     orders = Order.objects.filter(user=user, paid=True).order_by(
         "-date_created"
     )
-    return orders
+    return get_orders_with_items(orders, with_menu_items=False)
 
 
 def get_all_order_items(order_id: int) -> OrderItem:
@@ -279,7 +358,7 @@ def get_all_order_items(order_id: int) -> OrderItem:
         raise rest_exceptions.NotFound("Order does not exist")
 
     else:
-        objs = OrderItem.objects.filter(order=order)
+        objs = OrderItem.objects.filter(order=order).select_related("menu_item")
         return objs
 
 
@@ -1,4 +1,3 @@
-from django.db import transaction
 from django.utils import timezone
 from django.core import exceptions as django_exceptions
 
@@ -7,9 +6,11 @@ from rest_framework import exceptions as rest_exceptions
 from restaurants.models import Cuisine, Menu, MenuItem, Restaurant, RestaurantStaff
 from restaurants.selectors import get_restaurant_menu
 from users.models import CustomUser
+from utils.history_utils import batched_history
+from utils.login_utils import record_last_login
 
 
-@transaction.atomic
+@batched_history()
 def register_restaurant(data: dict, creator: CustomUser) -> Restaurant:
     """This function registers a restaurant
 
@@ -28,7 +29,7 @@ def register_restaurant(data: dict, creator: CustomUser) -> Restaurant:
         raise rest_exceptions.ValidationError(e)
 
 
-@transaction.atomic
+@batched_history()
 def update_restaurant_info(id: int, data: dict):
     """This function updates the restaurant info
 
@@ -52,7 +53,7 @@ def update_restaurant_info(id: int, data: dict):
     return restaurant
 
 
-@transaction.atomic
+@batched_history()
 def disable_restaurant(id: int) -> Restaurant:
     """This function disables a restaurant
 
@@ -73,30 +74,30 @@ def disable_restaurant(id: int) -> Restaurant:
     return restaurant
 
 
-@transaction.atomic
-def login_restaurant_staff(user: CustomUser) -> CustomUser:
-    """This function logs in a restaurant staff
+def login_restaurant_staff(user: CustomUser) -> None:
+    """This function logs in a restaurant staff. The last_login of their staff
+    memberships is written to the database later by the last login buffer,
+    without a full save.
 
     Args:
         user (CustomUser): The restaurant staff
 
-    Returns:
-        CustomUser: The restaurant staff with the last_login updated
+    Raises:
+        rest_exceptions.PermissionDenied: If the user is not a restaurant staff
     """
-    try:
-        obj = RestaurantStaff.objects.get(user=user)
-    except RestaurantStaff.DoesNotExist:
+    # a user can be staff of several restaurants
+    memberships = list(
+        RestaurantStaff.objects.filter(user=user).values_list("id", flat=True)
+    )
+    if not memberships:
         raise rest_exceptions.PermissionDenied()
 
-    try:
-        obj.last_login = timezone.now()
-        obj.full_clean()
-        obj.save()
-    except django_exceptions.ValidationError as e:
-        raise rest_exceptions.ValidationError(e)
+    now = timezone.now()
+    for staff_id in memberships:
+        record_last_login(RestaurantStaff, staff_id, now)
 
 
-@transaction.atomic
+@batched_history()
 def create_menu(data: dict, creator: CustomUser) -> Menu:
     """This function creates a menu
 
@@ -121,7 +122,7 @@ def create_menu(data: dict, creator: CustomUser) -> Menu:
         return obj
 
 
-@transaction.atomic
+@batched_history()
 def update_restaurant_menu(id: int, data: dict) -> Menu:
     """This function updates the restaurant menu
 
@@ -144,7 +145,7 @@ def update_restaurant_menu(id: int, data: dict) -> Menu:
         raise rest_exceptions.ValidationError(e)
 
 
-@transaction.atomic
+@batched_history()
 def archive_menu(id: int) -> Menu:
     """This function archives a menu
 
@@ -169,7 +170,7 @@ def archive_menu(id: int) -> Menu:
     return obj
 
 
-@transaction.atomic
+@batched_history()
 def delete_menu(id: int) -> None:
     """This function deletes a menu
 
@@ -190,7 +191,7 @@ def delete_menu(id: int) -> None:
     return None
 
 
-@transaction.atomic
+@batched_history()
 def create_menu_item(data: dict, creator: CustomUser) -> MenuItem:
     """This function creates a menu item
 
@@ -214,7 +215,7 @@ def create_menu_item(data: dict, creator: CustomUser) -> MenuItem:
         return obj
 
 
-@transaction.atomic
+@batched_history()
 def update_restaurant_menu_item(id: int, data: dict) -> MenuItem:
     """This function updates a menu item
 
@@ -241,7 +242,7 @@ def update_restaurant_menu_item(id: int, data: dict) -> MenuItem:
     return obj
 
 
-@transaction.atomic
+@batched_history()
 def archive_menu_item(id: int) -> MenuItem:
     """This function archives a menu item
 
@@ -266,7 +267,7 @@ def archive_menu_item(id: int) -> MenuItem:
     return obj
 
 
-@transaction.atomic
+@batched_history()
 def delete_menu_item(id: int) -> None:
     """This function deletes a menu item
 
@@ -0,0 +1,61 @@
+from restaurants.models import Cuisine, Menu, MenuItem, Restaurant, RestaurantStaff
+from utils.cache_utils import bump_catalog_version
+from utils.permission_utils import get_restaurant_id, invalidate_staff_memberships
+
+
+def invalidate_memberships(sender, instance: RestaurantStaff, **kwargs) -> None:
+    """Drops the cached staff memberships of the user of a saved or deleted
+    RestaurantStaff."""
+    invalidate_staff_memberships(instance.user_id)
+
+
+def invalidate_restaurant_catalog(sender, instance: Restaurant, **kwargs) -> None:
+    """Invalidates the listings and the payloads of a saved or deleted
+    restaurant."""
+    bump_catalog_version()
+    bump_catalog_version(restaurant_id=instance.id)
+
+
+def invalidate_restaurant_cuisines(
+    sender, instance, action: str, reverse: bool, pk_set, **kwargs
+) -> None:
+    """Invalidates the listings and the restaurants whose cuisines changed."""
+    if not action.startswith("post_"):
+        return
+    bump_catalog_version()
+    if not reverse:
+        bump_catalog_version(restaurant_id=instance.id)
+        return
+    restaurant_ids = pk_set
+    if restaurant_ids is None:
+        # cleared from the cuisine side, the restaurants are not known anymore
+        restaurant_ids = Restaurant.objects.values_list("id", flat=True)
+    for restaurant_id in restaurant_ids:
+        bump_catalog_version(restaurant_id=restaurant_id)
+
+
+def invalidate_cuisine_catalog(sender, instance: Cuisine, **kwargs) -> None:
+    """Invalidates the listings and the menus of the restaurants serving a saved
+    or deleted cuisine."""
+    bump_catalog_version()
+    restaurant_ids = (
+        Menu.objects.filter(cuisine_id=instance.id)
+        .values_list("restaurant_id", flat=True)
+        .distinct()
+    )
+    for restaurant_id in restaurant_ids:
+        bump_catalog_version(restaurant_id=restaurant_id)
+
+
+def invalidate_menu_catalog(sender, instance: Menu, **kwargs) -> None:
+    """Invalidates the payloads of the restaurant of a saved or deleted menu."""
+    bump_catalog_version(restaurant_id=instance.restaurant_id)
+
+
+def invalidate_menu_item_catalog(sender, instance: MenuItem, **kwargs) -> None:
+    """Invalidates the payloads of the restaurant of a saved or deleted menu
+    item."""
+    # cached, so it is still known when the menu was deleted with its items
+    restaurant_id = get_restaurant_id("menu", instance.menu_id)
+    if restaurant_id is not None:
+        bump_catalog_version(restaurant_id=restaurant_id)
@@ -21,11 +21,13 @@ from restaurants.apis import (
     GetRestaurantInfoApi,
     GetRestaurantMenuDetailsApi,
     GetRestaurantMenuItemInfo,
+    GetRestaurantMenuTreeApi,
     GetRestaurantWithCuisineApi,
     RegisterRestaurantApi,
     RestaurantStaffLoginApi,
     RestaurantStaffLogoutApi,
 )
+from utils.async_utils import async_api_view
 
 urlpatterns = [
     path("register/", RegisterRestaurantApi.as_view(), name="register-restaurant"),
@@ -119,6 +121,11 @@ urlpatterns = [
         GetAllRestaurantMenuItemsApi.as_view(),
         name="get-all-restaurant-menu-items",
     ),
+    path(
+        "menu/tree/<int:restaurant_id>/",
+        GetRestaurantMenuTreeApi.as_view(),
+        name="get-restaurant-menu-tree",
+    ),
     path(
         "menu/item/get/<int:menu_item_id>/",
         GetRestaurantMenuItemInfo.as_view(),
@@ -144,4 +151,36 @@ urlpatterns = [
         DeleteRestaurantMenuItemApi.as_view(),
         name="delete-restaurant-menu-item",
     ),
+    # ####
+    # #### served without blocking the event loop under ASGI
+    path(
+        "async/get/<int:id>/",
+        async_api_view(GetRestaurantInfoApi),
+        name="async-get-restaurant-info",
+    ),
+    path(
+        "async/get/all/",
+        async_api_view(GetAllRestaurantsApi),
+        name="async-get-all-restaurants",
+    ),
+    path(
+        "async/menu/get/<int:menu_id>/",
+        async_api_view(GetRestaurantMenuDetailsApi),
+        name="async-get-restaurant-menu-details",
+    ),
+    path(
+        "async/menu/get/all/<int:restaurant_id>/",
+        async_api_view(GetAllRestaurantMenusApi),
+        name="async-get-all-restaurant-menus",
+    ),
+    path(
+        "async/menu/item/get/all/<int:restaurant_id>/",
+        async_api_view(GetAllRestaurantMenuItemsApi),
+        name="async-get-all-restaurant-menu-items",
+    ),
+    path(
+        "async/menu/item/get/<int:menu_item_id>/",
+        async_api_view(GetRestaurantMenuItemInfo),
+        name="async-get-restaurant-menu-item-info",
+    ),
 ]
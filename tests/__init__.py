@@ -0,0 +1,5 @@
+import logging
+
+# silences the query stats of the requests made by the tests, the query stats
+# tests capture them with assertLogs()
+logging.getLogger("core.queries").setLevel(logging.CRITICAL)
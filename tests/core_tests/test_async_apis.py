@@ -0,0 +1,90 @@
+import json
+
+from django.core.cache import cache
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+
+from asgiref.sync import sync_to_async
+from knox.models import AuthToken
+
+from tests.fixtures import (
+    create_test_menu,
+    create_test_menu_item,
+    create_test_order,
+    create_test_restaurant,
+    create_test_user,
+)
+from tests.query_budget import create_token_client
+
+
+# the async views query the database from worker threads, which don't see the
+# transaction of a TestCase
+class AsyncApisTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = create_test_user()
+        self.restaurant = create_test_restaurant(creator=self.user)
+        self.menu = create_test_menu(self.restaurant)
+        self.item = create_test_menu_item(self.menu)
+        self.order = create_test_order(self.user, self.restaurant, [self.item])
+        _, token = AuthToken.objects.create(self.user)
+        # extra arguments of AsyncClient requests are headers
+        self.headers = {"authorization": f"Token {token}"}
+        self.sync_client = create_token_client(self.user)
+
+    async def assertSameAsSync(self, url_name, *args):
+        response = await self.async_client.get(
+            reverse(f"async-{url_name}", args=args), **self.headers
+        )
+        expected = await sync_to_async(self.sync_client.get)(
+            reverse(url_name, args=args)
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content), expected.json())
+        return response
+
+    async def test_async_views_render_like_the_sync_views(self):
+        await self.assertSameAsSync("get-restaurant-info", self.restaurant.id)
+        await self.assertSameAsSync("get-all-restaurants")
+        await self.assertSameAsSync("get-restaurant-menu-details", self.menu.id)
+        await self.assertSameAsSync("get-all-restaurant-menus", self.restaurant.id)
+        await self.assertSameAsSync(
+            "get-all-restaurant-menu-items", self.restaurant.id
+        )
+        await self.assertSameAsSync("get-restaurant-menu-item-info", self.item.id)
+        await self.assertSameAsSync("get-order-details", self.order.order_id)
+
+    async def test_errors_are_the_api_errors(self):
+        url = reverse("async-get-order-details", args=[self.order.order_id])
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response["WWW-Authenticate"], "Token")
+
+        response = await self.async_client.get(
+            reverse("async-get-restaurant-info", args=[self.restaurant.id + 1])
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertIn("detail", json.loads(response.content))
+
+        response = await self.async_client.post(reverse("async-get-all-restaurants"))
+        self.assertEqual(response.status_code, 405)
+
+    @override_settings(DEBUG=True)
+    async def test_queries_of_the_worker_threads_are_counted(self):
+        response = await self.async_client.get(
+            reverse("async-get-all-restaurant-menu-items", args=[self.restaurant.id]),
+            **self.headers,
+        )
+        self.assertGreater(int(response["X-Query-Count"]), 0)
+        self.assertEqual(response["X-Query-Budget"], "2")
+
+    async def test_streamed_lists_are_streamed(self):
+        url = reverse("get-all-restaurants")
+        response = await self.async_client.get(
+            reverse("async-get-all-restaurants"), {"stream": "true"}, **self.headers
+        )
+        expected = await sync_to_async(self.sync_client.get)(url)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "application/json")
+        content = b"".join(response.streaming_content)
+        self.assertEqual(json.loads(content), expected.json())
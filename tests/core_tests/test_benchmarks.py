@@ -0,0 +1,69 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from restaurants.models import OrderItem
+
+
+class BenchmarkCommandsTest(TestCase):
+    def setUp(self):
+        call_command(
+            "generate_dataset",
+            users=20,
+            restaurants=3,
+            orders_per_user=3,
+            seed=5,
+            stdout=StringIO(),
+        )
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.baseline = os.path.join(directory.name, "baseline.json")
+        self.current = os.path.join(directory.name, "current.json")
+
+    def run_benchmarks(self, output):
+        call_command(
+            "run_benchmarks",
+            "--existing-db",
+            "--url-name=get-order-history",
+            "--url-name=batch-order-items",
+            "--iterations=3",
+            "--warmup=1",
+            "--memory-iterations=1",
+            f"--output={output}",
+            stdout=StringIO(),
+            stderr=StringIO(),
+        )
+        with open(output) as f:
+            return json.load(f)
+
+    def test_results_are_recorded_and_compared(self):
+        order_items = list(OrderItem.objects.values_list("id", "quantity"))
+        report = self.run_benchmarks(self.baseline)
+
+        history = report["results"]["get-order-history"]
+        self.assertEqual(history["status"], 200)
+        # the token is verified once, by the warmup request
+        self.assertEqual(history["queries"], 2)
+        self.assertLessEqual(history["p50_ms"], history["p99_ms"])
+        self.assertEqual(report["results"]["batch-order-items"]["status"], 200)
+        # the mutating case was rolled back
+        self.assertEqual(
+            list(OrderItem.objects.values_list("id", "quantity")), order_items
+        )
+
+        out = StringIO()
+        call_command("compare_benchmarks", self.baseline, self.baseline, stdout=out)
+        self.assertIn("No regressions.", out.getvalue())
+
+        report["results"]["get-order-history"]["queries"] += 1
+        with open(self.current, "w") as f:
+            json.dump(report, f)
+        with self.assertRaisesMessage(CommandError, "get-order-history"):
+            call_command(
+                "compare_benchmarks", self.baseline, self.current, stdout=StringIO()
+            )
@@ -0,0 +1,163 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from rest_framework.exceptions import NotFound
+
+from restaurants.models import MenuItem, RestaurantStaff
+from restaurants.selectors import get_restaurant_menu_item_as_of
+from restaurants.services import update_restaurant_menu_item
+from utils.history_utils import batched_history, compact_history, prune_history
+
+from tests.fixtures import (
+    create_test_menu,
+    create_test_menu_item,
+    create_test_restaurant,
+    create_test_user,
+)
+
+HISTORY_INSERT = 'INSERT INTO "restaurants_historicalmenuitem"'
+
+
+@override_settings(HISTORY_DEFERRED_WRITES=True)
+class DeferredHistoricalRecordsTest(TestCase):
+    def setUp(self):
+        user = create_test_user()
+        menu = create_test_menu(create_test_restaurant(creator=user))
+        self.item = create_test_menu_item(menu)
+
+    def changes(self, field):
+        return list(
+            self.item.history.filter(history_type="~")
+            .order_by("history_id")
+            .values_list(field, flat=True)
+        )
+
+    def test_rows_are_written_in_one_insert_at_the_end_of_the_block(self):
+        with CaptureQueriesContext(connection) as queries:
+            with batched_history():
+                for price in ("11.00", "12.00", "13.00"):
+                    update_restaurant_menu_item(self.item.id, {"price": price})
+                self.assertEqual(self.changes("price"), [])
+
+        inserts = [q for q in queries if q["sql"].startswith(HISTORY_INSERT)]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(
+            self.changes("price"),
+            [Decimal("11.00"), Decimal("12.00"), Decimal("13.00")],
+        )
+
+    def test_rows_of_rolled_back_savepoints_are_dropped(self):
+        with batched_history():
+            self.item.name = "Kept"
+            self.item.save()
+            try:
+                with transaction.atomic():
+                    self.item.name = "Rolled back"
+                    self.item.save()
+                    raise ValueError
+            except ValueError:
+                pass
+            self.item.name = "Kept again"
+            self.item.save()
+
+        self.assertEqual(self.changes("name"), ["Kept", "Kept again"])
+
+    def test_rows_are_rolled_back_with_the_changes(self):
+        with self.assertRaises(ValueError):
+            with batched_history():
+                self.item.name = "Rolled back"
+                self.item.save()
+                raise ValueError
+
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.name, "Item")
+        self.assertEqual(self.changes("name"), [])
+
+    def test_rows_are_written_with_the_change_outside_of_a_block(self):
+        self.item.name = "Renamed"
+        self.item.save()
+        self.assertEqual(self.changes("name"), ["Renamed"])
+
+    @override_settings(HISTORY_DEFERRED_WRITES=False)
+    def test_rows_are_written_with_the_change_when_disabled(self):
+        with batched_history():
+            self.item.name = "Renamed"
+            self.item.save()
+            self.assertEqual(self.changes("name"), ["Renamed"])
+
+
+@override_settings(HISTORY_DEFERRED_WRITES=False)
+class HistoryRetentionTest(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        user = create_test_user()
+        restaurant = create_test_restaurant(creator=user)
+        self.staff = RestaurantStaff.objects.create(user=user, restaurant=restaurant)
+        self.item = create_test_menu_item(create_test_menu(restaurant))
+        for obj in (self.staff, self.item):
+            obj.history.update(history_date=self.now - timedelta(days=60))
+
+    def save(self, obj, days_ago, **changes):
+        for key, value in changes.items():
+            setattr(obj, key, value)
+        obj._history_date = self.now - timedelta(days=days_ago)
+        obj.save()
+
+    def test_rows_that_only_change_ignored_fields_are_compacted(self):
+        for _ in range(3):
+            self.save(self.staff, 0)
+        self.save(self.staff, 0, is_restaurant_admin=True)
+        self.save(self.staff, 0)
+
+        self.assertEqual(compact_history(RestaurantStaff, chunk_size=2), 4)
+        history_types = self.staff.history.order_by("history_id").values_list(
+            "history_type", "is_restaurant_admin"
+        )
+        self.assertEqual(list(history_types), [("+", False), ("~", True)])
+
+    def test_rows_with_another_reason_are_kept(self):
+        self.save(self.staff, 0)
+        self.staff._change_reason = "Checked by support"
+        self.save(self.staff, 0)
+
+        self.assertEqual(compact_history(RestaurantStaff), 1)
+        reasons = self.staff.history.order_by("history_id").values_list(
+            "history_change_reason", flat=True
+        )
+        self.assertEqual(list(reasons), [None, "Checked by support"])
+
+    def test_the_newest_expired_row_is_kept(self):
+        self.save(self.item, 30, price="11.00")
+        self.save(self.item, 20, price="12.00")
+        self.save(self.item, 1, price="13.00")
+        before = self.now - timedelta(days=10)
+
+        self.assertEqual(prune_history(MenuItem, before, chunk_size=1), 2)
+        item = get_restaurant_menu_item_as_of(self.item.id, before)
+        self.assertEqual(item.price, Decimal("12.00"))
+        self.assertEqual(self.item.history.count(), 2)
+
+    def test_menu_item_as_of(self):
+        self.save(self.item, 5, price="11.00")
+        self.save(self.item, 2, price="12.00")
+
+        item = get_restaurant_menu_item_as_of(
+            self.item.id, self.now - timedelta(days=3)
+        )
+        self.assertEqual(item.price, Decimal("11.00"))
+        with self.assertRaises(NotFound):
+            get_restaurant_menu_item_as_of(self.item.id, self.now - timedelta(days=61))
+
+    def test_command(self):
+        self.save(self.staff, 0)
+        self.save(self.item, 800, price="11.00")
+        output = StringIO()
+        call_command("prune_history", stdout=output)
+        self.assertIn("restaurants.RestaurantStaff: compacted 1", output.getvalue())
@@ -0,0 +1,152 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+
+from core.models import IdempotencyRecord
+from restaurants.models import Order, OrderItem
+from users.services import place_order
+
+from tests.fixtures import (
+    create_test_menu,
+    create_test_menu_item,
+    create_test_restaurant,
+    create_test_user,
+)
+
+
+class IdempotencyMiddlewareTest(TestCase):
+    def setUp(self):
+        self.user = create_test_user()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.restaurant = create_test_restaurant(creator=self.user)
+        self.menu_item = create_test_menu_item(create_test_menu(self.restaurant))
+
+    def test_retried_place_order_is_replayed(self):
+        data = {
+            "restaurant": self.restaurant.id,
+            "menu_item": self.menu_item.id,
+            "quantity": 1,
+        }
+        first = self.client.post(
+            reverse("place-order"), data, HTTP_IDEMPOTENCY_KEY="abc"
+        )
+        with CaptureQueriesContext(connection) as queries:
+            retry = self.client.post(
+                reverse("place-order"), data, HTTP_IDEMPOTENCY_KEY="abc"
+            )
+        # the rejected insert and the lookup, without the savepoint statements
+        statements = [query["sql"].split()[0] for query in queries]
+        self.assertEqual(
+            [s for s in statements if s in ("INSERT", "SELECT")], ["INSERT", "SELECT"]
+        )
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.content, first.content)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+
+    def test_key_reused_with_another_body_is_rejected(self):
+        data = {
+            "restaurant": self.restaurant.id,
+            "menu_item": self.menu_item.id,
+            "quantity": 1,
+        }
+        self.client.post(reverse("place-order"), data, HTTP_IDEMPOTENCY_KEY="abc")
+        response = self.client.post(
+            reverse("place-order"), {**data, "quantity": 2}, HTTP_IDEMPOTENCY_KEY="abc"
+        )
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(OrderItem.objects.get().quantity, 1)
+
+    def test_key_in_flight_is_a_conflict(self):
+        data = {
+            "restaurant": self.restaurant.id,
+            "menu_item": self.menu_item.id,
+            "quantity": 1,
+        }
+        self.client.post(reverse("place-order"), data, HTTP_IDEMPOTENCY_KEY="abc")
+        IdempotencyRecord.objects.update(status_code=None)
+        response = self.client.post(
+            reverse("place-order"), data, HTTP_IDEMPOTENCY_KEY="abc"
+        )
+        self.assertEqual(response.status_code, 409)
+
+    def test_abandoned_key_is_taken_over(self):
+        data = {
+            "restaurant": self.restaurant.id,
+            "menu_item": self.menu_item.id,
+            "quantity": 1,
+        }
+        self.client.post(reverse("place-order"), data, HTTP_IDEMPOTENCY_KEY="abc")
+        # the worker holding the key was killed before it stored the response
+        IdempotencyRecord.objects.update(
+            status_code=None, created_at=timezone.now() - timedelta(minutes=10)
+        )
+        response = self.client.post(
+            reverse("place-order"), data, HTTP_IDEMPOTENCY_KEY="abc"
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(IdempotencyRecord.objects.get().status_code, 201)
+
+    def test_expired_key_is_replaced(self):
+        data = {
+            "restaurant": self.restaurant.id,
+            "menu_item": self.menu_item.id,
+            "quantity": 1,
+        }
+        self.client.post(reverse("place-order"), data, HTTP_IDEMPOTENCY_KEY="abc")
+        IdempotencyRecord.objects.update(created_at=timezone.now() - timedelta(days=2))
+        response = self.client.post(
+            reverse("place-order"), data, HTTP_IDEMPOTENCY_KEY="abc"
+        )
+        self.assertNotIn("Idempotent-Replayed", response)
+        self.assertEqual(OrderItem.objects.get().quantity, 2)
+        record = IdempotencyRecord.objects.get()
+        self.assertGreater(record.created_at, timezone.now() - timedelta(hours=1))
+
+    def test_retried_reduce_does_not_change_the_cart_again(self):
+        order = place_order(
+            user=self.user, restaurant=self.restaurant, menu_item=self.menu_item, quantity=3
+        )
+        item = OrderItem.objects.get(order=order)
+        url = reverse("reduce-order-item-quantity", args=[item.id])
+        for _ in range(3):
+            self.client.delete(url, HTTP_IDEMPOTENCY_KEY="reduce-1")
+        item.refresh_from_db()
+        self.assertEqual(item.quantity, 2)
+
+        self.client.delete(url, HTTP_IDEMPOTENCY_KEY="reduce-2")
+        item.refresh_from_db()
+        self.assertEqual(item.quantity, 1)
+
+    def test_requests_without_key_are_not_stored(self):
+        data = {
+            "restaurant": self.restaurant.id,
+            "menu_item": self.menu_item.id,
+            "quantity": 1,
+        }
+        self.client.post(reverse("place-order"), data)
+        self.assertFalse(IdempotencyRecord.objects.exists())
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_sweep_idempotency_keys(self):
+        IdempotencyRecord.objects.create(
+            key="old", status_code=200, content=b"", content_type="application/json"
+        )
+        IdempotencyRecord.objects.create(
+            key="new", status_code=200, content=b"", content_type="application/json"
+        )
+        IdempotencyRecord.objects.filter(key="old").update(
+            created_at=timezone.now() - timedelta(days=2)
+        )
+        call_command("sweep_idempotency_keys", "--chunk-size=1", stdout=StringIO())
+        self.assertEqual(
+            list(IdempotencyRecord.objects.values_list("key", flat=True)), ["new"]
+        )
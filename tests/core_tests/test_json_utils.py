@@ -0,0 +1,53 @@
+import datetime
+import io
+import uuid
+from collections import OrderedDict
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+from django.utils import timezone
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from utils.json_utils import FastJSONParser, FastJSONRenderer
+
+
+class FastJSONTest(SimpleTestCase):
+    def test_renders_the_same_bytes_as_drf(self):
+        data = [
+            OrderedDict(
+                order_id=uuid.uuid4(),
+                total_price="12.50",
+                price=Decimal("10.00"),
+                date_created=timezone.now(),
+                local=datetime.datetime(2022, 1, 1, 12, 30, 15, 123),
+                day=datetime.date(2022, 1, 1),
+                opening_time=datetime.time(8, 0),
+                name="Àmàlà\u2028and\u2029",
+                rating=4.5,
+                tags=("a", "b"),
+            ),
+            {1: None, "nested": {"empty": []}, "yes": True},
+        ]
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_falls_back_to_drf(self):
+        data = {"big": 2**70}
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        media_type = "application/json; indent=2"
+        self.assertEqual(
+            FastJSONRenderer().render({"a": 1}, media_type),
+            JSONRenderer().render({"a": 1}, media_type),
+        )
+
+    def test_parses_like_drf(self):
+        body = '{"name": "Àmàlà", "quantity": 2, "price": 10.5, "items": [null]}'
+        self.assertEqual(
+            FastJSONParser().parse(io.BytesIO(body.encode())),
+            JSONParser().parse(io.BytesIO(body.encode())),
+        )
+        for invalid in (b"{", b'{"price": NaN}'):
+            with self.assertRaises(ParseError):
+                FastJSONParser().parse(io.BytesIO(invalid))
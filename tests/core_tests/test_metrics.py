@@ -0,0 +1,87 @@
+import fcntl
+import json
+import os
+import tempfile
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.metrics import collect, store
+
+from tests.fixtures import create_test_restaurant, create_test_user
+
+
+class MetricsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        store.reset()
+        create_test_restaurant(creator=create_test_user())
+
+    def test_requests_are_recorded_by_url_name(self):
+        self.client.get(reverse("get-all-restaurants"))
+        self.client.get(reverse("get-all-restaurants"))
+
+        with self.settings(METRICS_TOKEN="secret"):
+            response = self.client.get(
+                reverse("metrics"), HTTP_AUTHORIZATION="Bearer secret"
+            )
+        text = response.content.decode()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            'http_requests_total{url_name="get-all-restaurants",method="GET",status="200"} 2',
+            text,
+        )
+        self.assertIn(
+            'http_request_duration_seconds_count{url_name="get-all-restaurants",method="GET"} 2',
+            text,
+        )
+        self.assertIn(
+            'http_request_duration_seconds_bucket{url_name="get-all-restaurants",method="GET",le="+Inf"} 2',
+            text,
+        )
+        # the first request builds the payload, the second one is served from cache
+        self.assertIn('catalog_cache_hit_ratio{url_name="get-all-restaurants"} 0.5000', text)
+        self.assertIn('db_queries_total{url_name="get-all-restaurants"} 2', text)
+        # only the metrics request itself is in flight
+        self.assertIn("http_requests_in_flight 1", text)
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_token_is_required_when_set(self):
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 403)
+        response = self.client.get(
+            reverse("metrics"), HTTP_AUTHORIZATION="Bearer secret"
+        )
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(METRICS_TOKEN=None, DEBUG=False)
+    def test_metrics_are_private_without_a_token(self):
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 403)
+
+    def write_worker(self, directory, worker, in_flight):
+        snapshot = store.snapshot()
+        snapshot.update(worker=worker, in_flight=in_flight)
+        with open(os.path.join(directory, f"metrics-{worker}.json"), "w") as f:
+            json.dump(snapshot, f)
+
+    def test_worker_files_are_added_up(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with override_settings(METRICS_MULTIPROC_DIR=directory):
+                self.client.get(reverse("get-all-restaurants"))
+                store.flush()
+                # a live worker holds the lock of its file
+                self.write_worker(directory, "alive", in_flight=2)
+                lock = open(os.path.join(directory, "metrics-alive.lock"), "w")
+                self.addCleanup(lock.close)
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                # a worker that exited: its counters stay, its in-flight gauge goes
+                self.write_worker(directory, "exited", in_flight=3)
+
+                metrics = collect()
+                self.assertFalse(
+                    os.path.exists(os.path.join(directory, "metrics-exited.json"))
+                )
+                self.assertEqual(collect(), metrics)
+
+        self.assertEqual(metrics["requests"]["get-all-restaurants|GET|200"], 3)
+        self.assertEqual(metrics["in_flight"], 2)
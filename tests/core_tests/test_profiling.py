@@ -0,0 +1,64 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.profiling import create_profile_token
+
+from tests.fixtures import create_test_restaurant, create_test_user
+
+
+class ProfilingMiddlewareTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        create_test_restaurant(creator=create_test_user())
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        settings = override_settings(PROFILING_DIR=self.directory)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_signed_header_profiles_the_request(self):
+        response = self.client.get(
+            reverse("get-all-filtered-restaurants"),
+            HTTP_X_PROFILE=create_profile_token(),
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("get-all-filtered-restaurants", response["X-Profile-Id"])
+        self.assertEqual(os.listdir(self.directory), [response["X-Profile-Id"]])
+
+        out = StringIO()
+        call_command("profile_hotspots", "--limit", "5", stdout=out)
+        self.assertIn("1 profiles", out.getvalue())
+        self.assertIn("function calls", out.getvalue())
+
+        call_command(
+            "profile_hotspots", "--url-name", "get-all-filtered-restaurants", stdout=out
+        )
+        # a url name that ends the profiled one does not match it
+        with self.assertRaises(CommandError):
+            call_command(
+                "profile_hotspots", "--url-name", "filtered-restaurants", stdout=out
+            )
+
+    def test_invalid_or_missing_token_is_not_profiled(self):
+        response = self.client.get(
+            reverse("get-all-restaurants"), HTTP_X_PROFILE="profile:forged"
+        )
+        self.client.get(reverse("get-all-restaurants"))
+
+        self.assertNotIn("X-Profile-Id", response)
+        self.assertFalse(os.path.exists(self.directory) and os.listdir(self.directory))
+
+    @override_settings(PROFILING_SAMPLE_RATE=1, PROFILING_MAX_FILES=2)
+    def test_sampled_profiles_are_rotated(self):
+        for _ in range(4):
+            self.client.get(reverse("get-all-restaurants"))
+
+        self.assertEqual(len(os.listdir(self.directory)), 2)
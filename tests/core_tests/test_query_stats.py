@@ -0,0 +1,71 @@
+import json
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.query_stats import QueryStats
+from restaurants.apis import GetAllRestaurantsApi
+
+from tests.fixtures import create_test_restaurant, create_test_user
+from tests.query_budget import create_token_client
+
+
+class QueryStatsTest(TestCase):
+    def test_duplicates_ignore_params(self):
+        stats = QueryStats()
+        execute = lambda sql, params, many, context: None  # noqa: E731
+        for params in ([1], [2], [3]):
+            stats(execute, "SELECT 1 WHERE id = %s", params, False, {})
+        stats(execute, "SELECT 2", [], False, {})
+
+        self.assertEqual(stats.count, 4)
+        self.assertEqual(stats.duplicates, 2)
+
+
+class QueryStatsMiddlewareTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = create_test_user()
+        create_test_restaurant(creator=self.user)
+        self.client = create_token_client(self.user)
+
+    @override_settings(DEBUG=True)
+    def test_stats_are_sent_as_headers_in_debug(self):
+        response = self.client.get(reverse("get-all-restaurants"))
+
+        self.assertEqual(response["X-Query-Count"], "5")
+        self.assertEqual(response["X-Query-Duplicates"], "0")
+        self.assertEqual(
+            response["X-Query-Budget"], str(GetAllRestaurantsApi.query_budget)
+        )
+        self.assertIn("X-Query-Time-Ms", response)
+
+    def test_stats_are_logged_without_debug(self):
+        with self.assertLogs("core.queries", level="DEBUG") as logs:
+            response = self.client.get(reverse("get-all-restaurants"))
+
+        self.assertNotIn("X-Query-Count", response)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record["url_name"], "get-all-restaurants")
+        self.assertEqual(record["queries"], 5)
+        self.assertEqual(record["budget"], GetAllRestaurantsApi.query_budget)
+        self.assertEqual(logs.records[0].levelname, "DEBUG")
+
+    def test_streamed_lists_are_logged_once_sent(self):
+        with self.assertLogs("core.queries", level="DEBUG") as logs:
+            response = self.client.get(reverse("get-all-restaurants"), {"stream": "1"})
+            self.assertEqual(logs.records, [])
+            b"".join(response.streaming_content)
+
+        record = json.loads(logs.records[0].getMessage())
+        # the restaurants and their cuisines, read while the list was sent
+        self.assertEqual(record["queries"] - record["unbudgeted_queries"], 2)
+
+    def test_going_over_budget_logs_a_warning(self):
+        with mock.patch.object(GetAllRestaurantsApi, "query_budget", 1):
+            with self.assertLogs("core.queries", level="WARNING") as logs:
+                self.client.get(reverse("get-all-restaurants"))
+
+        self.assertEqual(logs.records[0].levelname, "WARNING")
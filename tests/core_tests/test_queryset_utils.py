@@ -0,0 +1,94 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from rest_framework import serializers
+
+from restaurants.apis import GetAllRestaurantMenuItemsApi, GetAllRestaurantsApi
+from restaurants.models import Cuisine, Restaurant
+from restaurants.selectors import (
+    get_all_restaurant_menu_items,
+    get_all_restaurants,
+    get_user_order_history,
+)
+from users.order_apis import GetOrderHistoryApi
+from utils.queryset_utils import plan_queryset
+from utils.serializer_utils import compile_serializer
+
+from tests.fixtures import (
+    create_test_menu,
+    create_test_menu_item,
+    create_test_order,
+    create_test_restaurant,
+    create_test_user,
+)
+
+
+class PlanQuerysetTest(TestCase):
+    def setUp(self):
+        self.user = create_test_user()
+        self.restaurant = create_test_restaurant(creator=self.user)
+        self.restaurant.cuisine.add(Cuisine.objects.create(name="Local"))
+        menu = create_test_menu(self.restaurant)
+        self.items = [create_test_menu_item(menu, name=f"Item {i}") for i in range(3)]
+        create_test_order(self.user, self.restaurant, self.items)
+        create_test_order(self.user, self.restaurant, self.items[:1])
+
+    def assertRenders(self, serializer_class, queryset, queries):
+        planned = plan_queryset(queryset, serializer_class)
+        with CaptureQueriesContext(connection) as captured:
+            data = compile_serializer(serializer_class)(planned)
+        self.assertEqual(len(captured), queries)
+        self.assertEqual(data, serializer_class(queryset, many=True).data)
+        return planned
+
+    def test_only_loads_the_rendered_columns(self):
+        planned = self.assertRenders(
+            GetAllRestaurantsApi.OutputSerializer, get_all_restaurants(), queries=2
+        )
+        restaurant = planned[0]
+        self.assertEqual(
+            restaurant.get_deferred_fields(),
+            {
+                "address",
+                "phone_number",
+                "email",
+                "is_active",
+                "creator_id",
+                "created_at",
+            },
+        )
+        cuisine = restaurant.cuisine.all()[0]
+        self.assertEqual(cuisine.get_deferred_fields(), set())
+
+    def test_method_field_dependencies_are_joined(self):
+        self.assertRenders(
+            GetAllRestaurantMenuItemsApi.OutputSerializer,
+            get_all_restaurant_menu_items(restaurant_id=self.restaurant.id),
+            queries=1,
+        )
+
+    def test_selector_prefetch_querysets_are_kept(self):
+        planned = self.assertRenders(
+            GetOrderHistoryApi.OutputSerializer,
+            get_user_order_history(user=self.user),
+            queries=2,
+        )
+        order_items = planned[0].orderitem_set.all()
+        self.assertEqual(
+            [item.id for item in order_items], sorted(item.id for item in order_items)
+        )
+        self.assertIn("menu_item_id", order_items[0].__dict__)
+
+    def test_unknown_reads_load_every_column(self):
+        class OutputSerializer(serializers.Serializer):
+            name = serializers.CharField()
+            summary = serializers.SerializerMethodField()
+
+            def get_summary(self, obj):
+                return obj.description
+
+        planned = self.assertRenders(
+            OutputSerializer, Restaurant.objects.all(), queries=1
+        )
+        self.assertEqual(planned[0].get_deferred_fields(), set())
@@ -0,0 +1,97 @@
+from django.test import TestCase
+
+from rest_framework import serializers
+
+from restaurants.apis import (
+    GetAllRestaurantMenuItemsApi,
+    GetAllRestaurantMenusApi,
+    GetAllRestaurantsApi,
+)
+from restaurants.models import Cuisine, Menu, Restaurant
+from restaurants.selectors import (
+    get_all_restaurant_menu_items,
+    get_all_restaurant_menus,
+    get_all_restaurants,
+    get_user_order_history,
+)
+from users.order_apis import GetOrderBasedOnStatus, GetOrderHistoryApi
+from utils.serializer_utils import compile_serializer, inline_serializer
+
+from tests.fixtures import (
+    create_test_menu,
+    create_test_menu_item,
+    create_test_order,
+    create_test_restaurant,
+    create_test_user,
+)
+
+
+class CompileSerializerTest(TestCase):
+    def setUp(self):
+        self.user = create_test_user()
+        self.restaurant = create_test_restaurant(creator=self.user, rating=4.5)
+        self.restaurant.cuisine.add(
+            Cuisine.objects.create(name="Local"), Cuisine.objects.create(name="Grill")
+        )
+        create_test_restaurant(creator=self.user, name="No cuisine")
+        menu = create_test_menu(self.restaurant)
+        self.items = [
+            create_test_menu_item(menu, name=f"Item {index}", price=f"{index}.5")
+            for index in range(3)
+        ]
+        create_test_order(self.user, self.restaurant, self.items)
+        create_test_order(
+            self.user, self.restaurant, self.items[:1], status="delivered"
+        )
+
+    def assertSameAsDrf(self, serializer_class, queryset):
+        expected = serializer_class(queryset, many=True).data
+        self.assertTrue(expected)
+        self.assertEqual(compile_serializer(serializer_class)(queryset), expected)
+
+    def test_output_serializers_render_like_drf(self):
+        self.assertSameAsDrf(
+            GetAllRestaurantsApi.OutputSerializer, get_all_restaurants()
+        )
+        self.assertSameAsDrf(
+            GetAllRestaurantMenusApi.OutputSerializer,
+            get_all_restaurant_menus(restaurant_id=self.restaurant.id),
+        )
+        self.assertSameAsDrf(
+            GetAllRestaurantMenuItemsApi.OutputSerializer,
+            get_all_restaurant_menu_items(restaurant_id=self.restaurant.id),
+        )
+        self.assertSameAsDrf(
+            GetOrderHistoryApi.OutputSerializer, get_user_order_history(user=self.user)
+        )
+        self.assertSameAsDrf(
+            GetOrderBasedOnStatus.OutputSerializer,
+            get_user_order_history(user=self.user).filter(status="delivered"),
+        )
+
+    def test_values_rows_read_nested_fields_from_prefixed_keys(self):
+        serialize = compile_serializer(GetAllRestaurantMenusApi.OutputSerializer)
+        rows = Menu.objects.values("id", "name", "cuisine__name")
+        expected = GetAllRestaurantMenusApi.OutputSerializer(
+            Menu.objects.all(), many=True
+        ).data
+        self.assertEqual(serialize(rows), expected)
+
+    def test_values_rows_can_not_hold_many_fields(self):
+        serialize = compile_serializer(GetAllRestaurantsApi.OutputSerializer)
+        with self.assertRaises(ValueError):
+            serialize(Restaurant.objects.values())
+
+    def test_null_and_optional_fields(self):
+        class OutputSerializer(serializers.Serializer):
+            name = serializers.CharField()
+            missing = serializers.CharField(required=False)
+            creator = inline_serializer(
+                fields={"email": serializers.EmailField()}, allow_null=True
+            )
+
+        self.restaurant.creator = None
+        self.assertEqual(
+            compile_serializer(OutputSerializer)([self.restaurant]),
+            [{"name": "Restaurant", "creator": None}],
+        )
@@ -0,0 +1,62 @@
+import datetime
+from decimal import Decimal
+
+from restaurants.models import Cuisine, Menu, MenuItem, Order, OrderItem, Restaurant
+from users.models import CustomUser
+
+
+def create_test_user(email: str = "user@user.com", **kwargs) -> CustomUser:
+    return CustomUser.objects.create_user(
+        email=email, password="user", username=email.split("@")[0], **kwargs
+    )
+
+
+def create_test_restaurant(creator: CustomUser, name: str = "Restaurant", **kwargs) -> Restaurant:
+    data = {
+        "name": name,
+        "description": f"{name} description",
+        "address": f"{name} address",
+        "phone_number": "12345678912",
+        "email": f"{name.lower().replace(' ', '-')}@restaurant.com",
+        "opening_time": datetime.time(8, 0),
+        "closing_time": datetime.time(22, 0),
+        "creator": creator,
+    }
+    data.update(kwargs)
+    return Restaurant.objects.create(**data)
+
+
+def create_test_menu(restaurant: Restaurant, name: str = "Menu", **kwargs) -> Menu:
+    cuisine = kwargs.pop("cuisine", None) or Cuisine.objects.get_or_create(name="Local")[0]
+    return Menu.objects.create(
+        restaurant=restaurant,
+        name=name,
+        description=f"{name} description",
+        cuisine=cuisine,
+        creator=restaurant.creator,
+        **kwargs,
+    )
+
+
+def create_test_menu_item(menu: Menu, name: str = "Item", price: str = "10.00", **kwargs) -> MenuItem:
+    return MenuItem.objects.create(
+        menu=menu,
+        name=name,
+        description=f"{name} description",
+        price=Decimal(price),
+        creator=menu.creator,
+        **kwargs,
+    )
+
+
+def create_test_order(user: CustomUser, restaurant: Restaurant, menu_items: list, paid: bool = True, **kwargs) -> Order:
+    order = Order.objects.create(user=user, restaurant=restaurant, paid=paid, **kwargs)
+    for menu_item in menu_items:
+        OrderItem.objects.create(
+            order=order,
+            menu_item=menu_item,
+            quantity=2,
+            name=menu_item.name,
+            unit_price=menu_item.price,
+        )
+    return order
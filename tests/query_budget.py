@@ -0,0 +1,33 @@
+from knox.models import AuthToken
+from rest_framework.test import APIClient
+
+from users.models import CustomUser
+
+
+def create_token_client(user: CustomUser) -> APIClient:
+    """Returns a client that authenticates with a real knox token, so the
+    authentication queries are counted like they are in production."""
+    _, token = AuthToken.objects.create(user)
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Token {token}")
+    return client
+
+
+class QueryBudgetMixin:
+    """TestCase mixin that checks a response against the `query_budget` declared
+    on its API class, using the stats recorded by QueryStatsMiddleware."""
+
+    def assertWithinQueryBudget(self, response):
+        view = response.renderer_context["view"]
+        budget = getattr(view, "query_budget", None)
+        self.assertIsNotNone(
+            budget, f"{type(view).__name__} does not declare a query_budget"
+        )
+        stats = response.wsgi_request.query_stats
+        self.assertLessEqual(
+            stats.budgeted,
+            budget,
+            f"{type(view).__name__} made {stats.budgeted} queries (budget {budget}), "
+            f"most repeated: {stats.statements.most_common(3)}",
+        )
+        return stats
@@ -0,0 +1,89 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from restaurants.models import Cuisine
+from restaurants.services import disable_restaurant, update_restaurant_info
+from utils.cache_utils import get_catalog_cache_stats, reset_catalog_cache_stats
+
+from tests.fixtures import (
+    create_test_menu,
+    create_test_menu_item,
+    create_test_restaurant,
+    create_test_user,
+)
+
+
+class CatalogCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_catalog_cache_stats()
+        self.user = create_test_user()
+        self.restaurant = create_test_restaurant(creator=self.user, name="Mama Put")
+        self.restaurant.cuisine.add(Cuisine.objects.create(name="Nigerian"))
+
+    def test_second_request_is_served_from_cache(self):
+        url = reverse("get-all-restaurants")
+        first = self.client.get(url)
+        with self.assertNumQueries(0):
+            second = self.client.get(url)
+        self.assertEqual(first.json(), second.json())
+        self.assertEqual(get_catalog_cache_stats(), {"hits": 1, "misses": 1})
+
+    def test_update_invalidates_restaurant_and_listing(self):
+        info_url = reverse("get-restaurant-info", args=[self.restaurant.id])
+        list_url = reverse("get-all-restaurants")
+        self.client.get(info_url)
+        self.client.get(list_url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            update_restaurant_info(id=self.restaurant.id, data={"description": "New"})
+
+        self.assertEqual(self.client.get(info_url).json()["description"], "New")
+        self.assertEqual(self.client.get(list_url).json()[0]["description"], "New")
+        self.assertEqual(get_catalog_cache_stats(), {"hits": 0, "misses": 4})
+
+    def test_disabled_restaurant_is_not_served_stale(self):
+        url = reverse("get-restaurant-that-has-current-cuisine", args=["Nigerian"])
+        self.assertEqual(len(self.client.get(url).json()), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            disable_restaurant(id=self.restaurant.id)
+
+        self.assertEqual(self.client.get(url).json(), [])
+
+    def test_version_is_not_bumped_before_commit(self):
+        url = reverse("get-all-restaurant-cuisines")
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=False):
+            update_restaurant_info(id=self.restaurant.id, data={"description": "New"})
+        self.client.get(url)
+        self.assertEqual(get_catalog_cache_stats(), {"hits": 1, "misses": 1})
+
+    def test_saves_outside_the_services_invalidate(self):
+        # e.g. from the admin
+        menu = create_test_menu(self.restaurant)
+        item = create_test_menu_item(menu)
+        tree_url = reverse("get-restaurant-menu-tree", args=[self.restaurant.id])
+        list_url = reverse("get-all-restaurants")
+        self.client.get(tree_url)
+        self.client.get(list_url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            item.name = "Renamed"
+            item.save()
+            self.restaurant.cuisine.add(Cuisine.objects.create(name="Grill"))
+
+        tree = self.client.get(tree_url).json()
+        self.assertIn("Renamed", str(tree))
+        cuisines = self.client.get(list_url).json()[0]["cuisine"]
+        names = {cuisine["name"] for cuisine in cuisines}
+        self.assertEqual(names, {"Nigerian", "Grill"})
+
+    def test_url_params_are_hashed_into_the_key(self):
+        self.restaurant.cuisine.add(Cuisine.objects.create(name="West African"))
+        url = reverse("get-restaurant-that-has-current-cuisine", args=["West African"])
+        self.client.get(url)
+        keys = [key for key in cache._cache if "restaurants-with-cuisine" in key]
+        self.assertEqual(len(keys), 1)
+        self.assertNotIn(" ", keys[0])
@@ -0,0 +1,63 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import DecimalField, F, Sum
+from django.test import TestCase
+
+from restaurants.models import Menu, MenuItem, Order, OrderItem, Restaurant
+from users.models import CustomUser
+
+
+class GenerateDatasetTest(TestCase):
+    def generate(self, seed):
+        call_command(
+            "generate_dataset",
+            users=20,
+            restaurants=4,
+            menus_per_restaurant=2,
+            items_per_menu=3,
+            orders_per_user=5,
+            seed=seed,
+            chunk_size=7,
+            stdout=StringIO(),
+        )
+
+    def test_generates_consistent_rows(self):
+        self.generate(seed=1)
+
+        self.assertEqual(CustomUser.objects.count(), 20)
+        self.assertEqual(Restaurant.objects.count(), 4)
+        self.assertEqual(Menu.objects.count(), 8)
+        self.assertEqual(MenuItem.objects.count(), 24)
+        self.assertEqual(Order.objects.count(), 100)
+        # order dates are spread out instead of all being "now"
+        self.assertGreater(Order.objects.values("date_created").distinct().count(), 90)
+        # at most one open order per user
+        self.assertLessEqual(Order.objects.filter(paid=False).count(), 20)
+        for order in Order.objects.annotate(
+            computed=Sum(
+                F("orderitem__quantity") * F("orderitem__unit_price"),
+                output_field=DecimalField(max_digits=10, decimal_places=2),
+            )
+        ):
+            self.assertEqual(order.total_price, order.computed)
+        self.assertFalse(OrderItem.objects.filter(name="").exists())
+
+    def totals(self):
+        return list(
+            Order.objects.order_by("user__email", "date_created").values_list(
+                "total_price", flat=True
+            )
+        )
+
+    def test_same_seed_generates_the_same_data(self):
+        self.generate(seed=1)
+        first = self.totals()
+        CustomUser.objects.all().delete()
+        self.generate(seed=1)
+        second = self.totals()
+
+        self.assertEqual(first, second)
+        with self.assertRaises(CommandError):
+            self.generate(seed=1)
@@ -0,0 +1,58 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from restaurants.selectors import get_restaurant_menu_tree
+
+from tests.fixtures import (
+    create_test_menu,
+    create_test_menu_item,
+    create_test_restaurant,
+    create_test_user,
+)
+
+
+class MenuTreeTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = create_test_user()
+        self.restaurant = create_test_restaurant(creator=user, name="Mama Put")
+        other = create_test_restaurant(creator=user, name="Other")
+        self.rice = create_test_menu(self.restaurant, name="Rice")
+        self.soup = create_test_menu(self.restaurant, name="Soup")
+        create_test_menu(self.restaurant, name="Old", is_active=False)
+        create_test_menu(other, name="Rice")
+        self.jollof = create_test_menu_item(self.rice, name="Jollof", price="1500.00")
+        create_test_menu_item(self.rice, name="Fried", is_active=False)
+        self.egusi = create_test_menu_item(self.soup, name="Egusi", price="2000.50")
+
+    def test_menu_tree_is_grouped_and_scoped_to_restaurant(self):
+        with self.assertNumQueries(2):
+            tree = get_restaurant_menu_tree(restaurant_id=self.restaurant.id)
+
+        self.assertEqual([menu["name"] for menu in tree], ["Rice", "Soup"])
+        self.assertEqual(
+            tree[0]["menu_items"],
+            [
+                {
+                    "id": self.jollof.id,
+                    "image": None,
+                    "name": "Jollof",
+                    "description": "Jollof description",
+                    "price": "1500.00",
+                }
+            ],
+        )
+        self.assertEqual(tree[1]["menu_items"][0]["price"], "2000.50")
+        self.assertEqual(tree[1]["cuisine"], {"name": "Local"})
+
+    def test_menu_tree_api(self):
+        response = self.client.get(
+            reverse("get-restaurant-menu-tree", args=[self.restaurant.id])
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 2)
+
+    def test_unknown_restaurant(self):
+        response = self.client.get(reverse("get-restaurant-menu-tree", args=[0]))
+        self.assertEqual(response.status_code, 404)
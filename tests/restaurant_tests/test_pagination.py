@@ -0,0 +1,65 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+
+from restaurants.models import Order, Restaurant
+
+from tests.fixtures import create_test_order, create_test_restaurant, create_test_user
+
+
+class KeysetPaginationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = create_test_user()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        for index in range(7):
+            create_test_restaurant(
+                creator=self.user, name=f"Restaurant {index}", rating=index % 3
+            )
+
+    def _walk(self, url, page_size):
+        results, cursor, pages = [], None, 0
+        while True:
+            params = {"page_size": page_size}
+            if cursor:
+                params["cursor"] = cursor
+            data = self.client.get(url, params).json()
+            results += data["results"]
+            pages += 1
+            cursor = data["next"]
+            if cursor is None:
+                return results, pages
+
+    def test_restaurants_are_paged_by_rating_then_id(self):
+        results, pages = self._walk(reverse("get-all-restaurants"), page_size=3)
+        expected = list(
+            Restaurant.objects.order_by("-rating", "id").values_list("id", flat=True)
+        )
+        self.assertEqual([restaurant["id"] for restaurant in results], expected)
+        self.assertEqual(pages, 3)
+
+    def test_order_history_pages_through_ties_on_date_created(self):
+        restaurant = Restaurant.objects.first()
+        for _ in range(5):
+            create_test_order(self.user, restaurant, [])
+        Order.objects.update(date_created=timezone.now())
+
+        results, pages = self._walk(reverse("get-order-history"), page_size=2)
+        self.assertEqual(
+            sorted(order["order_id"] for order in results),
+            sorted(str(pk) for pk in Order.objects.values_list("order_id", flat=True)),
+        )
+        self.assertEqual(pages, 3)
+
+    def test_unpaginated_response_is_unchanged(self):
+        data = self.client.get(reverse("get-all-restaurants")).json()
+        self.assertIsInstance(data, list)
+        self.assertEqual(len(data), 7)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse("get-all-restaurants"), {"cursor": "nope"})
+        self.assertEqual(response.status_code, 404)
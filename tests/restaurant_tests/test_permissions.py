@@ -0,0 +1,120 @@
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from restaurants.apis import EditRestaurantMenuItem
+from restaurants.models import Cuisine, RestaurantStaff
+from users.models import CustomUser
+from utils.permission_utils import IsRestaurantAdmin, get_staff_memberships
+
+from tests.fixtures import (
+    create_test_menu,
+    create_test_menu_item,
+    create_test_restaurant,
+    create_test_user,
+)
+from tests.query_budget import create_token_client
+
+
+class RestaurantAdminPermissionTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = create_test_user()
+        self.restaurant = create_test_restaurant(creator=self.user)
+        self.other_restaurant = create_test_restaurant(
+            creator=self.user, name="Other restaurant"
+        )
+        RestaurantStaff.objects.create(
+            user=self.user, restaurant=self.restaurant, is_restaurant_admin=True
+        )
+        self.menu = create_test_menu(self.restaurant)
+        self.item = create_test_menu_item(self.menu)
+        self.other_menu = create_test_menu(self.other_restaurant)
+        self.other_item = create_test_menu_item(self.other_menu)
+        self.client = create_token_client(self.user)
+
+    def edit_menu(self, menu):
+        return self.client.put(
+            reverse("edit-restaurant-menu", args=[menu.id]),
+            {"name": "Renamed"},
+            format="json",
+        )
+
+    def test_admins_can_only_change_their_restaurants(self):
+        self.assertEqual(self.edit_menu(self.menu).status_code, 200)
+        self.assertEqual(self.edit_menu(self.other_menu).status_code, 403)
+        response = self.client.delete(
+            reverse("delete-restaurant-menu-item", args=[self.other_item.id])
+        )
+        self.assertEqual(response.status_code, 403)
+        response = self.client.post(
+            reverse("create-restaurant-menu"),
+            {
+                "restaurant": self.other_restaurant.id,
+                "name": "Menu",
+                "description": "Menu",
+                "cuisine": Cuisine.objects.create(name="Grill").id,
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 403)
+
+    def test_staff_of_several_restaurants(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            staff = RestaurantStaff.objects.create(
+                user=self.user, restaurant=self.other_restaurant
+            )
+        # staff, but not an admin, of the other restaurant
+        self.assertEqual(self.edit_menu(self.other_menu).status_code, 403)
+        self.assertEqual(self.edit_menu(self.menu).status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            staff.is_restaurant_admin = True
+            staff.save()
+        self.assertEqual(self.edit_menu(self.other_menu).status_code, 200)
+
+    def test_memberships_are_invalidated_on_staff_changes(self):
+        self.assertEqual(get_staff_memberships(self.user), {self.restaurant.id: True})
+        with self.captureOnCommitCallbacks(execute=True):
+            RestaurantStaff.objects.filter(user=self.user).delete()
+        self.assertEqual(self.edit_menu(self.menu).status_code, 403)
+
+    def test_the_local_memory_cache_is_not_trusted(self):
+        self.assertEqual(self.edit_menu(self.menu).status_code, 200)
+        # e.g. demoted by another worker, whose invalidation can't reach this one
+        RestaurantStaff.objects.filter(user=self.user).update(
+            is_restaurant_admin=False
+        )
+        self.assertEqual(self.edit_menu(self.menu).status_code, 403)
+
+    def test_warm_permission_checks_make_no_queries(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location)
+        backend = "django.core.cache.backends.filebased.FileBasedCache"
+        shared = override_settings(
+            CACHES={"default": {"BACKEND": backend, "LOCATION": location}}
+        )
+        shared.enable()
+        self.addCleanup(shared.disable)
+        cache.clear()
+
+        def check():
+            request = Request(APIRequestFactory().put("/"))
+            # every request authenticates a new user object
+            request.user = CustomUser.objects.get(id=self.user.id)
+            view = EditRestaurantMenuItem()
+            view.kwargs = {"menu_item_id": self.item.id}
+            with CaptureQueriesContext(connection) as queries:
+                self.assertTrue(IsRestaurantAdmin().has_permission(request, view))
+            return len(queries)
+
+        self.assertEqual(check(), 2)
+        self.assertEqual(check(), 0)
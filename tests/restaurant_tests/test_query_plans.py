@@ -0,0 +1,149 @@
+import re
+
+from django.db import connection
+from django.db.models import QuerySet
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from restaurants import selectors
+from restaurants.models import Cuisine
+from users.selectors import get_existing_user_restaurant_order, get_user_order
+from utils.pagination_utils import ID_ORDERING, ORDER_ORDERING, RESTAURANT_ORDERING
+
+from tests.fixtures import (
+    create_test_menu,
+    create_test_menu_item,
+    create_test_order,
+    create_test_restaurant,
+    create_test_user,
+)
+
+# "SCAN <table>" without "USING ... INDEX" reads every row of the table, SQLite
+# before 3.36 writes it "SCAN TABLE <table>"
+FULL_SCAN = re.compile(r"\bSCAN (TABLE )?(\w+)$")
+
+
+class SelectorQueryPlanTest(TestCase):
+    """Runs each selector, then EXPLAINs every query it made so that a missing
+    index shows up as a failing test instead of a slow page."""
+
+    def setUp(self):
+        self.user = create_test_user()
+        self.restaurant = create_test_restaurant(creator=self.user)
+        self.restaurant.cuisine.add(Cuisine.objects.create(name="Local"))
+        self.menu = create_test_menu(self.restaurant)
+        self.menu_item = create_test_menu_item(self.menu)
+        self.order = create_test_order(self.user, self.restaurant, [self.menu_item])
+
+    def explain(self, selector, *args, **kwargs) -> list:
+        with CaptureQueriesContext(connection) as ctx:
+            result = selector(*args, **kwargs)
+            if isinstance(result, QuerySet):
+                list(result)
+
+        plans = []
+        with connection.cursor() as cursor:
+            for query in ctx.captured_queries:
+                if not query["sql"].startswith("SELECT"):
+                    continue
+                cursor.execute(f"EXPLAIN QUERY PLAN {query['sql']}")
+                plans.append([row[-1] for row in cursor.fetchall()])
+        return plans
+
+    def assertNoFullScan(self, selector, *args, **kwargs):
+        plans = self.explain(selector, *args, **kwargs)
+        self.assertTrue(plans)
+        for plan in plans:
+            for line in plan:
+                self.assertIsNone(
+                    FULL_SCAN.search(line), f"full table scan: {plan}"
+                )
+        return plans
+
+    def assertUsesIndex(self, index_name, selector, *args, **kwargs):
+        plans = self.assertNoFullScan(selector, *args, **kwargs)
+        self.assertTrue(
+            any(index_name in line for plan in plans for line in plan),
+            f"{index_name} not used: {plans}",
+        )
+
+    def test_restaurant_selectors(self):
+        self.assertUsesIndex("restaurant_active_rating_idx", selectors.get_all_restaurants)
+        self.assertUsesIndex(
+            "restaurant_active_rating_idx",
+            lambda: selectors.get_all_restaurants()
+            .order_by(*RESTAURANT_ORDERING)
+            .filter(rating__lt=5)[:20],
+        )
+        self.assertNoFullScan(selectors.get_restaurant_info, self.restaurant.id)
+        self.assertNoFullScan(selectors.get_all_restaurants_with_cuisine, "Local")
+
+    def test_cuisine_selectors(self):
+        # the pages after the first one start at the last id of the previous page
+        plans = self.assertNoFullScan(
+            lambda: selectors.get_all_cuisines()
+            .order_by(*ID_ORDERING)
+            .filter(id__gt=0)[:20]
+        )
+        self.assertIn("INTEGER PRIMARY KEY", plans[0][0])
+
+    def test_menu_selectors(self):
+        self.assertUsesIndex(
+            "menu_restaurant_active_idx",
+            selectors.get_all_restaurant_menus,
+            self.restaurant.id,
+        )
+        self.assertNoFullScan(selectors.get_archived_restaurant_menus, self.restaurant.id)
+        self.assertUsesIndex(
+            "menuitem_menu_active_idx",
+            selectors.get_all_restaurant_menu_items,
+            self.restaurant.id,
+        )
+        self.assertUsesIndex(
+            "menuitem_menu_active_idx",
+            selectors.get_all_restaurant_menu_items_under_menu,
+            self.menu.id,
+        )
+        self.assertUsesIndex(
+            "menu_restaurant_active_idx",
+            selectors.get_restaurant_menu_tree,
+            self.restaurant.id,
+        )
+
+    def test_order_selectors(self):
+        self.assertUsesIndex(
+            "order_user_status_idx",
+            lambda: selectors.get_all_orders_based_on_status(
+                self.user, "pending"
+            ).order_by(*ORDER_ORDERING),
+        )
+        self.assertUsesIndex(
+            "order_user_paid_history_idx",
+            lambda: selectors.get_user_order_history(self.user).order_by(
+                *ORDER_ORDERING
+            ),
+        )
+        self.assertNoFullScan(selectors.get_all_order_items, self.order.order_id)
+        self.assertUsesIndex(
+            "unique_unpaid_order_per_restaurant",
+            get_existing_user_restaurant_order,
+            self.user,
+            self.restaurant.id,
+        )
+        self.assertNoFullScan(get_user_order, self.user, self.order.order_id)
+
+    def test_address_selectors(self):
+        self.assertUsesIndex(
+            "orderaddress_user_saved_idx",
+            selectors.get_saved_user_addresses,
+            self.user,
+        )
+
+    def test_history_selectors(self):
+        self.assertUsesIndex(
+            "menuitem_hist_as_of_idx",
+            selectors.get_restaurant_menu_item_as_of,
+            self.menu_item.id,
+            timezone.now(),
+        )
@@ -0,0 +1,81 @@
+import json
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from restaurants.apis import GetAllRestaurantsApi
+from restaurants.models import Cuisine, Restaurant
+from restaurants.selectors import get_all_restaurants
+from utils.pagination_utils import RESTAURANT_ORDERING, stream_and_serialize
+
+from tests.fixtures import (
+    create_test_menu,
+    create_test_menu_item,
+    create_test_order,
+    create_test_restaurant,
+    create_test_user,
+)
+
+
+class StreamingListTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = create_test_user()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        cuisine = Cuisine.objects.create(name="Local")
+        for index in range(7):
+            restaurant = create_test_restaurant(
+                creator=self.user, name=f"Restaurant {index}", rating=index % 3
+            )
+            restaurant.cuisine.add(cuisine)
+        self.restaurant = restaurant
+        menu = create_test_menu(restaurant)
+        items = [create_test_menu_item(menu, name=f"Item {i}") for i in range(5)]
+        for index in range(3):
+            create_test_order(self.user, restaurant, items[index:])
+
+    def get_streamed(self, url):
+        response = self.client.get(url, {"stream": "true"})
+        self.assertTrue(response.streaming)
+        return json.loads(b"".join(response.streaming_content))
+
+    def test_streamed_lists_match_the_unstreamed_ones(self):
+        for url in (
+            reverse("get-all-restaurants"),
+            reverse("get-all-restaurant-menu-items", args=[self.restaurant.id]),
+            reverse("get-order-history"),
+        ):
+            expected = self.client.get(url).json()
+            key = "order_id" if "order_id" in expected[0] else "id"
+            self.assertEqual(
+                sorted(self.get_streamed(url), key=lambda row: row[key]),
+                sorted(expected, key=lambda row: row[key]),
+            )
+
+    def test_rows_are_read_in_keyset_chunks(self):
+        response = stream_and_serialize(
+            get_all_restaurants(),
+            GetAllRestaurantsApi.OutputSerializer,
+            RESTAURANT_ORDERING,
+            chunk_size=3,
+        )
+        with CaptureQueriesContext(connection) as queries:
+            chunks = list(response.streaming_content)
+        data = json.loads(b"".join(chunks))
+
+        expected = Restaurant.objects.order_by(*RESTAURANT_ORDERING)
+        self.assertEqual([row["id"] for row in data], [r.id for r in expected])
+        # [, 3 chunks of rows, ]
+        self.assertEqual(len(chunks), 5)
+        # a restaurants query and a cuisines query per chunk
+        self.assertEqual(len(queries), 6)
+
+    def test_empty_list(self):
+        Restaurant.objects.update(is_active=False)
+        self.assertEqual(self.get_streamed(reverse("get-all-restaurants")), [])
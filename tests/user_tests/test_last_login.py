@@ -0,0 +1,89 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+
+from restaurants.models import RestaurantStaff
+from users.models import CustomUser
+from utils.login_utils import last_login_buffer, record_last_login
+
+from tests.fixtures import create_test_restaurant, create_test_user
+
+
+@override_settings(LAST_LOGIN_FLUSH_INTERVAL=3600, LAST_LOGIN_BATCH_SIZE=100)
+class LastLoginBufferTest(TestCase):
+    def setUp(self):
+        last_login_buffer.clear()
+        self.addCleanup(last_login_buffer.clear)
+        self.user = create_test_user()
+        self.client = APIClient()
+
+    def login(self, url_name="login"):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                reverse(url_name),
+                {"email": self.user.email, "password": "user"},
+                format="json",
+            )
+        self.assertEqual(response.status_code, 200)
+        return [query["sql"] for query in queries]
+
+    def test_logins_are_written_by_the_flush(self):
+        history = self.user.history.count()
+        for _ in range(3):
+            queries = self.login()
+            self.assertFalse(any('UPDATE "users_customuser"' in sql for sql in queries))
+
+        self.user.refresh_from_db()
+        self.assertIsNone(self.user.last_login)
+        with CaptureQueriesContext(connection) as queries:
+            last_login_buffer.flush()
+        updates = [q["sql"] for q in queries if q["sql"].startswith("UPDATE")]
+        self.assertEqual(len(updates), 1)
+
+        self.user.refresh_from_db()
+        self.assertIsNotNone(self.user.last_login)
+        self.assertEqual(self.user.history.count(), history)
+
+    def test_an_older_login_does_not_overwrite_a_newer_one(self):
+        newer = timezone.now()
+        CustomUser.objects.filter(pk=self.user.pk).update(last_login=newer)
+        # buffered by another worker before the newer login was written
+        record_last_login(CustomUser, self.user.pk, newer - timedelta(minutes=1))
+        last_login_buffer.flush()
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.last_login, newer)
+
+    def test_staff_logins_update_every_membership(self):
+        for name in ("First", "Second"):
+            RestaurantStaff.objects.create(
+                user=self.user,
+                restaurant=create_test_restaurant(creator=self.user, name=name),
+            )
+        self.login("restaurant-staff-login")
+        last_login_buffer.flush()
+
+        last_logins = set(
+            RestaurantStaff.objects.filter(user=self.user).values_list(
+                "last_login", flat=True
+            )
+        )
+        self.assertEqual(len(last_logins), 1)
+
+    @override_settings(LAST_LOGIN_BATCH_SIZE=2)
+    def test_a_full_batch_wakes_the_flush_thread(self):
+        other = create_test_user(email="other@user.com")
+        self.login()
+        self.assertFalse(last_login_buffer.flush_requested.is_set())
+
+        self.user = other
+        queries = self.login()
+        self.assertFalse(any('UPDATE "users_customuser"' in sql for sql in queries))
+        self.assertTrue(last_login_buffer.flush_requested.is_set())
+        self.assertEqual(last_login_buffer.count, 2)
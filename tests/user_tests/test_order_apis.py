@@ -0,0 +1,138 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from restaurants.models import MenuItem
+
+from tests.fixtures import (
+    create_test_menu,
+    create_test_menu_item,
+    create_test_order,
+    create_test_restaurant,
+    create_test_user,
+)
+
+
+class OrderReadApisTest(TestCase):
+    def setUp(self):
+        self.user = create_test_user()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.restaurant = create_test_restaurant(creator=self.user)
+        menu = create_test_menu(self.restaurant)
+        self.menu_items = [
+            create_test_menu_item(menu, name=f"Item {index}") for index in range(3)
+        ]
+
+    def _create_orders(self, count):
+        return [
+            create_test_order(self.user, self.restaurant, self.menu_items)
+            for _ in range(count)
+        ]
+
+    def test_order_history_query_count_is_constant(self):
+        self._create_orders(1)
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("get-order-history"))
+        self.assertEqual(len(response.json()), 1)
+
+        self._create_orders(20)
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("get-order-history"))
+        self.assertEqual(len(response.json()), 21)
+        self.assertEqual(
+            [item["menu_item"]["name"] for item in response.json()[0]["order_items"]],
+            ["Item 0", "Item 1", "Item 2"],
+        )
+        self.assertEqual(response.json()[0]["restaurant"]["name"], "Restaurant")
+
+    def test_order_history_renders_price_snapshot(self):
+        self._create_orders(1)
+        MenuItem.objects.update(name="Renamed", price="99.00")
+        order_items = self.client.get(reverse("get-order-history")).json()[0][
+            "order_items"
+        ]
+        self.assertEqual(
+            order_items[0],
+            {
+                "menu_item": {
+                    "id": self.menu_items[0].id,
+                    "name": "Item 0",
+                    "price": "10.00",
+                },
+                "quantity": 2,
+            },
+        )
+
+    def test_order_details_query_count(self):
+        order = self._create_orders(1)[0]
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                reverse("get-order-details", args=[order.order_id])
+            )
+        self.assertEqual(len(response.json()["order_items"]), 3)
+
+    def test_order_details_of_other_user(self):
+        order = self._create_orders(1)[0]
+        self.client.force_authenticate(user=create_test_user(email="other@user.com"))
+        response = self.client.get(reverse("get-order-details", args=[order.order_id]))
+        self.assertEqual(response.status_code, 404)
+
+
+class BatchOrderItemsApiTest(TestCase):
+    def setUp(self):
+        self.user = create_test_user()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.restaurant = create_test_restaurant(creator=self.user)
+        menu = create_test_menu(self.restaurant)
+        self.rice, self.soup, self.meat = [
+            create_test_menu_item(menu, name=name, price=price)
+            for name, price in (("Rice", "100.00"), ("Soup", "50.00"), ("Meat", "20.00"))
+        ]
+        self.order = create_test_order(
+            self.user, self.restaurant, [self.rice, self.soup], paid=False
+        )
+        self.order.total_price = 300
+        self.order.save()
+
+    def _batch(self, operations, order=None):
+        return self.client.post(
+            reverse("batch-order-items"),
+            {"order": str(order or self.order.order_id), "operations": operations},
+            format="json",
+        )
+
+    def test_operations_are_applied_in_one_transaction(self):
+        # savepoint + 8 queries + release, however many operations are sent
+        with self.assertNumQueries(10):
+            response = self._batch(
+                [
+                    {"op": "add", "menu_item": self.rice.id, "quantity": 1},
+                    {"op": "remove", "menu_item": self.soup.id},
+                    {"op": "add", "menu_item": self.meat.id, "quantity": 2},
+                    {"op": "set", "menu_item": self.meat.id, "quantity": 5},
+                ]
+            )
+        self.assertEqual(response.status_code, 200)
+        cart = response.json()
+        self.assertEqual(cart["total_price"], "400.00")
+        self.assertEqual(
+            [(item["name"], item["quantity"]) for item in cart["order_items"]],
+            [("Rice", 3), ("Meat", 5)],
+        )
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.total_price, 400)
+
+    def test_menu_item_of_another_restaurant_is_rejected(self):
+        other = create_test_restaurant(creator=self.user, name="Other")
+        foreign = create_test_menu_item(create_test_menu(other))
+        response = self._batch([{"op": "add", "menu_item": foreign.id, "quantity": 1}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.order.orderitem_set.count(), 2)
+
+    def test_order_of_another_user(self):
+        self.client.force_authenticate(user=create_test_user(email="other@user.com"))
+        response = self._batch([{"op": "remove", "menu_item": self.rice.id}])
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,101 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from rest_framework.exceptions import NotFound
+
+from restaurants.models import Order, OrderItem
+from users.services import (
+    add_order_item,
+    delete_order_item,
+    place_order,
+    reduce_order_item_quantity,
+)
+
+from tests.fixtures import (
+    create_test_menu,
+    create_test_menu_item,
+    create_test_restaurant,
+    create_test_user,
+)
+
+
+class OrderTotalTest(TestCase):
+    def setUp(self):
+        self.user = create_test_user()
+        self.restaurant = create_test_restaurant(creator=self.user)
+        menu = create_test_menu(self.restaurant)
+        self.rice = create_test_menu_item(menu, name="Rice", price="1500.00")
+        self.soup = create_test_menu_item(menu, name="Soup", price="250.50")
+
+    def _total(self, order):
+        order.refresh_from_db(fields=["total_price"])
+        return order.total_price
+
+    def test_total_follows_cart_changes(self):
+        order = place_order(
+            user=self.user, restaurant=self.restaurant, menu_item=self.rice, quantity=1
+        )
+        self.assertEqual(self._total(order), Decimal("1500.00"))
+
+        soup = add_order_item(order=order, menu_item=self.soup, quantity=2)
+        add_order_item(order=order, menu_item=self.soup, quantity=1)
+        self.assertEqual(self._total(order), Decimal("2251.50"))
+
+        reduce_order_item_quantity(order_item_id=soup.id)
+        self.assertEqual(self._total(order), Decimal("2001.00"))
+
+        delete_order_item(order_item_id=soup.id)
+        self.assertEqual(self._total(order), Decimal("1500.00"))
+
+        rice = order.orderitem_set.get(menu_item=self.rice)
+        self.assertIsNone(reduce_order_item_quantity(order_item_id=rice.id))
+        self.assertEqual(self._total(order), Decimal("0.00"))
+        with self.assertRaises(NotFound):
+            reduce_order_item_quantity(order_item_id=rice.id)
+        self.assertEqual(self._total(order), Decimal("0.00"))
+
+    def test_reconcile_order_totals(self):
+        order = place_order(
+            user=self.user, restaurant=self.restaurant, menu_item=self.rice, quantity=1
+        )
+        add_order_item(order=order, menu_item=self.soup, quantity=2)
+        Order.objects.filter(order_id=order.order_id).update(total_price=0)
+
+        out = StringIO()
+        call_command("reconcile_order_totals", stdout=out)
+        self.assertIn("Found 1 drifted totals", out.getvalue())
+        self.assertEqual(self._total(order), Decimal("0.00"))
+
+        call_command("reconcile_order_totals", "--fix", "--chunk-size=1", stdout=out)
+        self.assertIn("Fixed 1, 0 changed since they were read", out.getvalue())
+        self.assertEqual(self._total(order), Decimal("2001.00"))
+
+    def test_snapshot_is_taken_when_ordering(self):
+        order = place_order(
+            user=self.user, restaurant=self.restaurant, menu_item=self.rice, quantity=1
+        )
+        self.rice.price = Decimal("2000.00")
+        self.rice.save()
+        add_order_item(order=order, menu_item=self.rice, quantity=1)
+
+        item = order.orderitem_set.get()
+        self.assertEqual((item.name, item.unit_price), ("Rice", Decimal("1500.00")))
+        self.assertEqual(self._total(order), Decimal("3000.00"))
+
+    def test_backfill_order_item_snapshots(self):
+        order = place_order(
+            user=self.user, restaurant=self.restaurant, menu_item=self.rice, quantity=1
+        )
+        OrderItem.objects.update(name="", unit_price=0)
+        # a price change after the order is not the price it was ordered at
+        self.rice.price = Decimal("2000.00")
+        self.rice.save()
+
+        call_command(
+            "backfill_order_item_snapshots", "--chunk-size=1", stdout=StringIO()
+        )
+        item = order.orderitem_set.get()
+        self.assertEqual((item.name, item.unit_price), ("Rice", Decimal("1500.00")))
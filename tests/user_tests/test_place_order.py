@@ -0,0 +1,132 @@
+import threading
+import time
+from decimal import Decimal
+
+from django.db import IntegrityError, OperationalError, connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+
+from restaurants.models import Order
+from users.services import place_order
+
+from tests.fixtures import (
+    create_test_menu,
+    create_test_menu_item,
+    create_test_restaurant,
+    create_test_user,
+)
+
+# the savepoint statements are left out
+STATEMENTS = ("INSERT", "SELECT", "UPDATE")
+
+
+class PlaceOrderTest(TestCase):
+    def setUp(self):
+        self.user = create_test_user()
+        self.restaurant = create_test_restaurant(creator=self.user)
+        self.menu_item = create_test_menu_item(
+            create_test_menu(self.restaurant), price="500.00"
+        )
+
+    def test_quantity_is_used(self):
+        order = place_order(
+            user=self.user,
+            restaurant=self.restaurant,
+            menu_item=self.menu_item,
+            quantity=3,
+        )
+        self.assertEqual(order.orderitem_set.get().quantity, 3)
+        self.assertEqual(order.total_price, Decimal("1500.00"))
+
+    def test_existing_order_gets_the_menu_item(self):
+        order = place_order(
+            user=self.user,
+            restaurant=self.restaurant,
+            menu_item=self.menu_item,
+            quantity=1,
+        )
+        existing = place_order(
+            user=self.user,
+            restaurant=self.restaurant,
+            menu_item=self.menu_item,
+            quantity=2,
+        )
+        self.assertEqual(existing.order_id, order.order_id)
+        self.assertEqual(existing.orderitem_set.get().quantity, 3)
+        self.assertEqual(existing.total_price, Decimal("1500.00"))
+
+    def test_queries(self):
+        # a new order, then the open order with its existing line
+        for expected in (
+            ["INSERT", "INSERT"],
+            ["INSERT", "SELECT", "UPDATE", "UPDATE"],
+        ):
+            with CaptureQueriesContext(connection) as queries:
+                place_order(
+                    user=self.user,
+                    restaurant=self.restaurant,
+                    menu_item=self.menu_item,
+                    quantity=1,
+                )
+            statements = [query["sql"].split()[0] for query in queries]
+            self.assertEqual([s for s in statements if s in STATEMENTS], expected)
+
+    def test_database_rejects_a_second_unpaid_order(self):
+        Order.objects.create(user=self.user, restaurant=self.restaurant)
+        Order.objects.create(user=self.user, restaurant=self.restaurant, paid=True)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Order.objects.create(user=self.user, restaurant=self.restaurant)
+
+
+class PlaceOrderConcurrencyTest(TransactionTestCase):
+    threads = 8
+
+    def setUp(self):
+        self.user = create_test_user()
+        self.restaurant = create_test_restaurant(creator=self.user)
+        self.menu_item = create_test_menu_item(create_test_menu(self.restaurant))
+
+    def _place_order(self, barrier, order_ids, errors):
+        barrier.wait()
+        try:
+            # SQLite only allows one writer at a time and reports the others as
+            # locked instead of waiting, those are retried like a client would
+            for attempt in range(50):
+                try:
+                    order = place_order(
+                        user=self.user,
+                        restaurant=self.restaurant,
+                        menu_item=self.menu_item,
+                        quantity=1,
+                    )
+                    order_ids.append(order.order_id)
+                    return
+                except OperationalError:
+                    time.sleep(0.01 * attempt)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            connection.close()
+
+    def test_concurrent_place_order_creates_one_order(self):
+        barrier = threading.Barrier(self.threads)
+        order_ids, errors = [], []
+        workers = [
+            threading.Thread(
+                target=self._place_order, args=(barrier, order_ids, errors)
+            )
+            for _ in range(self.threads)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(order_ids), self.threads)
+        self.assertEqual(len(set(order_ids)), 1)
+        self.assertEqual(
+            Order.objects.filter(user=self.user, restaurant=self.restaurant).count(), 1
+        )
+        order = Order.objects.get(order_id=order_ids[0])
+        self.assertEqual(order.orderitem_set.get().quantity, self.threads)
@@ -0,0 +1,87 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from knox.models import AuthToken
+
+from restaurants.models import RestaurantStaff
+from utils.auth_utils import token_cache
+
+from tests.fixtures import create_test_restaurant, create_test_user
+from tests.query_budget import create_token_client
+
+
+class CachedTokenAuthenticationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+        self.user = create_test_user()
+        self.client = create_token_client(self.user)
+        self.url = reverse("get-profile")
+
+    def get_with_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        return response, [query["sql"] for query in queries]
+
+    def test_verified_tokens_skip_the_token_queries(self):
+        response, cold = self.get_with_queries()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(any("knox_authtoken" in sql for sql in cold))
+
+        response, warm = self.get_with_queries()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["email"], self.user.email)
+        self.assertFalse(any("knox_authtoken" in sql for sql in warm))
+        self.assertEqual(len(cold) - len(warm), 3)
+
+    def test_logout_invalidates_the_token(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.post(reverse("logout")).status_code, 200)
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_restaurant_staff_logout_invalidates_the_token(self):
+        restaurant = create_test_restaurant(creator=self.user)
+        RestaurantStaff.objects.create(user=self.user, restaurant=restaurant)
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse("restaurant-staff-logout"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_saving_the_user_invalidates_its_tokens(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_expiry_refreshes_are_coalesced(self):
+        self.client.get(self.url)
+        (entry,) = token_cache.entries.values()
+        token = AuthToken.objects.get(user=self.user)
+
+        # past the refresh interval, only the first request writes the expiry
+        entry.refreshed_at -= 3600
+        response, queries = self.get_with_queries()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sum(sql.startswith("UPDATE") for sql in queries), 1)
+        token.refresh_from_db()
+        self.assertEqual(token.expiry, entry.auth_token.expiry)
+
+        entry.refreshed_at -= 3600
+        response, queries = self.get_with_queries()
+        self.assertFalse(any(sql.startswith("UPDATE") for sql in queries))
+
+    @override_settings(AUTH_TOKEN_CACHE_MAX_ENTRIES=1)
+    def test_the_least_recently_used_tokens_are_dropped(self):
+        other_client = create_token_client(create_test_user(email="other@user.com"))
+        self.client.get(self.url)
+        other_client.get(self.url)
+
+        self.assertEqual(len(token_cache.entries), 1)
+        (entry,) = token_cache.entries.values()
+        self.assertEqual(entry.user.email, "other@user.com")
@@ -1,6 +1,16 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save
 
 
 class UsersConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "users"
+
+    def ready(self):
+        from knox.models import AuthToken
+
+        from users.models import CustomUser
+        from users.signals import invalidate_deleted_token, invalidate_user_tokens
+
+        post_delete.connect(invalidate_deleted_token, sender=AuthToken)
+        post_save.connect(invalidate_user_tokens, sender=CustomUser)
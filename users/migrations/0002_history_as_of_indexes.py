@@ -0,0 +1,17 @@
+# Generated by Django 4.0.4 on 2026-10-18 13:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='historicalcustomuser',
+            index=models.Index(fields=['id', 'history_date'], name='customuser_hist_as_of_idx'),
+        ),
+    ]
@@ -1,7 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
 
-from simple_history.models import HistoricalRecords
+from utils.history_utils import DeferredHistoricalRecords
 
 from users.managers import CustomUserManager
 
@@ -18,7 +18,7 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     is_admin = models.BooleanField(default=False)
     is_superuser = models.BooleanField(default=False)
     date_joined = models.DateTimeField(auto_now_add=True)
-    history = HistoricalRecords()
+    history = DeferredHistoricalRecords()
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["username", "first_name", "last_name", "phone_number"]
@@ -18,12 +18,20 @@ from users.selectors import get_existing_user_restaurant_order, get_user_order
 from users.services import (
     add_order_address,
     add_order_item,
+    apply_order_item_operations,
     delete_order_item,
     edit_order_address,
     place_order,
     reduce_order_item_quantity,
 )
-from utils.serializer_utils import inline_serializer
+from utils.pagination_utils import (
+    ID_ORDERING,
+    ORDER_ORDERING,
+    is_stream_requested,
+    paginate_and_serialize,
+    stream_and_serialize,
+)
+from utils.serializer_utils import depends_on, inline_serializer
 
 
 class PlaceOrderApi(APIView):
@@ -51,6 +59,7 @@ class PlaceOrderApi(APIView):
 
 class GetOrderBasedOnStatus(APIView):
     permission_classes = [IsAuthenticated]
+    query_budget = 1
 
     class OutputSerializer(serializers.Serializer):
         order_id = serializers.CharField()
@@ -62,12 +71,15 @@ class GetOrderBasedOnStatus(APIView):
         pending_orders = get_all_orders_based_on_status(
             user=request.user, status=order_status
         )
-        data = self.OutputSerializer(pending_orders, many=True)
-        return Response(status=status.HTTP_200_OK, data=data.data)
+        data = paginate_and_serialize(
+            pending_orders, request, self.OutputSerializer, ORDER_ORDERING
+        )
+        return Response(status=status.HTTP_200_OK, data=data)
 
 
 class GetOrderHistoryApi(APIView):
     permission_classes = [IsAuthenticated]
+    query_budget = 2
 
     class OutputSerializer(serializers.Serializer):
         order_id = serializers.CharField()
@@ -78,31 +90,47 @@ class GetOrderHistoryApi(APIView):
         status = serializers.CharField()
         date_created = serializers.DateTimeField()
         order_items = serializers.SerializerMethodField()
-        order_items = serializers.SerializerMethodField()
 
+        @depends_on(
+            "orderitem_set__menu_item_id",
+            "orderitem_set__name",
+            "orderitem_set__unit_price",
+            "orderitem_set__quantity",
+        )
         def get_order_items(self, obj):
-            order_items = get_all_order_items(order_id=obj.order_id)
-            data = self.OrderItemSerializer(order_items, many=True)
+            # order items are prefetched by get_orders_with_items
+            data = self.OrderItemSerializer(obj.orderitem_set.all(), many=True)
             return data.data
 
         class OrderItemSerializer(serializers.Serializer):
+            # rendered from the snapshot taken when the item was ordered
             menu_item = inline_serializer(
+                source="*",
                 fields={
-                    "id": serializers.IntegerField(),
+                    "id": serializers.IntegerField(source="menu_item_id"),
                     "name": serializers.CharField(),
-                    "image": serializers.ImageField(),
-                    "price": serializers.DecimalField(max_digits=10, decimal_places=2),
-                }
+                    "price": serializers.DecimalField(
+                        source="unit_price", max_digits=10, decimal_places=2
+                    ),
+                },
             )
             quantity = serializers.IntegerField()
 
     def get(self, request):
         order_history = get_user_order_history(user=request.user)
-        data = self.OutputSerializer(order_history, many=True)
-        return Response(status=status.HTTP_200_OK, data=data.data)
+        if is_stream_requested(request):
+            return stream_and_serialize(
+                order_history, self.OutputSerializer, ORDER_ORDERING
+            )
+        data = paginate_and_serialize(
+            order_history, request, self.OutputSerializer, ORDER_ORDERING
+        )
+        return Response(status=status.HTTP_200_OK, data=data)
 
 
 class GetExistingUserRestaurantOrderApi(APIView):
+    query_budget = 1
+
     def get(self, request, restaurant_id):
         order, exists = get_existing_user_restaurant_order(
             user=request.user, restaurant_id=restaurant_id
@@ -120,6 +148,7 @@ class GetExistingUserRestaurantOrderApi(APIView):
 # NOTE: Needs further review
 class GetOrderDetailsApi(APIView):
     permission_classes = [IsAuthenticated]
+    query_budget = 2
 
     class OutputSerializer(serializers.Serializer):
         order_id = serializers.CharField()
@@ -142,9 +171,16 @@ class GetOrderDetailsApi(APIView):
             )
             quantity = serializers.IntegerField()
 
+        @depends_on(
+            "orderitem_set__menu_item__id",
+            "orderitem_set__menu_item__name",
+            "orderitem_set__menu_item__image",
+            "orderitem_set__menu_item__price",
+            "orderitem_set__quantity",
+        )
         def get_order_items(self, obj):
-            order_items = get_all_order_items(order_id=obj.order_id)
-            data = self.OrderItemSerializer(order_items, many=True)
+            # order items are prefetched by get_orders_with_items
+            data = self.OrderItemSerializer(obj.orderitem_set.all(), many=True)
             return data.data
 
     def get(self, request, order_id):
@@ -182,6 +218,7 @@ class AddOrderAddressApi(APIView):
 
 class GetSavedUserOrderAddressApi(APIView):
     permission_classes = [IsAuthenticated]
+    query_budget = 1
 
     class OutputSerializer(serializers.Serializer):
         id = serializers.IntegerField()
@@ -192,8 +229,10 @@ class GetSavedUserOrderAddressApi(APIView):
 
     def get(self, request):
         addresses = get_saved_user_addresses(user=request.user)
-        data = self.OutputSerializer(addresses, many=True)
-        return Response(status=status.HTTP_200_OK, data=data.data)
+        data = paginate_and_serialize(
+            addresses, request, self.OutputSerializer, ID_ORDERING
+        )
+        return Response(status=status.HTTP_200_OK, data=data)
 
 
 class EditOrderAddressApi(APIView):
@@ -241,8 +280,57 @@ class AddOrderItemApi(APIView):
         return Response(status=status.HTTP_400_BAD_REQUEST, data=data.errors)
 
 
+class BatchOrderItemsApi(APIView):
+    permission_classes = [IsAuthenticated]
+
+    class InputSerializer(serializers.Serializer):
+        order = serializers.UUIDField()
+        operations = inline_serializer(
+            many=True,
+            allow_empty=False,
+            fields={
+                "op": serializers.ChoiceField(choices=["add", "set", "remove"]),
+                "menu_item": serializers.IntegerField(),
+                "quantity": serializers.IntegerField(min_value=0, default=1),
+            },
+        )
+
+    class OutputSerializer(serializers.Serializer):
+        order_id = serializers.CharField()
+        total_price = serializers.DecimalField(max_digits=10, decimal_places=2)
+        order_items = inline_serializer(
+            many=True,
+            fields={
+                "id": serializers.IntegerField(),
+                "menu_item": serializers.IntegerField(source="menu_item_id"),
+                "name": serializers.CharField(),
+                "unit_price": serializers.DecimalField(max_digits=10, decimal_places=2),
+                "quantity": serializers.IntegerField(),
+            },
+        )
+
+    def post(self, request):
+        data = self.InputSerializer(data=request.data)
+        if data.is_valid(raise_exception=True):
+            order, order_items = apply_order_item_operations(
+                user=request.user,
+                order_id=data.validated_data["order"],
+                operations=data.validated_data["operations"],
+            )
+            cart = self.OutputSerializer(
+                {
+                    "order_id": order.order_id,
+                    "total_price": order.total_price,
+                    "order_items": order_items,
+                }
+            )
+            return Response(status=status.HTTP_200_OK, data=cart.data)
+        return Response(status=status.HTTP_400_BAD_REQUEST, data=data.errors)
+
+
 class GetAllOrderItemsApi(APIView):
     permission_classes = [IsAuthenticated]
+    query_budget = 2
 
     class OutputSerializer(serializers.Serializer):
         order_id = serializers.CharField()
@@ -258,8 +346,10 @@ class GetAllOrderItemsApi(APIView):
 
     def get(self, request, order_id):
         order_items = get_all_order_items(order_id=order_id)
-        data = self.OutputSerializer(order_items, many=True)
-        return Response(status=status.HTTP_200_OK, data=data.data)
+        data = paginate_and_serialize(
+            order_items, request, self.OutputSerializer, ID_ORDERING
+        )
+        return Response(status=status.HTTP_200_OK, data=data)
 
 
 class ReduceOrderItemQuantityApi(APIView):
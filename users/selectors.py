@@ -2,6 +2,7 @@ from typing import Tuple, Optional
 
 from users.models import CustomUser
 from restaurants.models import Order
+from restaurants.selectors import get_orders_with_items
 from utils.model_utils import get_object_or_rest_404
 
 
@@ -26,7 +27,7 @@ def get_existing_user_restaurant_order(
 
 
 def get_user_order(user: CustomUser, order_id: str) -> Order:
-    """This function returns the order object
+    """This function returns the order object with its restaurant and order items loaded
 
     Args:
         user (CustomUser): The user object.
@@ -38,4 +39,5 @@ def get_user_order(user: CustomUser, order_id: str) -> Order:
     Raises:
         Order.DoesNotExist: If the order does not exist.
     """
-    return get_object_or_rest_404(Order, order_id=order_id, user=user)
+    orders = get_orders_with_items(Order.objects.filter(user=user))
+    return get_object_or_rest_404(orders, order_id=order_id)
@@ -1,5 +1,8 @@
-from django.db import transaction
-from django.shortcuts import get_object_or_404
+from decimal import Decimal
+from typing import Tuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, OuterRef, Subquery
 from django.utils import timezone
 from django.core import exceptions as django_exceptions
 
@@ -8,9 +11,11 @@ from restaurants.models import MenuItem, Order, OrderAddress, OrderItem, Restaur
 
 from users.models import CustomUser
 from utils.generators import generate_default_username
+from utils.history_utils import batched_history
+from utils.login_utils import record_last_login
 
 
-@transaction.atomic
+@batched_history()
 def create_user(data: dict) -> CustomUser:
     """This function creates a user.
 
@@ -36,7 +41,7 @@ def create_user(data: dict) -> CustomUser:
         return user
 
 
-@transaction.atomic
+@batched_history()
 def setup_user_account(user_id: int, data: dict) -> CustomUser:
     """This function sets up a user's account.
 
@@ -68,7 +73,7 @@ def setup_user_account(user_id: int, data: dict) -> CustomUser:
         return user
 
 
-@transaction.atomic
+@batched_history()
 def edit_user_account(user: CustomUser, data: dict) -> CustomUser:
     """This function edits a user's account details (first name, last name and phone number).
 
@@ -93,24 +98,61 @@ def edit_user_account(user: CustomUser, data: dict) -> CustomUser:
         return user
 
 
-@transaction.atomic
-def login_user(user: CustomUser) -> None:
-    try:
-        user.last_login = timezone.now()
-        user.full_clean()
-        user.save()
-    except django_exceptions.ValidationError as e:
-        raise rest_exceptions.ValidationError(e)
+def login_user(user: CustomUser) -> CustomUser:
+    """This function records a user's login. The last_login is set on the user and
+    written to the database later by the last login buffer, without a full save.
 
-    else:
-        return user
+    Args:
+        user (CustomUser): The user
+
+    Returns:
+        CustomUser: The user with the last_login updated
+    """
+    user.last_login = timezone.now()
+    record_last_login(CustomUser, user.pk, user.last_login)
+    return user
+
+
+def _lock_order(**filters) -> bool:
+    """This function locks the order matching the filters until the end of the
+    transaction. Every cart edit takes the lock before reading the order items, so
+    concurrent edits of the same cart run one after the other.
+
+    Returns:
+        bool: Whether the order exists
+    """
+    return bool(
+        Order.objects.select_for_update(of=("self",))
+        .filter(**filters)
+        .values_list("order_id", flat=True)
+    )
+
+
+def _adjust_order_total(order_id: str, amount: Decimal) -> None:
+    """This function adds amount to the order total in the database, so concurrent
+    cart edits never overwrite each other's changes.
+
+    Args:
+        order_id (str): The order id
+        amount (Decimal): The amount to add, negative to subtract
+    """
+    Order.objects.filter(order_id=order_id).update(
+        total_price=F("total_price") + amount
+    )
 
 
 @transaction.atomic
 def place_order(
     user: CustomUser, restaurant: Restaurant, menu_item: MenuItem, quantity: int
 ) -> Order:
-    """This function places an order
+    """This function places an order, or adds the menu item to the user's open order
+    for the restaurant.
+
+    The order is inserted first and the unique_unpaid_order_per_restaurant
+    constraint rejects it when the user already has an open order for the
+    restaurant, so concurrent calls end up with the same order instead of
+    duplicates. The open order is then locked and read with the price of its line
+    for the menu item, and the line and the total are updated in place.
 
     Args:
         user (CustomUser): The user object
@@ -119,34 +161,69 @@ def place_order(
         quantity (int): The quantity of the menu item
 
     Raises:
-        rest_exceptions.ValidationError: When the order or order item is invalid
+        rest_exceptions.ValidationError: When the quantity is less than 1
 
     Returns:
-        Order: The created order object
+        Order: The created or updated order object
     """
-    if Order.objects.filter(user=user, restaurant=restaurant, paid=False).exists():
-        return Order.objects.get(user=user, restaurant=restaurant, paid=False)
+    if quantity < 1:
+        raise rest_exceptions.ValidationError("Quantity must be at least 1")
 
-    else:
-        try:
-            order = Order(user=user, restaurant=restaurant)
-            order.full_clean()
-            order.save()
-        except django_exceptions.ValidationError as e:
-            raise rest_exceptions.ValidationError(e)
+    try:
+        with transaction.atomic():
+            order = Order.objects.create(
+                user=user,
+                restaurant=restaurant,
+                total_price=menu_item.price * quantity,
+            )
+    except IntegrityError:
+        # the user already has an open order for the restaurant, any other integrity
+        # error is not ours to handle
+        line_unit_price = OrderItem.objects.filter(
+            order_id=OuterRef("order_id"), menu_item=menu_item
+        ).values("unit_price")[:1]
+        order = (
+            Order.objects.select_for_update(of=("self",))
+            .filter(user=user, restaurant=restaurant, paid=False)
+            .annotate(line_unit_price=Subquery(line_unit_price))
+            .first()
+        )
+        if order is None:
+            raise
 
-        try:
-            order_item = OrderItem(order=order, menu_item=menu_item)
-            order_item.full_clean()
-            order_item.save()
-        except django_exceptions.ValidationError as e:
-            raise rest_exceptions.ValidationError(e)
+    else:
+        OrderItem.objects.create(
+            order=order,
+            menu_item=menu_item,
+            quantity=quantity,
+            name=menu_item.name,
+            unit_price=menu_item.price,
+        )
+        return order
+
+    if order.line_unit_price is None:
+        OrderItem.objects.create(
+            order=order,
+            menu_item=menu_item,
+            quantity=quantity,
+            name=menu_item.name,
+            unit_price=menu_item.price,
+        )
+        amount = menu_item.price * quantity
+    else:
+        OrderItem.objects.filter(order=order, menu_item=menu_item).update(
+            quantity=F("quantity") + quantity
+        )
+        # an existing line keeps the price it was first ordered at
+        amount = order.line_unit_price * quantity
 
-        else:
-            return order
+    # the order is locked, so the total read with it is still current
+    _adjust_order_total(order.order_id, amount)
+    order.total_price += amount
+    return order
 
 
-@transaction.atomic
+@batched_history()
 def add_order_address(user: CustomUser, data: dict) -> OrderAddress:
     """This function adds the address to an order
 
@@ -169,7 +246,7 @@ def add_order_address(user: CustomUser, data: dict) -> OrderAddress:
         return obj
 
 
-@transaction.atomic
+@batched_history()
 def edit_order_address(user: CustomUser, data: dict, address_id: int):
     """This function edits the address of an order
 
@@ -210,24 +287,28 @@ def add_order_item(order: Order, menu_item: MenuItem, quantity: int) -> OrderIte
     Returns:
         OrderItem: The created order item object
     """
-
-    if OrderItem.objects.filter(order=order, menu_item=menu_item).exists():
-        try:
-            obj = OrderItem.objects.get(order=order, menu_item=menu_item)
-            obj.quantity += quantity
-            obj.full_clean()
-            obj.save()
-        except django_exceptions.ValidationError as e:
-            raise rest_exceptions.ValidationError(e)
+    _lock_order(order_id=order.order_id)
+    obj = OrderItem.objects.filter(order=order, menu_item=menu_item).first()
+    if obj is not None:
+        obj.quantity += quantity
+        obj.save(update_fields=["quantity"])
 
     else:
         try:
-            obj = OrderItem(order=order, menu_item=menu_item, quantity=quantity)
+            obj = OrderItem(
+                order=order,
+                menu_item=menu_item,
+                quantity=quantity,
+                name=menu_item.name,
+                unit_price=menu_item.price,
+            )
             obj.full_clean()
             obj.save()
         except django_exceptions.ValidationError as e:
             raise rest_exceptions.ValidationError(e)
 
+    # an existing line keeps the price it was first ordered at
+    _adjust_order_total(order.order_id, obj.unit_price * quantity)
     return obj
 
 
@@ -238,19 +319,22 @@ def reduce_order_item_quantity(order_item_id: int) -> None:
     Args:
         order_item_id (int): The order item id
 
+    Raises:
+        rest_exceptions.NotFound: If the order item does not exist
+
     Returns:
         None: If the order item is deleted
         OrderItem: if the order item quantity is reduced
     """
-    obj = get_object_or_404(OrderItem, id=order_item_id)
+    if not _lock_order(orderitem__id=order_item_id):
+        raise rest_exceptions.NotFound("Order item does not exist")
+
+    obj = OrderItem.objects.get(id=order_item_id)
+    _adjust_order_total(obj.order_id, -obj.unit_price)
     if obj.quantity > 1:
-        try:
-            obj.quantity -= 1
-            obj.full_clean()
-            obj.save()
-            return obj
-        except django_exceptions.ValidationError as e:
-            raise rest_exceptions.ValidationError(e)
+        obj.quantity -= 1
+        obj.save(update_fields=["quantity"])
+        return obj
     else:
         obj.delete()
         return None
@@ -263,14 +347,123 @@ def delete_order_item(order_item_id: int) -> None:
     Args:
         order_item_id (int): The order item id
 
+    Raises:
+        rest_exceptions.NotFound: If the order item does not exist
+
     Returns:
         None: If the order item is deleted
     """
-    try:
-        obj = OrderItem.objects.get(id=order_item_id)
-    except OrderItem.DoesNotExist:
+    if not _lock_order(orderitem__id=order_item_id):
         raise rest_exceptions.NotFound("Order item does not exist")
 
-    else:
-        obj.delete()
-        return None
+    obj = OrderItem.objects.get(id=order_item_id)
+    obj.delete()
+    _adjust_order_total(obj.order_id, -obj.unit_price * obj.quantity)
+    return None
+
+
+@transaction.atomic
+def apply_order_item_operations(
+    user: CustomUser, order_id: str, operations: list
+) -> Tuple[Order, list]:
+    """This function applies many cart operations to an order in one transaction.
+
+    The order is locked and its items are loaded once, the operations are applied in
+    memory, then the changes are written with one bulk create, one bulk update and
+    one delete, and the order total is adjusted once.
+
+    Args:
+        user (CustomUser): The user object
+        order_id (str): The order id
+        operations (list): Dicts of {"op": "add" | "set" | "remove", "menu_item": id,
+            "quantity": int}. "add" increases the quantity, "set" replaces it
+            (0 removes the item) and "remove" deletes the item.
+
+    Raises:
+        rest_exceptions.NotFound: If the user has no open order with this id
+        rest_exceptions.ValidationError: If a menu item is not on the restaurant's menu
+
+    Returns:
+        Tuple[Order, list]: The order and its order items after the operations
+    """
+    try:
+        order = Order.objects.select_for_update(of=("self",)).get(
+            order_id=order_id, user=user, paid=False
+        )
+    except (Order.DoesNotExist, django_exceptions.ValidationError):
+        raise rest_exceptions.NotFound("Order does not exist")
+
+    # the order lock keeps the other cart edits out, see _lock_order()
+    items = {obj.menu_item_id: obj for obj in OrderItem.objects.filter(order=order)}
+
+    # only menu items that are not in the cart yet need to be loaded and validated
+    new_menu_item_ids = {
+        operation["menu_item"]
+        for operation in operations
+        if operation["menu_item"] not in items and operation["op"] != "remove"
+    }
+    menu_items = {}
+    if new_menu_item_ids:
+        menu_items = {
+            obj.id: obj
+            for obj in MenuItem.objects.filter(
+                id__in=new_menu_item_ids,
+                menu__restaurant_id=order.restaurant_id,
+                is_active=True,
+            ).only("id", "name", "price")
+        }
+    missing = new_menu_item_ids - menu_items.keys()
+    if missing:
+        raise rest_exceptions.ValidationError(
+            f"Menu items {sorted(missing)} are not on this restaurant's menu"
+        )
+
+    quantities = {menu_item_id: obj.quantity for menu_item_id, obj in items.items()}
+    for operation in operations:
+        menu_item_id = operation["menu_item"]
+        if operation["op"] == "add":
+            quantities[menu_item_id] = (
+                quantities.get(menu_item_id, 0) + operation["quantity"]
+            )
+        elif operation["op"] == "set":
+            quantities[menu_item_id] = operation["quantity"]
+        else:
+            quantities[menu_item_id] = 0
+
+    to_create, to_update, to_delete = [], [], []
+    total_change = Decimal("0")
+    for menu_item_id, quantity in quantities.items():
+        obj = items.get(menu_item_id)
+        if obj is None:
+            if quantity > 0:
+                menu_item = menu_items[menu_item_id]
+                obj = OrderItem(
+                    order=order,
+                    menu_item=menu_item,
+                    quantity=quantity,
+                    name=menu_item.name,
+                    unit_price=menu_item.price,
+                )
+                to_create.append(obj)
+                total_change += obj.unit_price * quantity
+        elif quantity <= 0:
+            to_delete.append(obj.id)
+            total_change -= obj.unit_price * obj.quantity
+        elif quantity != obj.quantity:
+            total_change += obj.unit_price * (quantity - obj.quantity)
+            obj.quantity = quantity
+            to_update.append(obj)
+
+    if to_create:
+        OrderItem.objects.bulk_create(to_create)
+    if to_update:
+        OrderItem.objects.bulk_update(to_update, ["quantity"])
+    if to_delete:
+        OrderItem.objects.filter(id__in=to_delete).delete()
+    if total_change:
+        _adjust_order_total(order.order_id, total_change)
+        order.refresh_from_db(fields=["total_price"])
+
+    deleted = set(to_delete)
+    order_items = [obj for obj in items.values() if obj.id not in deleted] + to_create
+    return order, sorted(order_items, key=lambda obj: obj.id)
@@ -0,0 +1,18 @@
+from knox.models import AuthToken
+
+from utils.auth_utils import invalidate_cached_tokens
+
+
+def invalidate_deleted_token(sender, instance: AuthToken, **kwargs) -> None:
+    """Drops a deleted token (e.g. on logout) from the token cache."""
+    invalidate_cached_tokens([instance.token_key])
+
+
+def invalidate_user_tokens(sender, instance, created: bool, **kwargs) -> None:
+    """Drops the tokens of a saved user from the token cache, so the requests see
+    the changes (e.g. `is_active`)."""
+    if created:
+        return
+    invalidate_cached_tokens(
+        AuthToken.objects.filter(user=instance).values_list("token_key", flat=True)
+    )
@@ -12,6 +12,7 @@ from users.apis import (
 from users.order_apis import (
     AddOrderAddressApi,
     AddOrderItemApi,
+    BatchOrderItemsApi,
     DeleteOrderItem,
     EditOrderAddressApi,
     GetAllOrderItemsApi,
@@ -23,6 +24,7 @@ from users.order_apis import (
     PlaceOrderApi,
     ReduceOrderItemQuantityApi,
 )
+from utils.async_utils import async_api_view
 
 urlpatterns = [
     path("account/token/", ConfirmTokenApi.as_view(), name="confirm-token"),
@@ -59,6 +61,11 @@ urlpatterns = [
     ),
     path("order/details/<str:order_id>/", GetOrderDetailsApi.as_view(), name="get-order-details"),
     path("order/history/", GetOrderHistoryApi.as_view(), name="get-order-history"),
+    path(
+        "async/order/details/<str:order_id>/",
+        async_api_view(GetOrderDetailsApi),
+        name="async-get-order-details",
+    ),
     ####
     ####
     path("order/address/add/", AddOrderAddressApi.as_view(), name="add-order-address"),
@@ -75,6 +82,9 @@ urlpatterns = [
     ####
     ####
     path("order/item/add/", AddOrderItemApi.as_view(), name="add-order-item"),
+    path(
+        "order/item/batch/", BatchOrderItemsApi.as_view(), name="batch-order-items"
+    ),
     path(
         "order/item/get/all/<str:order_id>/",
         GetAllOrderItemsApi.as_view(),
@@ -0,0 +1,167 @@
+import binascii
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from knox.auth import TokenAuthentication
+from knox.crypto import hash_token
+from knox.models import AuthToken
+from knox.settings import CONSTANTS, knox_settings
+
+from core.query_stats import outside_query_budget
+
+TOKEN_VERSION_KEY = "auth:token:{}:version"
+TOKEN_REFRESH_KEY = "auth:token:{}:refresh"
+
+
+class _Entry:
+    __slots__ = ("user", "auth_token", "version", "cached_at", "refreshed_at")
+
+    def __init__(self, user, auth_token, version, refreshed_at):
+        self.user = user
+        self.auth_token = auth_token
+        self.version = version
+        self.cached_at = time.monotonic()
+        self.refreshed_at = refreshed_at
+
+
+class TokenCache:
+    """The tokens verified by this process, by digest, with their user. Holds at
+    most `settings.AUTH_TOKEN_CACHE_MAX_ENTRIES` tokens (the least recently used
+    are dropped) for at most `settings.AUTH_TOKEN_CACHE_TIMEOUT` seconds."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+    def get(self, digest: str) -> Optional[_Entry]:
+        with self.lock:
+            entry = self.entries.get(digest)
+            if entry is None:
+                return None
+            age = time.monotonic() - entry.cached_at
+            if age >= settings.AUTH_TOKEN_CACHE_TIMEOUT:
+                del self.entries[digest]
+                return None
+            self.entries.move_to_end(digest)
+            return entry
+
+    def set(self, digest: str, entry: _Entry) -> None:
+        with self.lock:
+            self.entries[digest] = entry
+            self.entries.move_to_end(digest)
+            while len(self.entries) > settings.AUTH_TOKEN_CACHE_MAX_ENTRIES:
+                self.entries.popitem(last=False)
+
+    def discard(self, digest: str) -> None:
+        with self.lock:
+            self.entries.pop(digest, None)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+
+token_cache = TokenCache()
+
+
+def _get_token_version(token_key: str) -> str:
+    # like the catalog versions, a version that was deleted or evicted comes back
+    # as a new random value, so deleting it invalidates the cached tokens
+    key = TOKEN_VERSION_KEY.format(token_key)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid4().hex, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_cached_tokens(token_keys: Iterable[str]) -> None:
+    """This function drops the tokens from the token cache of every process (that
+    shares the Django cache) once the current transaction commits.
+
+    Args:
+        token_keys (Iterable[str]): The `token_key` of the tokens
+    """
+    keys = [TOKEN_VERSION_KEY.format(token_key) for token_key in token_keys]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """knox's `TokenAuthentication`, skipping the token and user queries and the
+    expiry refresh for the tokens it verified recently.
+
+    Verified tokens are kept in a process local `TokenCache`, checked against a
+    version kept in the Django cache for their `token_key`. Deleting a token
+    (logging out) or saving its user deletes the version, see users.signals, so
+    the token is verified by knox again. The Django cache must be shared by the
+    workers (it is in production, see settings_prod.CACHES) for this to be
+    immediate in every process.
+
+    The queries of a token that is not cached yet are left out of the view's
+    query_budget, the budgets are for the views' own queries.
+
+    With `AUTO_REFRESH`, a token's expiry is written at most once per
+    `MIN_REFRESH_INTERVAL`, whichever process and thread serves it.
+    """
+
+    def authenticate_credentials(self, token):
+        try:
+            digest = hash_token(token.decode("utf-8"))
+        except (TypeError, UnicodeDecodeError, binascii.Error):
+            return super().authenticate_credentials(token)
+
+        token_key = token[: CONSTANTS.TOKEN_KEY_LENGTH].decode("utf-8")
+        version = _get_token_version(token_key)
+        entry = token_cache.get(digest)
+        if entry is not None and entry.version == version:
+            expiry = entry.auth_token.expiry
+            if expiry is None or expiry > timezone.now():
+                if knox_settings.AUTO_REFRESH and expiry:
+                    self._refresh(digest, entry)
+                return self._copy(entry.user, entry.auth_token)
+        token_cache.discard(digest)
+
+        # the version was read first, a logout committed after it invalidates
+        # the entry even if knox still found the token
+        with outside_query_budget():
+            user, auth_token = super().authenticate_credentials(token)
+        cached_user, cached_token = self._copy(user, auth_token)
+        token_cache.set(
+            digest,
+            _Entry(
+                user=cached_user,
+                auth_token=cached_token,
+                version=version,
+                refreshed_at=time.monotonic(),
+            ),
+        )
+        return user, auth_token
+
+    def _copy(self, user, auth_token) -> tuple:
+        # requests never share the cached objects
+        user = copy.copy(user)
+        auth_token = copy.copy(auth_token)
+        auth_token.user = user
+        return user, auth_token
+
+    def _refresh(self, digest: str, entry: _Entry) -> None:
+        interval = knox_settings.MIN_REFRESH_INTERVAL
+        if time.monotonic() - entry.refreshed_at <= interval:
+            return
+        entry.refreshed_at = time.monotonic()
+        expiry = timezone.now() + knox_settings.TOKEN_TTL
+        # only the process that adds the key writes the new expiry
+        if cache.add(TOKEN_REFRESH_KEY.format(digest), 1, timeout=interval):
+            with outside_query_budget():
+                AuthToken.objects.filter(digest=digest).update(expiry=expiry)
+        entry.auth_token.expiry = expiry
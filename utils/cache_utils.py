@@ -0,0 +1,144 @@
+import hashlib
+import threading
+from contextvars import ContextVar
+from typing import Any, Callable, Optional
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+CATALOG_VERSION_KEY = "catalog:version"
+RESTAURANT_VERSION_KEY = "catalog:restaurant:{}:version"
+
+# backends that keep their entries in the memory of each process
+PROCESS_LOCAL_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+# the counters of the request being served, see track_catalog_cache_stats()
+_request_stats = ContextVar("catalog_cache_request_stats", default=None)
+
+
+def _get_version(key: str) -> str:
+    # Versions are random tokens instead of counters, so a version key that got
+    # evicted can never come back with a value that matches old payload keys.
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid4().hex, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def is_cache_shared() -> bool:
+    """This function tells whether the default cache is shared by the processes
+    serving the requests. Invalidating an entry of a process local cache only
+    reaches the process that did it.
+
+    Returns:
+        bool: False for the local memory and dummy caches
+    """
+    return settings.CACHES["default"]["BACKEND"] not in PROCESS_LOCAL_BACKENDS
+
+
+def _record(hit: bool) -> None:
+    name = "hits" if hit else "misses"
+    with _stats_lock:
+        _stats[name] += 1
+    request_stats = _request_stats.get()
+    if request_stats is not None:
+        request_stats[name] += 1
+
+
+def get_catalog_cache_stats() -> dict:
+    """This function returns the hit/miss counters of the catalog cache
+
+    Returns:
+        dict: {"hits": int, "misses": int} for the current process
+    """
+    with _stats_lock:
+        return dict(_stats)
+
+
+def track_catalog_cache_stats() -> dict:
+    """This function starts counting the catalog cache lookups of the current
+    context, e.g. the request being served. The counters are kept in a context
+    variable, so they follow the request into the threads that sync_to_async runs
+    its code in.
+
+    Returns:
+        dict: {"hits": int, "misses": int}, updated by the lookups that follow
+    """
+    request_stats = {"hits": 0, "misses": 0}
+    _request_stats.set(request_stats)
+    return request_stats
+
+
+def reset_catalog_cache_stats() -> None:
+    """This function resets the hit/miss counters of the catalog cache"""
+    with _stats_lock:
+        _stats["hits"] = 0
+        _stats["misses"] = 0
+
+
+def get_or_set_catalog_payload(
+    name: str,
+    builder: Callable[[], Any],
+    restaurant_id: Optional[int] = None,
+    **params,
+) -> Any:
+    """This function returns a cached catalog payload, building it on a miss.
+
+    Payloads scoped to a restaurant are keyed by that restaurant's version,
+    every other payload is keyed by the global catalog version.
+
+    Args:
+        name (str): The name of the payload e.g "restaurants:all"
+        builder (Callable): Builds the serialized payload on a cache miss
+        restaurant_id (int, optional): The restaurant the payload belongs to
+        params: Extra values the payload depends on e.g the cuisine name
+
+    Returns:
+        Any: The serialized payload
+    """
+    if restaurant_id is None:
+        version = _get_version(CATALOG_VERSION_KEY)
+    else:
+        version = _get_version(RESTAURANT_VERSION_KEY.format(restaurant_id))
+
+    # the params come from the url (e.g. a cuisine name with spaces), hashing them
+    # keeps the key short and valid for every cache backend
+    suffix = "&".join(f"{key}={params[key]}" for key in sorted(params))
+    digest = hashlib.sha1(suffix.encode("utf-8")).hexdigest()
+    key = f"catalog:{name}:{restaurant_id}:{version}:{digest}"
+
+    payload = cache.get(key)
+    if payload is not None:
+        _record(hit=True)
+        return payload
+
+    _record(hit=False)
+    payload = builder()
+    cache.set(key, payload, timeout=settings.CATALOG_CACHE_TIMEOUT)
+    return payload
+
+
+def bump_catalog_version(restaurant_id: Optional[int] = None) -> None:
+    """This function invalidates cached catalog payloads once the current transaction
+    commits. It is called by the receivers in restaurants.signals whenever a
+    restaurant, cuisine, menu or menu item is saved or deleted, from the services
+    or from the admin.
+
+    Args:
+        restaurant_id (int, optional): Only invalidate the payloads of this restaurant.
+            If not given, the global catalog version (the listings) is bumped.
+    """
+    if restaurant_id is None:
+        key = CATALOG_VERSION_KEY
+    else:
+        key = RESTAURANT_VERSION_KEY.format(restaurant_id)
+
+    transaction.on_commit(lambda: cache.set(key, uuid4().hex, timeout=None))
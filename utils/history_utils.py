@@ -0,0 +1,323 @@
+import datetime
+from contextlib import contextmanager
+from typing import Optional
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, models, router, transaction
+from django.db.models import OuterRef, Q, Subquery
+from django.utils import timezone
+
+from simple_history.models import HistoricalRecords
+from simple_history.signals import (
+    post_create_historical_record,
+    pre_create_historical_record,
+)
+
+
+class _QueuedRecord:
+    """A history row waiting for its batch to be written."""
+
+    def __init__(self, history_instance, instance, using):
+        self.history_instance = history_instance
+        self.instance = instance
+        self.using = using
+
+
+class _Batch:
+    """The history rows queued by the changes saved in a batched_history() block.
+
+    It is also an execute wrapper of the connection for the block, which sees the
+    savepoint rollbacks and drops the rows queued in the rolled back savepoints.
+    """
+
+    def __init__(self, alias: str):
+        self.alias = alias
+        self.connection = transaction.get_connection(alias)
+        # (ids of the savepoints open when the row was queued, record)
+        self.records = []
+        self.rollbacks = {}
+
+    def add(self, record: _QueuedRecord) -> None:
+        sids = {sid for sid in self.connection.savepoint_ids if sid is not None}
+        for sid in sids:
+            sql = self.connection.ops.savepoint_rollback_sql(sid)
+            self.rollbacks[sql] = sid
+        self.records.append((sids, record))
+
+    def __call__(self, execute, sql, params, many, context):
+        result = execute(sql, params, many, context)
+        sid = self.rollbacks.pop(sql, None)
+        if sid is not None:
+            self.records = [
+                (sids, record) for sids, record in self.records if sid not in sids
+            ]
+        return result
+
+    def write(self) -> None:
+        records = [record for sids, record in self.records]
+        self.records = []
+        self.rollbacks = {}
+        write_history_records(self.alias, records)
+
+
+def write_history_records(alias: str, records: list) -> None:
+    """This function writes queued history rows with one bulk INSERT per history
+    model, in the order they were queued, and then sends the
+    post_create_historical_record signals.
+
+    Args:
+        alias (str): The database the rows are written to
+        records (list): The queued records
+    """
+    rows = {}
+    for record in records:
+        history_instance = record.history_instance
+        rows.setdefault(type(history_instance), []).append(history_instance)
+
+    for model, instances in rows.items():
+        model._default_manager.using(alias).bulk_create(instances)
+
+    for record in records:
+        history_instance = record.history_instance
+        post_create_historical_record.send(
+            sender=type(history_instance),
+            instance=record.instance,
+            history_instance=history_instance,
+            history_date=history_instance.history_date,
+            history_user=history_instance.history_user,
+            history_change_reason=history_instance.history_change_reason,
+            using=record.using,
+        )
+
+
+@contextmanager
+def batched_history(using: Optional[str] = None):
+    """Context manager (and decorator, `@batched_history()`) running a block in
+    transaction.atomic().
+    With `settings.HISTORY_DEFERRED_WRITES`, the history rows of the changes
+    saved in the block are queued and written with one bulk INSERT per history
+    model when the block ends, before its transaction commits: they are committed
+    or rolled back with the changes. A block nested in another one adds its rows
+    to the outer batch.
+
+    Args:
+        using (str, optional): The database, the default one if not given
+    """
+    alias = using or DEFAULT_DB_ALIAS
+    with transaction.atomic(using=alias):
+        connection = transaction.get_connection(alias)
+        if getattr(connection, "history_batch", None) is not None:
+            yield
+            return
+
+        batch = connection.history_batch = _Batch(alias)
+        try:
+            with connection.execute_wrapper(batch):
+                yield
+        finally:
+            connection.history_batch = None
+        batch.write()
+
+
+class DeferredHistoricalRecords(HistoricalRecords):
+    """HistoricalRecords that, with `settings.HISTORY_DEFERRED_WRITES`, queue the
+    history rows of the changes saved in a batched_history() block, to write them
+    in bulk at the end of the block. The rows are built when the change is saved,
+    so they keep its values, date and user. Changes saved outside of a block, and
+    models with tracked many to many fields, are written right away.
+
+    The history tables also get an (id, history_date) index, for the history of
+    one row and its state at a point in time (see get_history_as_of()).
+    """
+
+    def get_meta_options(self, model):
+        meta_fields = super().get_meta_options(model)
+        meta_fields["indexes"] = [
+            models.Index(
+                fields=[model._meta.pk.attname, "history_date"],
+                name=f"{model._meta.model_name[:15]}_hist_as_of_idx",
+            )
+        ]
+        return meta_fields
+
+    def create_historical_record(self, instance, history_type, using=None):
+        if not settings.HISTORY_DEFERRED_WRITES or self.m2m_fields:
+            return super().create_historical_record(instance, history_type, using)
+
+        using = using if self.use_base_model_db else None
+        manager = getattr(instance, self.manager_name)
+        alias = using or router.db_for_write(manager.model, instance=instance)
+        batch = getattr(transaction.get_connection(alias), "history_batch", None)
+        if batch is None:
+            return super().create_historical_record(instance, history_type, using)
+
+        history_date = getattr(instance, "_history_date", timezone.now())
+        history_user = self.get_history_user(instance)
+        history_change_reason = self.get_change_reason_for_object(
+            instance, history_type, using
+        )
+
+        attrs = {}
+        for field in self.fields_included(instance):
+            attrs[field.attname] = getattr(instance, field.attname)
+
+        relation_field = getattr(manager.model, "history_relation", None)
+        if relation_field is not None:
+            attrs["history_relation"] = instance
+
+        history_instance = manager.model(
+            history_date=history_date,
+            history_type=history_type,
+            history_user=history_user,
+            history_change_reason=history_change_reason,
+            **attrs,
+        )
+
+        pre_create_historical_record.send(
+            sender=manager.model,
+            instance=instance,
+            history_date=history_date,
+            history_user=history_user,
+            history_change_reason=history_change_reason,
+            history_instance=history_instance,
+            using=using,
+        )
+
+        batch.add(_QueuedRecord(history_instance, instance, using))
+
+
+def get_history_as_of(model: type, pk, as_of: datetime.datetime):
+    """This function gets the history row holding the state of a row at a point in
+    time, with the (id, history_date) index of the history table.
+
+    Args:
+        model (type): The model with the history
+        pk: The id of the row
+        as_of (datetime.datetime): The point in time
+
+    Returns:
+        The history row, None if the row did not exist at that time
+    """
+    record = (
+        model.history.filter(**{model._meta.pk.attname: pk}, history_date__lte=as_of)
+        .order_by("-history_date", "-history_id")
+        .first()
+    )
+    if record is None or record.history_type == "-":
+        return None
+    return record
+
+
+def compact_history(model: type, chunk_size: int = 1000) -> int:
+    """This function deletes the history rows of a model that changed nothing since
+    the previous row of the same object, apart from the fields in
+    `settings.HISTORY_COMPACTION_IGNORED_FIELDS` (e.g. the last_login of repeated
+    logins). Rows saved by another user or with another change reason are kept.
+    The first row of each run of identical rows is kept, so the state at any point
+    in time does not change. The table is read in pages of `chunk_size` rows, the
+    duplicates of each page are deleted before the next one is read.
+
+    Args:
+        model (type): The model with the history
+        chunk_size (int, optional): Rows read and deleted per query
+
+    Returns:
+        int: The number of deleted rows
+    """
+    history_model = model.history.model
+    pk = model._meta.pk.attname
+    ignored = set(settings.HISTORY_COMPACTION_IGNORED_FIELDS)
+    fields = [
+        field.attname
+        for field in model._meta.fields
+        if field.attname != pk and field.name not in ignored
+    ]
+    fields += ["history_user_id", "history_change_reason"]
+    rows = history_model.objects.order_by(pk, "history_date", "history_id")
+
+    deleted = 0
+    previous = None
+    last = None
+    while True:
+        page = rows
+        if last is not None:
+            # keyset pagination on the (id, history_date) index
+            object_id, history_date, history_id = last
+            page = page.filter(
+                Q(**{f"{pk}__gt": object_id})
+                | Q(**{pk: object_id, "history_date__gt": history_date})
+                | Q(
+                    **{pk: object_id, "history_date": history_date},
+                    history_id__gt=history_id,
+                )
+            )
+        page = list(
+            page.values_list(
+                "history_id", "history_date", "history_type", pk, *fields
+            )[:chunk_size]
+        )
+        if not page:
+            return deleted
+
+        duplicates = []
+        for history_id, history_date, history_type, object_id, *values in page:
+            if (
+                history_type == "~"
+                and previous is not None
+                and previous[0] == object_id
+                and previous[1] == values
+            ):
+                duplicates.append(history_id)
+            else:
+                previous = (object_id, values)
+        if duplicates:
+            deleted += history_model.objects.filter(
+                history_id__in=duplicates
+            ).delete()[0]
+        last = (object_id, history_date, history_id)
+
+
+def prune_history(
+    model: type, before: datetime.datetime, chunk_size: int = 1000
+) -> int:
+    """This function deletes the history rows of a model older than a date. The
+    newest of them is kept for the objects that still existed then, so their
+    state at any point after the date can still be looked up.
+
+    Args:
+        model (type): The model with the history
+        before (datetime.datetime): The rows older than this are deleted
+        chunk_size (int, optional): Rows deleted per query
+
+    Returns:
+        int: The number of deleted rows
+    """
+    history_model = model.history.model
+    pk = model._meta.pk.attname
+    old = history_model.objects.filter(history_date__lt=before)
+    newest = (
+        old.filter(**{pk: OuterRef(pk)})
+        .order_by("-history_date", "-history_id")
+        .values("history_id")[:1]
+    )
+    # selected once, the chunks below only read the primary key index
+    kept = set(
+        old.filter(history_id=Subquery(newest))
+        .exclude(history_type="-")
+        .values_list("history_id", flat=True)
+    )
+
+    deleted = 0
+    last = 0
+    while True:
+        ids = list(
+            old.filter(history_id__gt=last)
+            .order_by("history_id")
+            .values_list("history_id", flat=True)[:chunk_size]
+        )
+        if not ids:
+            return deleted
+        last = ids[-1]
+        expired = [history_id for history_id in ids if history_id not in kept]
+        if expired:
+            deleted += history_model.objects.filter(history_id__in=expired).delete()[0]
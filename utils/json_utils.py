@@ -0,0 +1,73 @@
+from django.conf import settings
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+# datetimes are passed through to DRF's encoder, orjson writes "+00:00" where DRF
+# writes "Z"
+_default = encoders.JSONEncoder().default
+
+
+class FastJSONRenderer(JSONRenderer):
+    """The `JSONRenderer` of DRF, with orjson doing the encoding when it is
+    installed. The output is the same bytes as DRF's, decimals, UUIDs, dates and
+    times included, with two documented exceptions: orjson writes NaN and
+    infinite floats as null where DRF refuses them, and writes float exponents
+    without padding (1e16 and 1.5e-7 where DRF writes 1e+16 and 1.5e-07). The
+    serializers render decimals as strings, so neither shows up in the APIs.
+    Indented output (the browsable API),
+    `UNICODE_JSON = False`, `COMPACT_JSON = False` and the data orjson can't
+    encode (e.g. integers over 64 bits) fall back to DRF's renderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if orjson is None or indent or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data,
+                default=_default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # escaped like DRF does, so the output is a strict javascript subset
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028")
+            ret = ret.replace(b"\xe2\x80\xa9", b"\\u2029")
+        return ret
+
+
+class FastJSONParser(JSONParser):
+    """The `JSONParser` of DRF, with orjson doing the decoding when it is installed.
+    Like DRF with `STRICT_JSON`, NaN and Infinity are refused. Bodies that are not
+    UTF-8 and `STRICT_JSON = False` fall back to DRF's parser.
+    """
+
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        if orjson is None or not self.strict or encoding.lower() not in (
+            "utf-8",
+            "utf8",
+        ):
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError("JSON parse error - %s" % str(exc))
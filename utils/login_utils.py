@@ -0,0 +1,116 @@
+import atexit
+import datetime
+import logging
+import threading
+
+from django.conf import settings
+from django.db import DatabaseError, connections, transaction
+from django.db.models import DateTimeField, F, Value
+from django.db.models.functions import Coalesce, Greatest
+
+logger = logging.getLogger(__name__)
+
+
+class LastLoginBuffer:
+    """Write-behind buffer of the last_login timestamps of users and restaurant
+    staff. A login only records the timestamp in memory, the buffer is written
+    with one bulk UPDATE per model (per `settings.LAST_LOGIN_BATCH_SIZE` rows) by
+    a background thread, every `settings.LAST_LOGIN_FLUSH_INTERVAL` seconds and as
+    soon as a batch is full, and when the process exits. Repeated logins of the
+    same row are coalesced. The UPDATE only moves last_login forward, so an older
+    timestamp buffered by one worker never overwrites a newer one written by
+    another, and it skips validation, auto_now and the history records.
+
+    The thread is started by the WSGI and ASGI applications (see start()), in each
+    worker process. Without it (management commands, tests) the buffer is only
+    written by flush().
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # model -> {pk: last_login}
+        self.pending = {}
+        self.count = 0
+        self.flush_requested = threading.Event()
+        self.thread = None
+
+    def record(self, model: type, pk, last_login: datetime.datetime) -> None:
+        with self.lock:
+            rows = self.pending.setdefault(model, {})
+            if pk not in rows:
+                self.count += 1
+            rows[pk] = last_login
+            full = self.count >= settings.LAST_LOGIN_BATCH_SIZE
+        if full:
+            # written by the flush thread, not on the path of this login
+            self.flush_requested.set()
+
+    def start(self) -> None:
+        """Starts the thread flushing the buffer, once per process."""
+        with self.lock:
+            if self.thread is not None:
+                return
+            self.thread = threading.Thread(
+                target=self._run, name="last-login-flush", daemon=True
+            )
+        self.thread.start()
+
+    def _run(self) -> None:
+        while True:
+            self.flush_requested.wait(settings.LAST_LOGIN_FLUSH_INTERVAL)
+            self.flush_requested.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Could not flush the last logins")
+            finally:
+                # the connections of this thread are not closed by a request
+                connections.close_all()
+
+    def flush(self) -> None:
+        with self.lock:
+            pending = self.pending
+            self.pending, self.count = {}, 0
+        if not pending:
+            return
+
+        batch_size = settings.LAST_LOGIN_BATCH_SIZE
+        for model, rows in pending.items():
+            objs = [
+                model(pk=pk, last_login=self._later_of(value))
+                for pk, value in rows.items()
+            ]
+            try:
+                with transaction.atomic():
+                    model.objects.bulk_update(
+                        objs, ["last_login"], batch_size=batch_size
+                    )
+            except DatabaseError:
+                logger.exception("Could not write %d last logins", len(objs))
+
+    @staticmethod
+    def _later_of(value: datetime.datetime):
+        # GREATEST() is NULL on some databases when one of the values is
+        value = Value(value, output_field=DateTimeField())
+        return Greatest(Coalesce(F("last_login"), value), value)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.pending, self.count = {}, 0
+        self.flush_requested.clear()
+
+
+last_login_buffer = LastLoginBuffer()
+atexit.register(last_login_buffer.flush)
+
+
+def record_last_login(model: type, pk, last_login: datetime.datetime) -> None:
+    """This function records the `last_login` of a user or restaurant staff to be
+    written by the next flush of the last login buffer.
+
+    Args:
+        model (type): The model of the row
+        pk: The id of the row
+        last_login (datetime.datetime): The time of the login
+    """
+    last_login_buffer.record(model, pk, last_login)
@@ -1,18 +1,21 @@
-from django.db.models import Model
+from typing import Union
+
+from django.db.models import Model, QuerySet
 
 from rest_framework import exceptions as rest_exceptions
 
 
-def get_object_or_rest_404(obj: Model, **kwargs) -> Model:
+def get_object_or_rest_404(obj: Union[Model, QuerySet], **kwargs) -> Model:
     """This is a custom function that returns an object or raises a REST 404 exception.
 
     Args:
-        obj (Model): The model object.
+        obj (Union[Model, QuerySet]): The model class, or a queryset to get the object from.
 
     Returns:
         Model: The model object.
     """
+    queryset = obj if isinstance(obj, QuerySet) else obj.objects.all()
     try:
-        return obj.objects.get(**kwargs)
-    except (obj.DoesNotExist, Exception) as e:
+        return queryset.get(**kwargs)
+    except (queryset.model.DoesNotExist, Exception) as e:
         raise rest_exceptions.NotFound(e)
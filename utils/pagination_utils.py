@@ -0,0 +1,245 @@
+import base64
+import binascii
+import datetime
+import json
+from itertools import islice
+from typing import Optional, Sequence, Type, Union
+
+from django.db.models import Q, QuerySet
+from django.http import StreamingHttpResponse
+
+from rest_framework import exceptions as rest_exceptions
+from rest_framework.request import Request
+from rest_framework.serializers import Serializer
+
+from utils.json_utils import FastJSONRenderer
+from utils.queryset_utils import plan_queryset
+from utils.serializer_utils import compile_serializer
+
+ORDER_ORDERING = ("-date_created", "-order_id")
+RESTAURANT_ORDERING = ("-rating", "id")
+ID_ORDERING = ("id",)
+STREAM_CHUNK_SIZE = 500
+
+
+class KeysetPagination:
+    """Cursor pagination that seeks on the ordering columns instead of using OFFSET,
+    so fetching a page deep in the list costs the same as fetching the first one.
+
+    The last field of the ordering must be unique (e.g the primary key) so that
+    rows sharing the same value on the other fields are never skipped.
+    Pagination only kicks in when the client sends `cursor` or `page_size`.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    page_size = 20
+    max_page_size = 100
+
+    def __init__(self, ordering: Sequence[str]):
+        self.ordering = tuple(ordering)
+        self.next_cursor = None
+
+    def paginate_queryset(self, queryset: QuerySet, request: Request) -> Optional[list]:
+        """This function returns a page of the queryset.
+
+        Args:
+            queryset (QuerySet): The queryset to paginate
+            request (Request): The request holding the `cursor`/`page_size` params
+
+        Raises:
+            rest_exceptions.NotFound: If the cursor is invalid
+
+        Returns:
+            Optional[list]: The page, or None if the request does not ask for one
+        """
+        params = get_pagination_params(request)
+        if not params:
+            return None
+
+        page_size = self._get_page_size(params.get(self.page_size_query_param))
+        queryset = queryset.order_by(*self.ordering)
+        cursor = params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(self._seek(queryset, self._decode(cursor)))
+
+        page = list(queryset[: page_size + 1])
+        if len(page) > page_size:
+            page = page[:page_size]
+            self.next_cursor = self._encode(page[-1])
+        return page
+
+    def get_paginated_data(self, data: list) -> dict:
+        return {"next": self.next_cursor, "results": data}
+
+    def _get_page_size(self, value: Optional[str]) -> int:
+        if value is None:
+            return self.page_size
+        try:
+            page_size = int(value)
+        except ValueError:
+            raise rest_exceptions.ValidationError("Invalid page_size")
+        if page_size < 1:
+            raise rest_exceptions.ValidationError("Invalid page_size")
+        return min(page_size, self.max_page_size)
+
+    def _seek(self, queryset: QuerySet, values: list) -> Q:
+        # (a, b) after (x, y) is a > x OR (a = x AND b > y), with the comparison
+        # flipped for descending fields
+        if len(values) != len(self.ordering):
+            raise rest_exceptions.NotFound("Invalid cursor")
+
+        model = queryset.model
+        seek = Q()
+        equal = Q()
+        for ordering, value in zip(self.ordering, values):
+            name = ordering.lstrip("-")
+            field = model._meta.pk if name == "pk" else model._meta.get_field(name)
+            try:
+                value = field.to_python(value)
+            except Exception:
+                raise rest_exceptions.NotFound("Invalid cursor")
+            lookup = "lt" if ordering.startswith("-") else "gt"
+            seek |= equal & Q(**{f"{name}__{lookup}": value})
+            equal &= Q(**{name: value})
+        return seek
+
+    def _encode(self, obj) -> str:
+        values = []
+        for ordering in self.ordering:
+            value = getattr(obj, ordering.lstrip("-"))
+            if isinstance(value, datetime.datetime):
+                value = value.isoformat()
+            elif not isinstance(value, (int, str)):
+                value = str(value)
+            values.append(value)
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def _decode(self, cursor: str) -> list:
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (binascii.Error, ValueError):
+            raise rest_exceptions.NotFound("Invalid cursor")
+        if not isinstance(values, list):
+            raise rest_exceptions.NotFound("Invalid cursor")
+        return values
+
+
+def get_pagination_params(request: Request) -> dict:
+    """This function returns the pagination params sent with the request.
+
+    Args:
+        request (Request): The request
+
+    Returns:
+        dict: The `cursor` and `page_size` params that were sent
+    """
+    return {
+        key: request.query_params[key]
+        for key in (
+            KeysetPagination.cursor_query_param,
+            KeysetPagination.page_size_query_param,
+        )
+        if key in request.query_params
+    }
+
+
+def paginate_and_serialize(
+    queryset: QuerySet,
+    request: Request,
+    serializer_class: Type[Serializer],
+    ordering: Sequence[str],
+) -> Union[list, dict]:
+    """This function serializes a queryset with the compiled `serializer_class`,
+    paginating it if the request asks for a page. The queryset is planned for the
+    serializer first, see `plan_queryset`.
+
+    Args:
+        queryset (QuerySet): The queryset returned by a selector
+        request (Request): The request
+        serializer_class (Type[Serializer]): The OutputSerializer of the API
+        ordering (Sequence[str]): The keyset ordering, the last field must be unique
+
+    Returns:
+        Union[list, dict]: The serialized list, or {"next": cursor, "results": list}
+    """
+    queryset = plan_queryset(queryset, serializer_class, fields=ordering)
+    serialize = compile_serializer(serializer_class)
+    paginator = KeysetPagination(ordering=ordering)
+    page = paginator.paginate_queryset(queryset, request)
+    if page is None:
+        return serialize(queryset)
+    return paginator.get_paginated_data(serialize(page))
+
+
+def is_stream_requested(request: Request) -> bool:
+    """This function tells if the request asks for a streamed list (`?stream=true`).
+
+    Args:
+        request (Request): The request
+
+    Returns:
+        bool: True if the list should be streamed
+    """
+    return request.query_params.get("stream", "").lower() in ("true", "1")
+
+
+def _iter_chunks(queryset: QuerySet, ordering: Sequence[str], chunk_size: int):
+    queryset = queryset.order_by(*ordering)
+    if not queryset._prefetch_related_lookups:
+        # the chunks are read from the cursor while they are serialized, so a
+        # row is dropped as soon as it was serialized. The caller stops at the
+        # first empty chunk.
+        rows = queryset.iterator(chunk_size=chunk_size)
+        while True:
+            yield islice(rows, chunk_size)
+
+    # iterator() drops prefetch_related, so the rows are read a keyset page at a
+    # time instead, each page with its own prefetch queries
+    paginator = KeysetPagination(ordering=ordering)
+    chunk = list(queryset[:chunk_size])
+    while chunk:
+        values = [getattr(chunk[-1], name.lstrip("-")) for name in ordering]
+        yield chunk
+        if len(chunk) < chunk_size:
+            return
+        chunk = list(queryset.filter(paginator._seek(queryset, values))[:chunk_size])
+
+
+def stream_and_serialize(
+    queryset: QuerySet,
+    serializer_class: Type[Serializer],
+    ordering: Sequence[str],
+    chunk_size: int = STREAM_CHUNK_SIZE,
+) -> StreamingHttpResponse:
+    """This function streams a queryset as a JSON array, `chunk_size` rows at a
+    time, so the memory used does not grow with the number of rows. The rows are
+    sorted on the keyset ordering and rendered like `paginate_and_serialize` does.
+
+    Args:
+        queryset (QuerySet): The queryset returned by a selector
+        serializer_class (Type[Serializer]): The OutputSerializer of the API
+        ordering (Sequence[str]): The keyset ordering, the last field must be unique
+        chunk_size (int): The rows read, serialized and sent at a time
+
+    Returns:
+        StreamingHttpResponse: The JSON array
+    """
+    queryset = plan_queryset(queryset, serializer_class, fields=ordering)
+    serialize = compile_serializer(serializer_class)
+    renderer = FastJSONRenderer()
+
+    def stream():
+        yield b"["
+        separator = b""
+        for chunk in _iter_chunks(queryset, ordering, chunk_size):
+            rows = serialize(chunk)
+            if not rows:
+                break
+            # the rendered chunk without its brackets
+            data = renderer.render(rows)[1:-1]
+            yield separator + data
+            separator = b","
+        yield b"]"
+
+    return StreamingHttpResponse(stream(), content_type=renderer.media_type)
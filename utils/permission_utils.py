@@ -1,7 +1,18 @@
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
 from rest_framework import exceptions as rest_exceptions
 from rest_framework.permissions import BasePermission
 
-from restaurants.models import RestaurantStaff
+from restaurants.models import Menu, MenuItem, Restaurant, RestaurantStaff
+from users.models import CustomUser
+from utils.cache_utils import is_cache_shared
+
+STAFF_MEMBERSHIPS_KEY = "permissions:user:{}:staff"
+RESTAURANT_OF_KEY = "permissions:{}:{}:restaurant"
 
 
 class IsAdminUser(BasePermission):
@@ -16,19 +27,138 @@ class IsAdminUser(BasePermission):
             raise rest_exceptions.PermissionDenied(e)
 
 
+def get_staff_memberships(user: CustomUser) -> dict:
+    """This function gets the restaurants a user is staff of. They are loaded once
+    per user object (so once per request) and, when the Django cache is shared by
+    the workers, kept there until `settings.STAFF_MEMBERSHIPS_CACHE_TIMEOUT`.
+    Saving or deleting a RestaurantStaff invalidates them (see
+    restaurants.signals). A process local cache can't be invalidated in the other
+    workers, so it is not used: a demoted admin would keep their rights there.
+
+    Args:
+        user (CustomUser): The user
+
+    Returns:
+        dict: {restaurant id: is_restaurant_admin}
+    """
+    memberships = getattr(user, "_staff_memberships", None)
+    if memberships is not None:
+        return memberships
+
+    shared = is_cache_shared()
+    key = STAFF_MEMBERSHIPS_KEY.format(user.id)
+    memberships = cache.get(key) if shared else None
+    if memberships is None:
+        memberships = dict(
+            RestaurantStaff.objects.filter(user=user).values_list(
+                "restaurant_id", "is_restaurant_admin"
+            )
+        )
+        if shared:
+            cache.set(
+                key, memberships, timeout=settings.STAFF_MEMBERSHIPS_CACHE_TIMEOUT
+            )
+    user._staff_memberships = memberships
+    return memberships
+
+
+def invalidate_staff_memberships(user_id: int) -> None:
+    """This function drops the cached staff memberships of a user once the current
+    transaction commits.
+
+    Args:
+        user_id (int): The id of the user
+    """
+    key = STAFF_MEMBERSHIPS_KEY.format(user_id)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+# model name -> the model and the path from it to its restaurant id
+RESTAURANT_PATHS = {
+    "menu": (Menu, "restaurant_id"),
+    "menu_item": (MenuItem, "menu__restaurant_id"),
+}
+
+
+def get_restaurant_id(model_name: str, pk) -> Optional[int]:
+    """This function gets the restaurant a restaurant, menu or menu item belongs
+    to. The restaurant of a menu never changes, so it is cached.
+
+    Args:
+        model_name (str): "restaurant", "menu" or "menu_item"
+        pk: The id of the row
+
+    Returns:
+        Optional[int]: The restaurant id, None if the menu or menu item does not
+            exist
+    """
+    if model_name == "restaurant":
+        return pk
+
+    model, path = RESTAURANT_PATHS[model_name]
+    key = RESTAURANT_OF_KEY.format(model_name, pk)
+    restaurant_id = cache.get(key)
+    if restaurant_id is None:
+        restaurant_id = (
+            model.objects.filter(pk=pk).values_list(path, flat=True).first()
+        )
+        if restaurant_id is not None:
+            cache.set(
+                key, restaurant_id, timeout=settings.STAFF_MEMBERSHIPS_CACHE_TIMEOUT
+            )
+    return restaurant_id
+
+
+def _get_object_restaurant_id(obj) -> Optional[int]:
+    if isinstance(obj, Restaurant):
+        return obj.id
+    if isinstance(obj, Menu):
+        return obj.restaurant_id
+    if isinstance(obj, MenuItem):
+        return obj.menu.restaurant_id
+    return getattr(obj, "restaurant_id", None)
+
+
 class IsRestaurantAdmin(BasePermission):
     """
     Allows access only to restaurant admin users.
+
+    A view can declare the restaurant it changes with `restaurant_lookup`, a
+    ("restaurant" | "menu" | "menu_item", name) pair. The id is read from the url
+    kwarg `name`, or from the request data for the views that create rows. The
+    user must then be an admin of that restaurant. A target that does not exist
+    (or an id the view's serializer will refuse) is left to the view.
     """
 
     def has_permission(self, request, view):
         if request.user.is_anonymous:
             raise rest_exceptions.NotAuthenticated("User is not authenticated")
-        try:
-            obj = RestaurantStaff.objects.get(user=request.user)
-        except RestaurantStaff.DoesNotExist:
+        memberships = get_staff_memberships(request.user)
+        if not any(memberships.values()):
             raise rest_exceptions.PermissionDenied("User is not a restaurant admin")
+
+        lookup = getattr(view, "restaurant_lookup", None)
+        if lookup is None:
+            return True
+        model_name, name = lookup
+        pk = view.kwargs.get(name)
+        if pk is None and hasattr(request.data, "get"):
+            pk = request.data.get(name)
         try:
-            return bool(request.user and obj.is_restaurant_admin)
-        except AttributeError as e:
-            raise rest_exceptions.PermissionDenied(e)
+            restaurant_id = get_restaurant_id(model_name, int(pk))
+        except (TypeError, ValueError):
+            return True
+        if restaurant_id is None:
+            return True
+        return self._is_admin_of(memberships, restaurant_id)
+
+    def has_object_permission(self, request, view, obj):
+        restaurant_id = _get_object_restaurant_id(obj)
+        return self._is_admin_of(get_staff_memberships(request.user), restaurant_id)
+
+    def _is_admin_of(self, memberships: dict, restaurant_id: int) -> bool:
+        if not memberships.get(restaurant_id):
+            raise rest_exceptions.PermissionDenied(
+                "User is not an admin of this restaurant"
+            )
+        return True
@@ -0,0 +1,167 @@
+from typing import Optional, Sequence, Type
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Model, Prefetch, QuerySet
+
+from rest_framework import serializers
+
+
+class _Plan:
+    """The fields of one model a serializer reads, and the relations it follows."""
+
+    def __init__(self, model: Type[Model]):
+        self.model = model
+        self.fields = set()
+        # relation name -> _Plan, joined with select_related
+        self.selects = {}
+        # relation name -> _Plan, loaded with prefetch_related
+        self.prefetches = {}
+        # False when some read is unknown, so no field can be deferred
+        self.complete = True
+
+
+def _get_field(model: Type[Model], name: str):
+    try:
+        field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        # reverse relations are traversed by their accessor, e.g. orderitem_set
+        for field in model._meta.related_objects:
+            if field.get_accessor_name() == name:
+                return field
+        return None
+    if field.auto_created and not field.concrete and field.get_accessor_name() != name:
+        return None
+    return field
+
+
+def _add_path(plan: _Plan, attrs: Sequence[str]) -> Optional[_Plan]:
+    """Adds a lookup to the plan. Returns the plan of the related model when the
+    lookup ends on a relation."""
+    for name in attrs:
+        field = _get_field(plan.model, name)
+        if field is None:
+            # a property or a method, what it reads is unknown
+            plan.complete = False
+            return None
+        # a column, or the column of a foreign key read by its attname (menu_id)
+        attname = getattr(field, "attname", None)
+        if not field.is_relation or name == attname != field.name:
+            plan.fields.add(field.name)
+            return None
+        if field.many_to_many or field.one_to_many:
+            plan = plan.prefetches.setdefault(name, _Plan(field.related_model))
+            if field.one_to_many:
+                # prefetch_related matches the rows on the foreign key
+                plan.fields.add(field.field.name)
+        elif field.concrete:
+            plan.fields.add(field.name)
+            plan = plan.selects.setdefault(name, _Plan(field.related_model))
+        else:
+            plan.complete = False
+            return None
+    return plan
+
+
+def _add_serializer(plan: _Plan, serializer: serializers.Serializer) -> None:
+    for field in serializer._readable_fields:
+        if isinstance(field, serializers.SerializerMethodField):
+            method = getattr(serializer, field.method_name)
+            lookups = getattr(method, "depends_on", None)
+            if lookups is None:
+                plan.complete = False
+            for lookup in lookups or ():
+                related = _add_path(plan, lookup.split("__"))
+                if related is not None:
+                    # the whole related rows are read
+                    related.complete = False
+        elif isinstance(field, serializers.ListSerializer):
+            related = _add_path(plan, field.source_attrs)
+            if related is not None:
+                _add_serializer(related, field.child)
+        elif isinstance(field, serializers.Serializer):
+            related = plan
+            if field.source_attrs:
+                related = _add_path(plan, field.source_attrs)
+            if related is not None:
+                _add_serializer(related, field)
+        elif isinstance(field, serializers.PrimaryKeyRelatedField):
+            _add_path(plan, field.source_attrs[:-1] + [field.source_attrs[-1] + "_id"])
+        elif not field.source_attrs:
+            plan.complete = False
+        else:
+            related = _add_path(plan, field.source_attrs)
+            if related is not None:
+                related.complete = False
+
+
+def _flatten(plan: _Plan, prefix: str = "") -> tuple:
+    fields = [prefix + name for name in plan.fields]
+    selects = []
+    prefetches = {prefix + name: related for name, related in plan.prefetches.items()}
+    complete = plan.complete
+    for name, related in plan.selects.items():
+        selects.append(prefix + name)
+        related_fields, related_selects, related_prefetches, related_complete = (
+            _flatten(related, prefix + name + "__")
+        )
+        fields += related_fields
+        selects += related_selects
+        prefetches.update(related_prefetches)
+        complete = complete and related_complete
+    return fields, selects, prefetches, complete
+
+
+def _apply(queryset: QuerySet, plan: _Plan, fields: Sequence[str] = ()) -> QuerySet:
+    only, selects, prefetches, complete = _flatten(plan)
+    if selects:
+        queryset = queryset.select_related(*selects)
+
+    lookups = []
+    for lookup in queryset._prefetch_related_lookups:
+        path = lookup.prefetch_to if isinstance(lookup, Prefetch) else lookup
+        if path in prefetches:
+            # the selector's queryset is kept, with the plan applied to it
+            related = prefetches.pop(path)
+            base = getattr(lookup, "queryset", None)
+            if base is None:
+                base = related.model._default_manager.all()
+            lookups.append(Prefetch(path, queryset=_apply(base, related)))
+        elif path not in selects:
+            lookups.append(lookup)
+    for path, related in prefetches.items():
+        base = related.model._default_manager.all()
+        lookups.append(Prefetch(path, queryset=_apply(base, related)))
+    queryset = queryset.prefetch_related(None).prefetch_related(*lookups)
+
+    deferred_fields, defer = queryset.query.deferred_loading
+    if complete and only and not deferred_fields and defer:
+        queryset = queryset.only(*only, *fields)
+    return queryset
+
+
+def plan_queryset(
+    queryset: QuerySet,
+    serializer_class: Type[serializers.Serializer],
+    fields: Sequence[str] = (),
+) -> QuerySet:
+    """This function loads what `serializer_class` reads from the rows of a queryset
+    returned by a selector. Nested serializers on forward relations are joined with
+    `select_related`, many=True ones are loaded with `prefetch_related` (keeping the
+    selector's own `Prefetch` querysets), and `only()` skips the columns that are
+    not rendered. `only()` is left out when a field reads something that can't be
+    known, like a property or a method field without `depends_on`.
+
+    Args:
+        queryset (QuerySet): The queryset returned by a selector
+        serializer_class (Type[Serializer]): The OutputSerializer of the API
+        fields (Sequence[str]): More fields to load, e.g. the pagination ordering
+
+    Returns:
+        QuerySet: The planned queryset
+    """
+    if queryset._fields is not None:
+        # values() rows are already limited to their fields
+        return queryset
+    plan = _Plan(queryset.model)
+    _add_serializer(plan, serializer_class())
+    return _apply(queryset, plan, [field.lstrip("-") for field in fields])